@@ -0,0 +1,49 @@
+"""
+Единая загрузка config.json.
+
+Файл читается и разбирается один раз на процесс: бот, обработчики, логирование
+и CLI получают один и тот же словарь через get_config().
+"""
+
+import json
+import threading
+from typing import Any, Dict
+
+CONFIG_PATH = "config.json"
+
+# path -> разобранный JSON
+_configs: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+def get_config(path: str = CONFIG_PATH) -> Dict[str, Any]:
+    """
+    Parsed config file, loaded on first call and shared afterwards.
+
+    Raises FileNotFoundError / json.JSONDecodeError like json.load; callers
+    decide whether a missing config is fatal.
+    """
+    config = _configs.get(path)
+    if config is not None:
+        return config
+    with _lock:
+        if path not in _configs:
+            with open(path, "r", encoding="utf-8") as f:
+                _configs[path] = json.load(f)
+        return _configs[path]
+
+
+def reload_config(path: str = CONFIG_PATH) -> Dict[str, Any]:
+    """
+    Re-read the config file in place (e.g. after restoring a backup).
+
+    The shared dict is updated rather than replaced, so modules holding a
+    reference from get_config() see the new values.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        fresh = json.load(f)
+    with _lock:
+        config = _configs.setdefault(path, {})
+        config.clear()
+        config.update(fresh)
+        return config
@@ -0,0 +1,329 @@
+"""
+Microbenchmarks for database.py hot paths on a database of realistic size.
+
+Seeds a temporary database (participants, bot_users, archived races,
+waitlist), times the functions used on every user interaction and by
+admin flows, and writes the results to a JSON baseline. With --compare
+the run is checked against a saved baseline and exits with code 1 if any
+benchmark got slower than the threshold.
+
+Usage:
+    python -m benchmarks.db_hotpaths --output benchmarks/baseline.json
+    python -m benchmarks.db_hotpaths --compare benchmarks/baseline.json --threshold 0.2
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import database  # noqa: E402
+
+USER_ID_BASE = 100000000
+ROLES = ["runner"] * 9 + ["volunteer"]
+GENDERS = ["male", "female"]
+CATEGORIES = ["СуперЭлита", "Элита", "Классика", "Женский", None]
+CLUSTERS = ["A", "B", "C", "D", "E", None]
+
+DEFAULT_SIZES = {"participants": 5000, "bot_users": 20000, "races": 30, "waitlist": 2000}
+
+
+# ============================================================================
+# SEEDING
+# ============================================================================
+
+
+def _participant_row(rng: random.Random, user_id: int, reg_date: str, bib_number: Optional[str] = None) -> tuple:
+    role = rng.choice(ROLES)
+    return (
+        user_id,
+        f"user_{user_id}",
+        f"Участник {user_id}",
+        f"{rng.randint(5, 15)}:{rng.randint(0, 59):02d}",
+        role,
+        reg_date,
+        rng.choice(["paid", "pending"]) if role == "runner" else "-",
+        bib_number,
+        f"{rng.randint(5, 15)}:{rng.randint(0, 59):02d},{rng.randint(0, 99):02d}" if rng.random() < 0.8 else None,
+        rng.choice(GENDERS),
+        rng.choice(CATEGORIES),
+        rng.choice(CLUSTERS),
+    )
+
+
+def seed_database(db_path: str, sizes: Dict[str, int], seed: int = 42):
+    """Create a database with the given number of rows in every hot table"""
+    rng = random.Random(seed)
+    database.DB_PATH = db_path
+    database.init_db()
+    database.set_setting("max_runners", sizes["participants"])
+    deadline = datetime.now() + timedelta(days=7)
+    database.set_setting("reg_end_date", deadline.strftime("%H:%M %d.%m.%Y"))
+
+    now = datetime.now()
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+
+        # Архивные забеги: каждый следующий забег — часть пула bot_users
+        race_date = now - timedelta(days=30 * (sizes["races"] + 1))
+        for race in range(sizes["races"]):
+            race_date += timedelta(days=30)
+            table_name = f"race_{race_date.strftime('%d_%m_%Y')}"
+            cursor.execute(
+                f"""
+                CREATE TABLE {table_name} (
+                    user_id INTEGER PRIMARY KEY,
+                    username TEXT,
+                    name TEXT NOT NULL,
+                    target_time TEXT,
+                    role TEXT NOT NULL,
+                    reg_date TEXT NOT NULL,
+                    payment_status TEXT DEFAULT 'pending',
+                    bib_number TEXT,
+                    result TEXT,
+                    gender TEXT,
+                    category TEXT,
+                    cluster TEXT,
+                    archive_date TEXT NOT NULL
+                )
+                """
+            )
+            archive_date = race_date.strftime("%Y-%m-%d %H:%M:%S")
+            runners = rng.sample(range(sizes["bot_users"]), min(sizes["participants"] // 2, sizes["bot_users"]))
+            cursor.executemany(
+                f"INSERT INTO {table_name} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    _participant_row(rng, USER_ID_BASE + index, archive_date) + (archive_date,)
+                    for index in runners
+                ],
+            )
+
+        cursor.executemany(
+            """
+            INSERT INTO bot_users (user_id, username, first_name, last_name, first_interaction, last_interaction)
+            VALUES (?, ?, ?, NULL, ?, ?)
+            """,
+            [
+                (USER_ID_BASE + i, f"user_{USER_ID_BASE + i}", f"Пользователь {i}", "2023-01-01 10:00:00", "2024-01-01 10:00:00")
+                for i in range(sizes["bot_users"])
+            ],
+        )
+
+        reg_date = now.strftime("%Y-%m-%d %H:%M:%S")
+        cursor.executemany(
+            """
+            INSERT INTO participants
+            (user_id, username, name, target_time, role, reg_date, payment_status, bib_number, result, gender, category, cluster)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                _participant_row(rng, USER_ID_BASE + i, reg_date, str(i + 1))
+                for i in range(sizes["participants"])
+            ],
+        )
+
+        waitlist_start = USER_ID_BASE + sizes["participants"]
+        cursor.executemany(
+            """
+            INSERT INTO waitlist (user_id, username, name, target_time, role, gender, join_date, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 'waiting')
+            """,
+            [
+                (
+                    waitlist_start + i,
+                    f"user_{waitlist_start + i}",
+                    f"Ожидающий {i}",
+                    "9:00",
+                    rng.choice(ROLES),
+                    rng.choice(GENDERS),
+                    (now + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S"),
+                )
+                for i in range(sizes["waitlist"])
+            ],
+        )
+        conn.commit()
+    # Архивы записаны напрямую, минуя archive_race_data: сводку участия строим отдельно
+    database.rebuild_user_race_summary()
+
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+
+
+def _timed(fn: Callable[[], object], iterations: int, setup: Optional[Callable[[], None]] = None) -> List[float]:
+    """Run fn `iterations` times, return wall time of each call in milliseconds"""
+    timings = []
+    for _ in range(iterations):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def _cycle(values: List[int]) -> Callable[[], int]:
+    iterator = iter(values)
+    return lambda: next(iterator)
+
+
+def run_benchmarks(db_path: str, sizes: Dict[str, int], iterations: int, seed: int = 42) -> Dict[str, dict]:
+    rng = random.Random(seed)
+    participant_ids = [USER_ID_BASE + i for i in range(sizes["participants"])]
+    waitlist_ids = [USER_ID_BASE + sizes["participants"] + i for i in range(sizes["waitlist"])]
+    history_ids = [USER_ID_BASE + i for i in range(sizes["bot_users"])]
+
+    database.DB_PATH = db_path
+    # Тяжелые и разрушающие операции выполняются на копии, чтобы не портить общую базу
+    scratch_path = db_path + ".scratch"
+
+    def fresh_scratch():
+        shutil.copyfile(db_path, scratch_path)
+        database.DB_PATH = scratch_path
+
+    slow_iterations = max(3, iterations // 20)
+    cancel_ids = rng.sample(participant_ids, min(iterations, len(participant_ids)))
+    lookup_ids = _cycle([rng.choice(participant_ids) for _ in range(iterations)])
+    waitlist_lookup = _cycle([rng.choice(waitlist_ids) for _ in range(iterations)])
+    history_lookup = _cycle([rng.choice(history_ids) for _ in range(iterations * 2)])
+    cancel_lookup = _cycle(cancel_ids)
+
+    cases = [
+        ("get_setting", iterations, lambda: database.get_setting("max_runners"), None),
+        ("get_participant_by_user_id", iterations, lambda: database.get_participant_by_user_id(lookup_ids()), None),
+        ("get_waitlist_position", iterations, lambda: database.get_waitlist_position(waitlist_lookup()), None),
+        ("get_user_race_history", iterations, lambda: database.get_user_race_history(history_lookup()), None),
+        ("get_user_race_summary", iterations, lambda: database.get_user_race_summary(history_lookup()), None),
+        ("get_historical_participants", slow_iterations, database.get_historical_participants, None),
+        ("get_participants_with_categories", slow_iterations, database.get_participants_with_categories, None),
+        ("archive_race_data", slow_iterations, lambda: database.archive_race_data(datetime.now().strftime("%d.%m.%Y")), fresh_scratch),
+    ]
+
+    results: Dict[str, dict] = {}
+    for name, count, fn, setup in cases:
+        database.DB_PATH = db_path
+        timings = _timed(fn, count, setup)
+        results[name] = _summary(timings)
+        print(f"  {name:<36}{results[name]['median_ms']:>10.3f} мс (n={count})")
+
+    # Отмена участия меняет строки — на одной копии, каждый раз новый пользователь
+    fresh_scratch()
+    timings = _timed(lambda: database.cancel_user_participation(cancel_lookup()), len(cancel_ids))
+    results["cancel_user_participation"] = _summary(timings)
+    print(f"  {'cancel_user_participation':<36}{results['cancel_user_participation']['median_ms']:>10.3f} мс (n={len(cancel_ids)})")
+
+    database.DB_PATH = db_path
+    # События аудита записываются в копию до ее удаления, а не при выходе из процесса
+    database.flush_events()
+    if os.path.exists(scratch_path):
+        os.remove(scratch_path)
+    return results
+
+
+def _summary(timings: List[float]) -> dict:
+    ordered = sorted(timings)
+    return {
+        "iterations": len(timings),
+        "min_ms": round(ordered[0], 4),
+        "median_ms": round(statistics.median(ordered), 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        "mean_ms": round(statistics.mean(ordered), 4),
+    }
+
+
+# ============================================================================
+# BASELINE
+# ============================================================================
+
+
+def compare(results: Dict[str, dict], baseline: dict, threshold: float) -> List[str]:
+    """Names of benchmarks whose median got slower than baseline by more than threshold"""
+    regressions = []
+    print(f"\n{'Функция':<36}{'база, мс':>12}{'сейчас, мс':>12}{'изменение':>12}")
+    for name, stats in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            print(f"{name:<36}{'—':>12}{stats['median_ms']:>12.3f}{'новая':>12}")
+            continue
+        change = stats["median_ms"] / previous["median_ms"] - 1 if previous["median_ms"] else 0.0
+        flag = " ⚠️" if change > threshold else ""
+        print(f"{name:<36}{previous['median_ms']:>12.3f}{stats['median_ms']:>12.3f}{change:>+11.0%}{flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробенчмарки горячих функций database.py")
+    parser.add_argument("--participants", type=int, default=DEFAULT_SIZES["participants"])
+    parser.add_argument("--bot-users", type=int, default=DEFAULT_SIZES["bot_users"])
+    parser.add_argument("--races", type=int, default=DEFAULT_SIZES["races"], help="Число архивных забегов")
+    parser.add_argument("--waitlist", type=int, default=DEFAULT_SIZES["waitlist"])
+    parser.add_argument("--iterations", type=int, default=200, help="Повторов для быстрых функций")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", "-o", help="Сохранить результаты как базовую линию (JSON)")
+    parser.add_argument("--compare", help="Сравнить с базовой линией (JSON)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Допустимое замедление медианы, доля")
+    args = parser.parse_args()
+
+    sizes = {
+        "participants": args.participants,
+        "bot_users": max(args.bot_users, args.participants + args.waitlist),
+        "races": args.races,
+        "waitlist": args.waitlist,
+    }
+
+    # Логи функций (INFO на каждую операцию) искажают замеры
+    logging.disable(logging.INFO)
+    tmp_dir = tempfile.mkdtemp(prefix="beermile_bench_")
+    db_path = os.path.join(tmp_dir, "race_participants.db")
+    try:
+        started = time.perf_counter()
+        seed_database(db_path, sizes, args.seed)
+        print(f"База заполнена за {time.perf_counter() - started:.1f} с: {sizes}")
+        results = run_benchmarks(db_path, sizes, args.iterations, args.seed)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    report = {
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "sizes": sizes,
+        "iterations": args.iterations,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nБазовая линия сохранена: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("sizes") != sizes:
+            print(f"⚠️ Размеры базы отличаются от базовой линии: {baseline.get('sizes')}")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ Замедление больше {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\n✅ Регрессий больше {args.threshold:.0%} нет")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Local fake Telegram Bot API server for load testing.
+
+Implements the methods used by the registration flow (getUpdates,
+sendMessage, sendPhoto, sendMediaGroup, editMessageText,
+answerCallbackQuery, ...) with configurable latency and injected
+429 Too Many Requests errors. Updates are pushed by the load generator,
+replies of the bot are recorded per chat so the generator can await them.
+
+Run standalone:
+    python -m benchmarks.fake_bot_api --port 8081 --latency-ms 50 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+BOT_USER = {"id": 1000000, "is_bot": True, "first_name": "Fake Beer Mile Bot", "username": "fake_beermile_bot"}
+
+# Методы, результатом которых является отправленное сообщение
+MESSAGE_METHODS = {"sendMessage", "sendPhoto", "sendDocument", "editMessageText", "editMessageCaption", "editMessageReplyMarkup"}
+
+
+class FakeBotAPI:
+    """In-memory Bot API: an update queue for the bot and a reply log per chat."""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after: int = 1,
+        seed: Optional[int] = None,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+
+        self._updates: List[dict] = []
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._updates_changed = asyncio.Event()
+        # chat_id -> очередь (timestamp, method, payload) ответов бота
+        self._replies: Dict[int, asyncio.Queue] = defaultdict(asyncio.Queue)
+        # callback_query_id -> chat_id, чтобы answerCallbackQuery попал в лог нужного чата
+        self._callback_chats: Dict[str, int] = {}
+
+        self.calls: Counter = Counter()
+        self.errors_429: Counter = Counter()
+        self.polling_started = asyncio.Event()
+
+        self.app = web.Application(client_max_size=50 * 1024 * 1024)
+        self.app.router.add_route("*", "/bot{token}/{method}", self._handle)
+
+    # --- updates pushed by the load generator --------------------------------
+
+    def _now(self) -> int:
+        return int(time.time())
+
+    def _message(self, chat_id: int, text: Optional[str] = None, from_user: Optional[dict] = None, **extra) -> dict:
+        message = {
+            "message_id": self._next_message_id,
+            "date": self._now(),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": from_user or BOT_USER,
+        }
+        self._next_message_id += 1
+        if text is not None:
+            message["text"] = text
+        message.update(extra)
+        return message
+
+    def push_update(self, update: dict) -> int:
+        update["update_id"] = self._next_update_id
+        self._next_update_id += 1
+        self._updates.append(update)
+        self._updates_changed.set()
+        return update["update_id"]
+
+    def push_text(self, user: dict, text: str) -> int:
+        """Deliver a private text message from user to the bot"""
+        extra = {}
+        if text.startswith("/"):
+            command = text.split()[0]
+            extra["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+        message = self._message(user["id"], text, from_user=user, **extra)
+        return self.push_update({"message": message})
+
+    def push_callback(self, user: dict, data: str, message_id: int) -> int:
+        """Deliver an inline button press on a bot message"""
+        message = {
+            "message_id": message_id,
+            "date": self._now(),
+            "chat": {"id": user["id"], "type": "private"},
+            "from": BOT_USER,
+            "text": "...",
+        }
+        callback = {
+            "id": f"cb{self._next_update_id}",
+            "from": user,
+            "message": message,
+            "chat_instance": str(user["id"]),
+            "data": data,
+        }
+        self._callback_chats[callback["id"]] = user["id"]
+        return self.push_update({"callback_query": callback})
+
+    async def next_reply(self, chat_id: int, timeout: float) -> Optional[Tuple[float, str, dict]]:
+        """Wait for the next bot call addressed to chat_id: (monotonic time, method, params)"""
+        try:
+            return await asyncio.wait_for(self._replies[chat_id].get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def drain_replies(self, chat_id: int) -> int:
+        queue = self._replies[chat_id]
+        drained = 0
+        while not queue.empty():
+            queue.get_nowait()
+            drained += 1
+        return drained
+
+    # --- Bot API -------------------------------------------------------------
+
+    async def _params(self, request: web.Request) -> Dict[str, Any]:
+        if request.content_type == "application/json":
+            return await request.json()
+        params: Dict[str, Any] = {}
+        for key, value in (await request.post()).items():
+            if isinstance(value, web.FileField):
+                params[key] = f"<file {value.filename}>"
+                continue
+            # aiogram передает вложенные объекты (reply_markup, media) JSON-строками
+            if isinstance(value, str) and value[:1] in "[{":
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    pass
+            params[key] = value
+        params.update(request.query)
+        return params
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = await self._params(request)
+        self.calls[method] += 1
+
+        if method == "getUpdates":
+            return self._ok(await self._get_updates(params))
+
+        if self.latency_ms or self.jitter_ms:
+            delay = self.latency_ms + self._random.uniform(0, self.jitter_ms)
+            await asyncio.sleep(delay / 1000)
+
+        if self.error_rate and method not in ("getMe", "deleteWebhook") and self._random.random() < self.error_rate:
+            self.errors_429[method] += 1
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                },
+                status=429,
+            )
+
+        result = self._result(method, params)
+        chat_id = params.get("chat_id")
+        if method == "answerCallbackQuery":
+            # Ответ на нажатие кнопки: чат определяется по id колбэка
+            chat_id = self._callback_chats.pop(params.get("callback_query_id"), None)
+        if chat_id is not None:
+            try:
+                self._replies[int(chat_id)].put_nowait((time.monotonic(), method, params))
+            except ValueError:
+                pass
+        return self._ok(result)
+
+    async def _get_updates(self, params: Dict[str, Any]) -> List[dict]:
+        self.polling_started.set()
+        offset = int(params.get("offset") or 0)
+        if offset:
+            self._updates = [u for u in self._updates if u["update_id"] >= offset]
+        limit = int(params.get("limit") or 100)
+        timeout = min(float(params.get("timeout") or 0), 30.0)
+
+        if not self._updates and timeout:
+            self._updates_changed.clear()
+            try:
+                await asyncio.wait_for(self._updates_changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:limit]
+
+    def _result(self, method: str, params: Dict[str, Any]) -> Any:
+        chat_id = params.get("chat_id")
+        if method == "getMe":
+            return BOT_USER
+        if method in ("sendMessage", "editMessageText"):
+            message = self._message(int(chat_id or 0), params.get("text", ""))
+            if method == "editMessageText" and params.get("message_id"):
+                message["message_id"] = int(params["message_id"])
+            return message
+        if method == "editMessageCaption":
+            message = self._message(int(chat_id or 0), caption=params.get("caption", ""))
+            if params.get("message_id"):
+                message["message_id"] = int(params["message_id"])
+            return message
+        if method == "sendPhoto":
+            return self._message(
+                int(chat_id or 0),
+                caption=params.get("caption", ""),
+                photo=[{"file_id": f"fake_photo_{self._next_message_id}", "file_unique_id": "fake", "width": 1280, "height": 720}],
+            )
+        if method == "sendDocument":
+            return self._message(
+                int(chat_id or 0),
+                document={"file_id": f"fake_doc_{self._next_message_id}", "file_unique_id": "fake"},
+            )
+        if method == "sendMediaGroup":
+            media = params.get("media") or []
+            group_id = str(self._next_message_id)
+            return [
+                self._message(
+                    int(chat_id or 0),
+                    media_group_id=group_id,
+                    photo=[{"file_id": f"fake_photo_{self._next_message_id}", "file_unique_id": "fake", "width": 1280, "height": 720}],
+                )
+                for _ in media
+            ]
+        # answerCallbackQuery, deleteMessage, setMyCommands, deleteWebhook и прочие
+        return True
+
+    @staticmethod
+    def _ok(result: Any) -> web.Response:
+        return web.json_response({"ok": True, "result": result})
+
+    # --- lifecycle -----------------------------------------------------------
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8081) -> web.AppRunner:
+        runner = web.AppRunner(self.app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Telegram Bot API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Задержка ответа на каждый вызов")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Случайная добавка к задержке")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 429 Too Many Requests")
+    args = parser.parse_args()
+
+    async def serve():
+        api = FakeBotAPI(args.latency_ms, args.jitter_ms, args.error_rate)
+        await api.start(args.host, args.port)
+        print(f"Fake Bot API: http://{args.host}:{args.port}")
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
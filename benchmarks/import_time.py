@@ -0,0 +1,144 @@
+"""
+Cold-start import benchmark based on `python -X importtime`.
+
+Imports each entry point (bot handlers, database.py, the admin CLI) in a
+fresh interpreter, records the cumulative import time and checks that heavy
+modules which should be imported lazily are not pulled in at startup.
+Results go to a JSON baseline; --compare flags regressions past a threshold
+and exits with code 1 on a regression or an eagerly imported heavy module.
+
+Usage:
+    python -m benchmarks.import_time --output import_baseline.json
+    python -m benchmarks.import_time --compare import_baseline.json --threshold 0.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# name -> (module to import, modules that must stay lazy)
+TARGETS: Dict[str, Tuple[str, List[str]]] = {
+    "bot_handlers": ("handler_register", ["pandas", "reportlab", "xlsxwriter", "openpyxl", "typer"]),
+    "database": ("database", ["aiogram", "rich"]),
+    "cli": ("cli_admin.main", ["aiogram", "pandas", "pyarrow", "reportlab", "xlsxwriter", "openpyxl", "rich.progress"]),
+}
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """module -> (self us, cumulative us) from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue
+    return modules
+
+
+def measure(module: str) -> Dict[str, Tuple[int, int]]:
+    env = dict(os.environ, BOT_TOKEN=os.environ.get("BOT_TOKEN", "1:import-time"), ADMIN_ID=os.environ.get("ADMIN_ID", "1"))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(ROOT),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} завершился с ошибкой:\n{completed.stderr[-2000:]}")
+    return parse_importtime(completed.stderr)
+
+
+def run(repeat: int, top: int) -> Dict[str, dict]:
+    results = {}
+    for name, (module, lazy) in TARGETS.items():
+        totals = []
+        modules: Dict[str, Tuple[int, int]] = {}
+        for _ in range(repeat):
+            modules = measure(module)
+            totals.append(modules.get(module, (0, 0))[1] / 1000)
+        heaviest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        results[name] = {
+            "module": module,
+            "median_ms": round(statistics.median(totals), 2),
+            "min_ms": round(min(totals), 2),
+            "modules_imported": len(modules),
+            "eager_heavy_modules": [m for m in lazy if m in modules],
+            "heaviest_self_ms": {m: round(times[0] / 1000, 2) for m, times in heaviest},
+        }
+        print(f"  {name:<16}{module:<20}{results[name]['median_ms']:>10.1f} мс  модулей: {len(modules)}")
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: dict, threshold: float) -> List[str]:
+    """Names of targets whose median import time grew by more than threshold"""
+    regressions = []
+    print(f"\n{'Цель':<16}{'база, мс':>12}{'сейчас, мс':>12}{'изменение':>12}")
+    for name, stats in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            print(f"{name:<16}{'—':>12}{stats['median_ms']:>12.1f}{'новая':>12}")
+            continue
+        change = stats["median_ms"] / previous["median_ms"] - 1 if previous["median_ms"] else 0.0
+        flag = " ⚠️" if change > threshold else ""
+        print(f"{name:<16}{previous['median_ms']:>12.1f}{stats['median_ms']:>12.1f}{change:>+11.0%}{flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер времени импорта точек входа (python -X importtime)")
+    parser.add_argument("--repeat", type=int, default=5, help="Запусков интерпретатора на цель")
+    parser.add_argument("--top", type=int, default=10, help="Сколько самых тяжелых модулей сохранить")
+    parser.add_argument("--output", "-o", help="Сохранить результаты как базовую линию (JSON)")
+    parser.add_argument("--compare", help="Сравнить с базовой линией (JSON)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Допустимый рост медианы, доля")
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.top)
+    failed = False
+    for name, stats in results.items():
+        if stats["eager_heavy_modules"]:
+            failed = True
+            print(f"❌ {name}: при старте импортируются {', '.join(stats['eager_heavy_modules'])}")
+
+    report = {
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nБазовая линия сохранена: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            failed = True
+            print(f"\n❌ Импорт замедлился больше чем на {args.threshold:.0%}: {', '.join(regressions)}")
+        else:
+            print(f"\n✅ Регрессий больше {args.threshold:.0%} нет")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Registration load test: N users run /start -> name -> time -> gender at once.
+
+Starts the fake Bot API server, launches main.py against it with a
+temporary database, drives every simulated user through the registration
+flow concurrently and reports:
+  * p50/p99 latency of the first visible reply per handler step
+  * runners registered above max_runners (oversell)
+  * "database is locked" errors in the bot output
+  * injected 429 responses and steps without a reply
+
+Usage:
+    python -m benchmarks.load_registration --users 300 --max-runners 100 --latency-ms 30
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.fake_bot_api import MESSAGE_METHODS, FakeBotAPI
+
+ROOT = Path(__file__).resolve().parent.parent
+FAKE_TOKEN = "123456:LOADTEST"
+ADMIN_ID = 1
+USER_ID_BASE = 700000000
+
+STEPS = ["start", "start_registration", "name", "time", "gender"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def seed_database(db_path: str, max_runners: int):
+    """Create an empty database with an open registration"""
+    os.environ["DATABASE_PATH"] = db_path
+    sys.path.insert(0, str(ROOT))
+    import database
+
+    database.DB_PATH = db_path
+    database.init_db()
+    database.set_setting("max_runners", max_runners)
+    deadline = datetime.now() + timedelta(days=7)
+    database.set_setting("reg_end_date", deadline.strftime("%H:%M %d.%m.%Y"))
+
+
+def count_runners(db_path: str) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM participants WHERE role = 'runner'").fetchone()[0]
+
+
+async def run_user(api: FakeBotAPI, index: int, latencies: Dict[str, List[float]], failures: Dict[str, int], args):
+    user = {"id": USER_ID_BASE + index, "is_bot": False, "first_name": f"Load{index}", "username": f"load_user_{index}"}
+    chat_id = user["id"]
+    actions = [
+        ("start", lambda: api.push_text(user, "/start")),
+        ("start_registration", lambda: api.push_callback(user, "start_registration", 1)),
+        ("name", lambda: api.push_text(user, f"Нагрузочный Бегун {index}")),
+        ("time", lambda: api.push_text(user, f"{5 + index % 10}:{index % 60:02d}")),
+        ("gender", lambda: api.push_callback(user, "male" if index % 2 else "female", 1)),
+    ]
+
+    for step, push in actions:
+        api.drain_replies(chat_id)
+        sent_at = time.monotonic()
+        push()
+        deadline = sent_at + args.step_timeout
+        reply_at: Optional[float] = None
+        while reply_at is None:
+            reply = await api.next_reply(chat_id, max(0.0, deadline - time.monotonic()))
+            if reply is None:
+                break
+            if reply[1] in MESSAGE_METHODS or reply[1] == "sendMediaGroup":
+                reply_at = reply[0]
+        if reply_at is None:
+            failures[step] += 1
+            return
+        latencies[step].append((reply_at - sent_at) * 1000)
+        # Пауза «на раздумье» пользователя, чтобы следующий шаг не опережал хвост ответов
+        await asyncio.sleep(args.think_ms / 1000)
+
+
+async def run(args) -> dict:
+    api = FakeBotAPI(args.latency_ms, args.jitter_ms, args.error_rate, seed=args.seed)
+    runner = await api.start("127.0.0.1", args.port)
+
+    tmp_dir = tempfile.mkdtemp(prefix="beermile_load_")
+    db_path = os.path.join(tmp_dir, "race_participants.db")
+    seed_database(db_path, args.max_runners)
+
+    env = dict(
+        os.environ,
+        BOT_TOKEN=FAKE_TOKEN,
+        ADMIN_ID=str(ADMIN_ID),
+        DATABASE_PATH=db_path,
+        TELEGRAM_API_URL=f"http://127.0.0.1:{args.port}",
+        PYTHONUNBUFFERED="1",
+    )
+    log_path = os.path.join(tmp_dir, "bot.log")
+    log_file = open(log_path, "wb")
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "main.py", cwd=str(ROOT), env=env, stdout=log_file, stderr=asyncio.subprocess.STDOUT
+    )
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    failures: Dict[str, int] = defaultdict(int)
+    try:
+        await asyncio.wait_for(api.polling_started.wait(), args.startup_timeout)
+        started = time.monotonic()
+        await asyncio.gather(*(run_user(api, i, latencies, failures, args) for i in range(args.users)))
+        duration = time.monotonic() - started
+        # Даем боту дописать последние транзакции
+        await asyncio.sleep(1.0)
+    finally:
+        process.terminate()
+        try:
+            await asyncio.wait_for(process.wait(), 10)
+        except asyncio.TimeoutError:
+            process.kill()
+        log_file.close()
+        await runner.cleanup()
+
+    log_text = Path(log_path).read_text(encoding="utf-8", errors="replace")
+    runners = count_runners(db_path)
+    report = {
+        "users": args.users,
+        "duration_s": round(duration, 2),
+        "max_runners": args.max_runners,
+        "runners_registered": runners,
+        "oversell": max(0, runners - args.max_runners),
+        "db_locked_errors": log_text.count("database is locked"),
+        "errors_429": sum(api.errors_429.values()),
+        "steps": {
+            step: {
+                "count": len(latencies[step]),
+                "p50_ms": round(percentile(latencies[step], 50), 1),
+                "p99_ms": round(percentile(latencies[step], 99), 1),
+                "mean_ms": round(statistics.mean(latencies[step]), 1) if latencies[step] else 0.0,
+                "no_reply": failures[step],
+            }
+            for step in STEPS
+        },
+        "api_calls": dict(api.calls),
+        "bot_log": log_path,
+    }
+    return report
+
+
+def print_report(report: dict):
+    print(f"\nПользователей: {report['users']}, длительность: {report['duration_s']} с")
+    print(f"{'Шаг':<20}{'ответов':>9}{'p50, мс':>10}{'p99, мс':>10}{'без ответа':>12}")
+    for step, stats in report["steps"].items():
+        print(f"{step:<20}{stats['count']:>9}{stats['p50_ms']:>10}{stats['p99_ms']:>10}{stats['no_reply']:>12}")
+    print(f"\nБегунов зарегистрировано: {report['runners_registered']} (лимит {report['max_runners']})")
+    print(f"Превышение лимита (oversell): {report['oversell']}")
+    print(f"Ошибок 'database is locked': {report['db_locked_errors']}")
+    print(f"Ответов 429: {report['errors_429']}")
+    print(f"Лог бота: {report['bot_log']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест регистрации через фейковый Bot API")
+    parser.add_argument("--users", type=int, default=100, help="Число одновременных пользователей")
+    parser.add_argument("--max-runners", type=int, default=50, help="Лимит бегунов в тестовой базе")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Задержка фейкового Bot API")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 429")
+    parser.add_argument("--think-ms", type=float, default=200.0, help="Пауза пользователя между шагами")
+    parser.add_argument("--step-timeout", type=float, default=30.0, help="Ожидание ответа на шаг, с")
+    parser.add_argument("--startup-timeout", type=float, default=60.0, help="Ожидание запуска бота, с")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", dest="json_path", help="Сохранить отчет в JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Команды работы с архивами прошедших забегов
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import typer
+from rich.console import Console
+
+from cli_admin.config import EXPORT_DIR
+from cli_admin.utils.display import print_success, print_error, print_info
+from cli_admin.utils.archive_export import EXPORT_FORMATS, export_race_archives
+
+app = typer.Typer(help="📦 Архивы прошедших забегов")
+console = Console()
+
+
+@app.command("export")
+def export(
+    fmt: str = typer.Option("parquet", "--format", "-f", help=f"Формат: {', '.join(EXPORT_FORMATS)}"),
+    output: Optional[Path] = typer.Option(None, "--output", "-o", help="Каталог выгрузки"),
+    overwrite: bool = typer.Option(False, "--overwrite", help="Перезаписать уже выгруженные забеги"),
+):
+    """
+    🗂 Выгрузить все архивы в колоночные файлы по забегам (race_date=YYYY-MM-DD/)
+    """
+    if fmt not in EXPORT_FORMATS:
+        print_error(f"Неизвестный формат {fmt}, доступны: {', '.join(EXPORT_FORMATS)}")
+        raise typer.Exit(1)
+    output_dir = output or Path(EXPORT_DIR) / "archive"
+
+    try:
+        stats = export_race_archives(
+            str(output_dir),
+            fmt=fmt,
+            overwrite=overwrite,
+            progress=lambda race_date, rows: console.print(f"  {race_date}: {rows} строк"),
+        )
+    except ImportError:
+        print_error("Для форматов parquet и feather нужен pyarrow: pip install pyarrow")
+        raise typer.Exit(1)
+    except Exception as e:
+        print_error(f"Ошибка при выгрузке архивов: {str(e)}")
+        raise typer.Exit(1)
+
+    if stats["skipped"]:
+        print_info(f"Уже выгружено ранее, пропущено забегов: {stats['skipped']}")
+    print_success(f"Выгружено забегов: {stats['races']}, строк: {stats['rows']} → {output_dir}")
@@ -0,0 +1,23 @@
+"""
+Команды обслуживания базы данных
+"""
+
+import typer
+
+from cli_admin.database import init_db
+from cli_admin.utils.display import print_success, print_error
+
+app = typer.Typer(help="🗄️ Обслуживание базы данных")
+
+
+@app.command("migrate")
+def migrate():
+    """
+    🛠️ Создать недостающие таблицы, индексы и триггеры (то же, что бот делает при старте)
+    """
+    try:
+        init_db()
+        print_success("Схема базы данных обновлена")
+    except Exception as e:
+        print_error(f"Ошибка при обновлении схемы БД: {str(e)}")
+        raise typer.Exit(1)
@@ -0,0 +1,123 @@
+"""
+Команды журнала событий участников
+"""
+
+import json
+from typing import Optional
+
+import typer
+from rich.table import Table
+from rich.console import Console
+
+from cli_admin.database import flush_events, get_user_events
+from cli_admin.utils.display import print_error, print_info
+
+app = typer.Typer(help="📜 Журнал событий участников")
+console = Console()
+
+# Как событие меняет состояние участника при воспроизведении
+STATUS_BY_EVENT = {
+    "registered": "участник",
+    "promoted": "участник",
+    "waitlist_confirmed": "участник",
+    "slot_received": "участник",
+    "waitlisted": "лист ожидания",
+    "demoted": "лист ожидания",
+    "cancelled": "отменил участие",
+    "slot_transferred": "передал слот",
+    "blocked_bot": "заблокировал бота",
+}
+
+
+def _format_payload(payload: dict) -> str:
+    return ", ".join(f"{key}={value}" for key, value in payload.items())
+
+
+def _apply_event(state: dict, event_type: str, payload: dict) -> dict:
+    """Fold one event into the participant state"""
+    if event_type in STATUS_BY_EVENT:
+        state["status"] = STATUS_BY_EVENT[event_type]
+    if payload.get("name"):
+        state["name"] = payload["name"]
+    if payload.get("role"):
+        state["role"] = payload["role"]
+    if event_type == "payment_status" or "payment_status" in payload:
+        state["payment"] = payload.get("status", payload.get("payment_status"))
+    if "bib_number" in payload:
+        state["bib"] = payload["bib_number"]
+    if event_type == "result":
+        state["result"] = payload.get("result")
+    if event_type in ("cancelled", "slot_transferred", "blocked_bot"):
+        state["bib"] = None
+        state["result"] = None
+    return state
+
+
+@app.command("timeline")
+def timeline(
+    user_id: int = typer.Argument(..., help="Telegram ID участника"),
+    event_type: Optional[str] = typer.Option(None, "--type", "-t", help="Только события этого типа"),
+    limit: Optional[int] = typer.Option(None, "--limit", "-n", help="Последние N событий"),
+):
+    """
+    🕒 История событий участника
+    """
+    try:
+        flush_events()
+        events = get_user_events(user_id, event_type=event_type, limit=limit)
+        if not events:
+            print_info(f"Событий для пользователя {user_id} нет")
+            return
+
+        table = Table(title=f"📜 События пользователя {user_id}")
+        table.add_column("ID", style="dim", justify="right")
+        table.add_column("Время", style="cyan")
+        table.add_column("Событие", style="green")
+        table.add_column("Данные")
+        for event_id, ts, kind, payload in events:
+            table.add_row(str(event_id), ts, kind, _format_payload(payload))
+        console.print(table)
+    except Exception as e:
+        print_error(f"Ошибка при чтении журнала: {str(e)}")
+        raise typer.Exit(1)
+
+
+@app.command("replay")
+def replay(
+    user_id: int = typer.Argument(..., help="Telegram ID участника"),
+    as_json: bool = typer.Option(False, "--json", help="Вывести итоговое состояние в JSON"),
+):
+    """
+    ⏪ Восстановить состояние участника по журналу событий
+    """
+    try:
+        flush_events()
+        events = get_user_events(user_id)
+        if not events:
+            print_info(f"Событий для пользователя {user_id} нет")
+            return
+
+        state = {"status": None, "name": None, "role": None, "payment": None, "bib": None, "result": None}
+        table = Table(title=f"⏪ Воспроизведение для пользователя {user_id}")
+        table.add_column("Время", style="cyan")
+        table.add_column("Событие", style="green")
+        table.add_column("Статус")
+        table.add_column("Роль")
+        table.add_column("Оплата")
+        table.add_column("Номер")
+        table.add_column("Результат")
+        for _, ts, kind, payload in events:
+            _apply_event(state, kind, payload)
+            table.add_row(
+                ts,
+                kind,
+                *(str(state[key]) if state[key] is not None else "—" for key in ("status", "role", "payment", "bib", "result")),
+            )
+
+        if as_json:
+            console.print_json(json.dumps(state, ensure_ascii=False))
+        else:
+            console.print(table)
+    except Exception as e:
+        print_error(f"Ошибка при воспроизведении журнала: {str(e)}")
+        raise typer.Exit(1)
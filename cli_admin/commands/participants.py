@@ -5,9 +5,12 @@
 import typer
 from typing import Optional
 from rich.console import Console
+from rich.table import Table
 
 from cli_admin.database import (
     get_all_participants,
+    iter_participants,
+    search_people,
     get_participant_by_user_id,
     get_participants_by_role,
     update_payment_status,
@@ -18,10 +21,14 @@ from cli_admin.database import (
     set_participant_cluster,
     clear_all_categories,
     clear_all_clusters,
+    unit_of_work,
 )
 from cli_admin.utils.display import (
     display_participants_table,
     display_participant_details,
+    stream_rows,
+    print_next_page_hint,
+    LIST_FORMATS,
     print_success,
     print_error,
     print_warning,
@@ -40,34 +47,42 @@ console = Console()
 @app.command("list")
 def list_participants(
     role: Optional[str] = typer.Option(None, "--role", "-r", help="Фильтр по роли (runner/volunteer)"),
-    paid: Optional[bool] = typer.Option(None, "--paid", "-p", help="Фильтр по статусу оплаты"),
-    limit: int = typer.Option(100, "--limit", "-l", help="Лимит вывода"),
+    paid: Optional[bool] = typer.Option(None, "--paid/--unpaid", "-p", help="Фильтр по статусу оплаты"),
+    cluster: Optional[str] = typer.Option(None, "--cluster", help="Фильтр по кластеру"),
+    category: Optional[str] = typer.Option(None, "--category", help="Фильтр по категории"),
+    limit: Optional[int] = typer.Option(None, "--limit", "-l", help="Лимит вывода (для таблицы по умолчанию 100)"),
+    after: Optional[int] = typer.Option(None, "--after", "-a", help="Показать участников с user_id больше указанного"),
     offset: int = typer.Option(0, "--offset", "-o", help="Смещение"),
+    fmt: str = typer.Option("table", "--format", "-f", help=f"Формат вывода: {', '.join(LIST_FORMATS)}"),
 ):
     """
     📋 Просмотреть список всех участников
     """
+    if fmt not in LIST_FORMATS:
+        print_error(f"Неизвестный формат {fmt}, доступны: {', '.join(LIST_FORMATS)}")
+        raise typer.Exit(1)
+    if fmt == "table" and limit is None:
+        limit = 100
+
+    filters = {"role": role, "cluster": cluster, "category": category}
+    if paid is not None:
+        filters["payment"] = "paid" if paid else "unpaid"
+
     try:
-        # Получить участников
-        if role:
-            participants = get_participants_by_role(role)
-        else:
-            participants = get_all_participants()
+        # Фильтрация и пагинация выполняются в SQL
+        rows = iter_participants(after_user_id=after, limit=limit, filters=filters, offset=offset)
+        if fmt != "table":
+            stream_rows(rows, fmt)
+            return
 
+        participants = list(rows)
         if not participants:
             print_warning("Участники не найдены")
             return
 
-        # Фильтрация по оплате
-        if paid is not None:
-            status = 'paid' if paid else 'pending'
-            participants = [p for p in participants if p[6] == status]
-
-        # Пагинация
-        participants = participants[offset:offset+limit]
-
         # Отобразить таблицу
         display_participants_table(participants)
+        print_next_page_hint(participants, limit)
 
     except Exception as e:
         print_error(f"Ошибка при получении списка участников: {str(e)}")
@@ -125,7 +140,8 @@ def mark_paid(
                 return
 
         # Обновить статус
-        success = update_payment_status(user_id, "paid")
+        with unit_of_work():
+            success = update_payment_status(user_id, "paid")
 
         if success:
             print_success(f"Участник {user_id} отмечен как оплативший")
@@ -154,7 +170,8 @@ def set_payment_status(
             raise typer.Exit(1)
 
         # Обновить статус
-        success = update_payment_status(user_id, status)
+        with unit_of_work():
+            success = update_payment_status(user_id, status)
 
         if success:
             print_success(f"Статус оплаты обновлен на '{status}'")
@@ -183,7 +200,8 @@ def set_bib(
             raise typer.Exit(1)
 
         # Присвоить номер
-        success = set_bib_number(user_id, number)
+        with unit_of_work():
+            success = set_bib_number(user_id, number)
 
         if success:
             print_success(f"Номер {number} присвоен участнику {user_id}")
@@ -207,7 +225,8 @@ def edit_participant(
     """
     try:
         # Обновить поле
-        success = update_participant_field(user_id, field, value)
+        with unit_of_work():
+            success = update_participant_field(user_id, field, value)
 
         if success:
             print_success(f"Поле '{field}' обновлено на '{value}'")
@@ -247,7 +266,8 @@ def delete(
                 return
 
         # Удалить
-        success = delete_participant(user_id)
+        with unit_of_work():
+            success = delete_participant(user_id)
 
         if success:
             print_success(f"Участник {user_id} удален")
@@ -269,7 +289,8 @@ def set_category(
     🏷️ Установить категорию участника
     """
     try:
-        success = set_participant_category(user_id, category)
+        with unit_of_work():
+            success = set_participant_category(user_id, category)
 
         if success:
             print_success(f"Категория '{category}' установлена для участника {user_id}")
@@ -291,7 +312,8 @@ def set_cluster(
     📍 Установить кластер участника
     """
     try:
-        success = set_participant_cluster(user_id, cluster)
+        with unit_of_work():
+            success = set_participant_cluster(user_id, cluster)
 
         if success:
             print_success(f"Кластер '{cluster}' установлен для участника {user_id}")
@@ -317,7 +339,8 @@ def clear_categories(
                 print_warning("Отменено")
                 return
 
-        success = clear_all_categories()
+        with unit_of_work():
+            success = clear_all_categories()
 
         if success:
             print_success("Все категории очищены")
@@ -343,7 +366,8 @@ def clear_clusters(
                 print_warning("Отменено")
                 return
 
-        success = clear_all_clusters()
+        with unit_of_work():
+            success = clear_all_clusters()
 
         if success:
             print_success("Все кластеры очищены")
@@ -359,32 +383,50 @@ def clear_clusters(
 @app.command("search")
 def search_participants(
     query: str = typer.Argument(..., help="Поисковый запрос (имя или username)"),
+    limit: int = typer.Option(20, "--limit", "-l", help="Максимум найденных людей"),
+    everywhere: bool = typer.Option(
+        False, "--all", help="Искать также в листе ожидания, пользователях бота и архивах"
+    ),
 ):
     """
     🔍 Поиск участников по имени или username
     """
     try:
-        # Получить всех участников
-        participants = get_all_participants()
+        sources = None if everywhere else ("participants",)
+        people = search_people(query, limit=limit, sources=sources)
 
-        if not participants:
-            print_warning("Участники не найдены")
-            return
-
-        # Фильтрация по запросу
-        query_lower = query.lower()
-        filtered = [
-            p for p in participants
-            if (p[2] and query_lower in p[2].lower()) or  # Имя
-               (p[1] and query_lower in p[1].lower())     # Username
-        ]
-
-        if not filtered:
+        if not people:
             print_warning(f"Участники с запросом '{query}' не найдены")
             return
 
-        # Отобразить результаты
-        display_participants_table(filtered, title=f"Результаты поиска: '{query}'")
+        if not everywhere:
+            participants = [get_participant_by_user_id(p["user_id"]) for p in people]
+            display_participants_table(
+                [p for p in participants if p], title=f"Результаты поиска: '{query}'"
+            )
+        else:
+            source_names = {
+                "participants": "участник",
+                "waitlist": "очередь",
+                "bot_users": "бот",
+                "archives": "архив",
+            }
+            table = Table(title=f"Результаты поиска: '{query}'", show_lines=False)
+            table.add_column("ID", style="cyan")
+            table.add_column("Имя", style="green")
+            table.add_column("Username", style="blue")
+            table.add_column("Где найден")
+            for person in people:
+                table.add_row(
+                    str(person["user_id"]),
+                    person["name"] or "-",
+                    f"@{person['username']}" if person["username"] else "-",
+                    ", ".join(source_names.get(s, s) for s in person["sources"]),
+                )
+            console.print(table)
+
+        if people[0]["fuzzy"]:
+            print_warning("Точных совпадений нет, показаны похожие")
 
     except Exception as e:
         print_error(f"Ошибка при поиске: {str(e)}")
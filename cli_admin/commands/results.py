@@ -0,0 +1,79 @@
+"""
+Команды работы с результатами забега
+"""
+
+import typer
+from pathlib import Path
+from rich.table import Table
+from rich.console import Console
+
+from cli_admin.database import get_all_participants, bulk_set_results, unit_of_work
+from cli_admin.utils.display import print_success, print_error, print_warning
+from handlers.results_import import (
+    KEY_BIB,
+    KEY_USER_ID,
+    decode_csv,
+    parse_results_csv,
+    plan_results_import,
+)
+
+app = typer.Typer(help="🏁 Результаты забега")
+console = Console()
+
+
+def _show_mismatches(plan: dict):
+    """Вывести таблицу строк, которые не будут импортированы"""
+    table = Table(title="Несовпадения", show_header=True, header_style="bold yellow")
+    table.add_column("Строка", style="cyan", justify="right")
+    table.add_column("Ключ", style="white")
+    table.add_column("Проблема", style="red")
+
+    for line, key, value, error in plan["invalid"]:
+        table.add_row(str(line), key, f"«{value}»: {error}")
+    for line, key in plan["unknown"]:
+        table.add_row(str(line), key, "не найден среди бегунов")
+    for line, key in plan["duplicates"]:
+        table.add_row(str(line), key, "повторная строка")
+
+    if table.row_count:
+        console.print(table)
+
+
+@app.command("import")
+def import_results(
+    file: Path = typer.Argument(..., help="CSV-файл системы хронометража", exists=True, dir_okay=False),
+    by: str = typer.Option(KEY_BIB, "--by", "-b", help="Ключ без заголовка: bib или user_id"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Только проверить файл, не записывать"),
+):
+    """
+    📥 Импортировать результаты из CSV (номер/user_id; время)
+    """
+    if by not in (KEY_BIB, KEY_USER_ID):
+        print_error("Ключ должен быть bib или user_id")
+        raise typer.Exit(1)
+
+    content = decode_csv(file.read_bytes())
+    if content is None:
+        print_error("Не удалось прочитать файл. Проверьте кодировку.")
+        raise typer.Exit(1)
+
+    rows, key_type = parse_results_csv(content, by)
+    if not rows:
+        print_warning("В файле нет строк с результатами")
+        return
+
+    plan = plan_results_import(rows, get_all_participants(), key_type)
+    _show_mismatches(plan)
+    if plan["missing"]:
+        print_warning(f"Бегуны без результата ({len(plan['missing'])}): {', '.join(plan['missing'])}")
+
+    if dry_run:
+        print_success(f"Проверка завершена: к записи готово {len(plan['updates'])} из {len(rows)} строк")
+        return
+
+    with unit_of_work():
+        updated = bulk_set_results(plan["updates"])
+    if updated < 0:
+        print_error("Ошибка при записи результатов, изменения отменены")
+        raise typer.Exit(1)
+    print_success(f"Записано результатов: {updated} из {len(rows)} строк")
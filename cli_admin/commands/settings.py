@@ -5,7 +5,7 @@
 import typer
 from rich.console import Console
 
-from cli_admin.database import get_setting, set_setting
+from cli_admin.database import get_setting, set_setting, unit_of_work
 from cli_admin.utils.display import (
     display_settings_table,
     print_success,
@@ -75,7 +75,8 @@ def set_value(
     ✏️ Установить значение настройки
     """
     try:
-        success = set_setting(key, value)
+        with unit_of_work():
+            success = set_setting(key, value)
 
         if success:
             print_success(f"Настройка '{key}' установлена в '{value}'")
@@ -108,7 +109,8 @@ def toggle(key: str = typer.Argument(..., help="Ключ настройки дл
             print_error(f"Настройка '{key}' не является булевой")
             raise typer.Exit(1)
 
-        success = set_setting(key, str(new_value))
+        with unit_of_work():
+            success = set_setting(key, str(new_value))
 
         if success:
             status = "включено" if new_value == 1 else "выключено"
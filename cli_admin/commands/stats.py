@@ -2,19 +2,21 @@
 Команды статистики и аналитики
 """
 
+from pathlib import Path
+from typing import Optional
+
 import typer
 from rich.table import Table
 from rich.console import Console
 
 from cli_admin.database import (
-    get_participant_count,
-    get_participant_count_by_role,
-    get_waitlist_by_role,
     get_all_teams,
     count_complete_teams,
     get_all_participants,
     get_setting,
+    get_event_stats,
 )
+from cli_admin.utils.formatters import format_time
 
 app = typer.Typer(help="📊 Статистика и аналитика")
 console = Console()
@@ -26,20 +28,18 @@ def overview():
     📈 Общая статистика мероприятия
     """
     try:
-        # Получить данные
-        total_participants = get_participant_count()
-        runners = get_participant_count_by_role("runner")
-        volunteers = get_participant_count_by_role("volunteer")
-        waitlist = len(get_waitlist_by_role())
-        teams = len(get_all_teams())
-        complete_teams = count_complete_teams()
-
-        # Получить лимиты
-        max_runners = get_setting("max_runners") or 100
-
-        # Подсчитать оплаченных
-        all_p = get_all_participants()
-        paid_count = sum(1 for p in all_p if p[6] == 'paid')
+        # Все счетчики одним агрегирующим запросом
+        stats = get_event_stats(use_cache=False)
+        if not stats:
+            raise RuntimeError("не удалось получить данные из БД")
+
+        total_participants = stats["participants"]
+        runners = stats["runners"]
+        waitlist = stats["waitlist"]
+        teams = stats["teams"]
+        complete_teams = stats["complete_teams"]
+        max_runners = stats["max_runners"] or 100
+        paid_count = stats["paid"]
 
         # Создать таблицу
         table = Table(title="📊 Общая статистика", show_lines=True)
@@ -159,3 +159,109 @@ def teams_stats():
     except Exception as e:
         console.print(f"[red]Ошибка при получении статистики команд: {str(e)}[/red]")
         raise typer.Exit(1)
+
+
+def _time(value) -> str:
+    """Seconds as MM:SS; NaN from pandas becomes a dash"""
+    return format_time(None if value != value else value)
+
+
+def _season_table(title: str, df, columns) -> Table:
+    """Rich table from a DataFrame; columns are (column, header, formatter)"""
+    table = Table(title=title, show_lines=False)
+    for _, header, _ in columns:
+        if header in ("Забег", "Пол", "Категория", "Имя"):
+            table.add_column(header, style="cyan", no_wrap=True)
+        else:
+            table.add_column(header, justify="right")
+    for row in df.itertuples(index=False):
+        values = row._asdict()
+        table.add_row(*(fmt(values[column]) for column, _, fmt in columns))
+    return table
+
+
+@app.command("season")
+def season_stats(
+    source: Optional[Path] = typer.Option(
+        None, "--from", help="Каталог выгрузки `beermile archive export` вместо чтения архивов из БД"
+    ),
+    season: Optional[int] = typer.Option(None, "--season", "-s", help="Только забеги этого года"),
+    top: int = typer.Option(10, "--top", help="Сколько бегунов показать в прогрессе личных рекордов"),
+    xlsx: Optional[Path] = typer.Option(None, "--xlsx", help="Сохранить все таблицы в XLSX"),
+):
+    """
+    📅 Аналитика сезона по архивам забегов
+    """
+    try:
+        from cli_admin.utils.archive_export import archive_dataframe, load_race_archives
+        from cli_admin.utils.season_stats import season_report
+
+        df = load_race_archives(str(source)) if source else archive_dataframe()
+        if season is not None:
+            df = df[df["season"] == season]
+        if df.empty:
+            console.print("[yellow]Нет архивных забегов[/yellow]")
+            return
+
+        report = season_report(df, top)
+    except ImportError:
+        console.print("[red]Для аналитики сезона нужен pandas: pip install -r requirements_cli.txt[/red]")
+        raise typer.Exit(1)
+    except Exception as e:
+        console.print(f"[red]Ошибка при расчете статистики сезона: {str(e)}[/red]")
+        raise typer.Exit(1)
+
+    date = lambda value: value.strftime("%d.%m.%Y")
+    count = lambda value: str(int(value))
+    percent = lambda value: "-" if value != value else f"{value * 100:.1f}%"
+    text = lambda value: "-" if value is None or value != value else str(value)
+
+    console.print(_season_table("🏁 Забеги", report["races"], [
+        ("race_date", "Забег", date),
+        ("starters", "Стартовали", count),
+        ("finishers", "Финишировали", count),
+        ("dnf_rate", "DNF", percent),
+        ("best", "Лучшее", _time),
+        ("p10", "P10", _time),
+        ("median", "Медиана", _time),
+        ("p90", "P90", _time),
+    ]))
+    console.print(_season_table("👥 Время по полу и категории", report["groups"], [
+        ("gender", "Пол", text),
+        ("category", "Категория", text),
+        ("finishers", "Финишеров", count),
+        ("p25", "P25", _time),
+        ("median", "Медиана", _time),
+        ("p75", "P75", _time),
+        ("p90", "P90", _time),
+    ]))
+    retention = report["retention"].merge(report["personal_bests"][["race_date", "personal_bests"]], on="race_date", how="left")
+    console.print(_season_table("🔁 Удержание бегунов", retention, [
+        ("race_date", "Забег", date),
+        ("starters", "Бегунов", count),
+        ("new", "Новых", count),
+        ("returning", "Вернулись", count),
+        ("retention_rate", "С прошлого забега", percent),
+        ("personal_bests", "Личных рекордов", lambda value: "0" if value != value else count(value)),
+    ]))
+    if not report["improvers"].empty:
+        console.print(_season_table("📈 Прогресс личных рекордов", report["improvers"], [
+            ("name", "Имя", text),
+            ("races", "Забегов", count),
+            ("first", "Первый", _time),
+            ("best", "Лучший", _time),
+            ("latest", "Последний", _time),
+            ("improvement", "Улучшение", _time),
+        ]))
+
+    if xlsx:
+        try:
+            import pandas as pd
+
+            with pd.ExcelWriter(xlsx, engine="xlsxwriter") as writer:
+                for sheet, frame in report.items():
+                    frame.to_excel(writer, sheet_name=sheet, index=False)
+            console.print(f"[green]Отчет сохранен: {xlsx}[/green]")
+        except Exception as e:
+            console.print(f"[red]Ошибка при сохранении XLSX: {str(e)}[/red]")
+            raise typer.Exit(1)
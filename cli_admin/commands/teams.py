@@ -3,17 +3,23 @@
 """
 
 import typer
+from typing import Optional
 
 from cli_admin.database import (
     get_all_teams,
+    iter_teams,
     get_team_by_id,
     delete_team,
     set_team_result,
     count_complete_teams,
     clear_all_teams,
+    unit_of_work,
 )
 from cli_admin.utils.display import (
     display_teams_table,
+    stream_rows,
+    print_next_page_hint,
+    LIST_FORMATS,
     print_success,
     print_error,
     print_info,
@@ -24,22 +30,36 @@ app = typer.Typer(help="🏆 Управление командами")
 
 
 @app.command("list")
-def list_teams():
+def list_teams(
+    limit: Optional[int] = typer.Option(None, "--limit", "-l", help="Лимит вывода"),
+    after: Optional[int] = typer.Option(None, "--after", "-a", help="Показать команды с ID больше указанного"),
+    fmt: str = typer.Option("table", "--format", "-f", help=f"Формат вывода: {', '.join(LIST_FORMATS)}"),
+):
     """
     📋 Просмотреть все команды
     """
+    if fmt not in LIST_FORMATS:
+        print_error(f"Неизвестный формат {fmt}, доступны: {', '.join(LIST_FORMATS)}")
+        raise typer.Exit(1)
+
     try:
-        teams = get_all_teams()
+        rows = iter_teams(after_team_id=after, limit=limit)
+        if fmt != "table":
+            stream_rows(rows, fmt)
+            return
 
+        teams = list(rows)
         if not teams:
             print_info("Команды не найдены")
             return
 
         display_teams_table(teams)
+        print_next_page_hint(teams, limit)
 
         # Статистика
-        complete = count_complete_teams()
-        print_info(f"Полных команд: {complete}/{len(teams)}")
+        if after is None and limit is None:
+            complete = count_complete_teams()
+            print_info(f"Полных команд: {complete}/{len(teams)}")
 
     except Exception as e:
         print_error(f"Ошибка при получении команд: {str(e)}")
@@ -82,7 +102,8 @@ def set_result(
     🏁 Установить результат команды
     """
     try:
-        success = set_team_result(team_id, result)
+        with unit_of_work():
+            success = set_team_result(team_id, result)
 
         if success:
             print_success(f"Результат команды {team_id} установлен: {result}")
@@ -109,7 +130,8 @@ def delete(
                 print_info("Отменено")
                 return
 
-        success = delete_team(team_id)
+        with unit_of_work():
+            success = delete_team(team_id)
 
         if success:
             print_success(f"Команда {team_id} удалена")
@@ -133,7 +155,8 @@ def clear_all(confirm: bool = typer.Option(False, "--confirm", help="Подтв
                 print_info("Отменено")
                 return
 
-        success = clear_all_teams()
+        with unit_of_work():
+            success = clear_all_teams()
 
         if success:
             print_success("Все команды удалены")
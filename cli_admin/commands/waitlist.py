@@ -7,13 +7,19 @@ from typing import Optional
 
 from cli_admin.database import (
     get_waitlist_by_role,
+    iter_waitlist,
+    get_waitlist_count,
     promote_waitlist_user_by_id,
     demote_participant_to_waitlist,
     remove_from_waitlist,
     get_waitlist_position,
+    unit_of_work,
 )
 from cli_admin.utils.display import (
     display_waitlist_table,
+    stream_rows,
+    print_next_page_hint,
+    LIST_FORMATS,
     print_success,
     print_error,
     print_info,
@@ -26,18 +32,32 @@ app = typer.Typer(help="📋 Управление листом ожидания"
 @app.command("list")
 def list_waitlist(
     role: Optional[str] = typer.Option(None, "--role", "-r", help="Фильтр по роли (runner/volunteer)"),
+    limit: Optional[int] = typer.Option(None, "--limit", "-l", help="Лимит вывода"),
+    after: Optional[int] = typer.Option(None, "--after", "-a", help="Продолжить после записи с указанным ID очереди"),
+    fmt: str = typer.Option("table", "--format", "-f", help=f"Формат вывода: {', '.join(LIST_FORMATS)}"),
 ):
     """
     📋 Просмотреть лист ожидания
+
+    Сначала бегуны, затем волонтеры, внутри роли по дате добавления; "#" — место в очереди роли.
     """
+    if fmt not in LIST_FORMATS:
+        print_error(f"Неизвестный формат {fmt}, доступны: {', '.join(LIST_FORMATS)}")
+        raise typer.Exit(1)
+
     try:
-        waitlist = get_waitlist_by_role(role)
+        rows = iter_waitlist(after_id=after, limit=limit, role=role)
+        if fmt != "table":
+            stream_rows(rows, fmt)
+            return
 
+        waitlist = list(rows)
         if not waitlist:
             print_info("Лист ожидания пуст")
             return
 
-        display_waitlist_table(waitlist)
+        display_waitlist_table(waitlist, total=get_waitlist_count(role))
+        print_next_page_hint(waitlist, limit)
 
     except Exception as e:
         print_error(f"Ошибка при получении листа ожидания: {str(e)}")
@@ -50,7 +70,8 @@ def promote(user_id: int = typer.Argument(..., help="Telegram ID пользов
     ⬆️ Перевести пользователя из waitlist в участники
     """
     try:
-        result = promote_waitlist_user_by_id(user_id)
+        with unit_of_work():
+            result = promote_waitlist_user_by_id(user_id)
 
         if result.get("success"):
             print_success(result.get("message", "Пользователь переведен в участники"))
@@ -69,7 +90,8 @@ def demote(user_id: int = typer.Argument(..., help="Telegram ID участник
     ⬇️ Вернуть участника обратно в waitlist
     """
     try:
-        result = demote_participant_to_waitlist(user_id)
+        with unit_of_work():
+            result = demote_participant_to_waitlist(user_id)
 
         if result.get("success"):
             print_success(result.get("message", "Участник возвращен в waitlist"))
@@ -96,7 +118,8 @@ def remove(
                 print_info("Отменено")
                 return
 
-        success = remove_from_waitlist(user_id)
+        with unit_of_work():
+            success = remove_from_waitlist(user_id)
 
         if success:
             print_success(f"Пользователь {user_id} удален из листа ожидания")
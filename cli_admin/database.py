@@ -21,13 +21,47 @@ os.environ['DB_PATH'] = CLI_DB_PATH
 import database as db_module
 db_module.DB_PATH = CLI_DB_PATH
 
+# Чтение — только через read-only соединения (mode=ro). Запись: каждая команда
+# оборачивает свои изменения в unit_of_work() — одна транзакция BEGIN IMMEDIATE
+# на команду, функции database.py работают в ней как точки сохранения
+db_module.use_read_only()
+
+
+def use_database(path: str):
+    """Switch the CLI to another database file (--db)"""
+    global CLI_DB_PATH
+    CLI_DB_PATH = path
+    os.environ['DB_PATH'] = path
+    db_module.DB_PATH = path
+    db_module.use_read_only(path)
+
+
+def use_snapshot() -> str:
+    """
+    Read from a backup-API copy of the database instead of the live file.
+
+    For heavy reports: the copy is made in small steps, then every read goes
+    to the snapshot and the bot's writers never wait on the report.
+    The temp file is removed on exit.
+    """
+    import atexit
+
+    snapshot_path = db_module.snapshot_database()
+    atexit.register(lambda: os.path.exists(snapshot_path) and os.remove(snapshot_path))
+    db_module.use_read_only(snapshot_path)
+    return snapshot_path
+
 # Импортируем все функции из основного database.py
 from database import (
     # Инициализация
     init_db,
+    unit_of_work,
 
     # Участники
     get_all_participants,
+    iter_participants,
+    search_people,
+    rebuild_people_search_index,
     get_participant_by_user_id,
     get_participant_count,
     get_participant_count_by_role,
@@ -38,6 +72,7 @@ from database import (
     update_payment_status,
     set_bib_number,
     set_result,
+    bulk_set_results,
     set_participant_category,
     set_participant_cluster,
     clear_all_categories,
@@ -58,6 +93,8 @@ from database import (
     # Лист ожидания
     add_to_waitlist,
     get_waitlist_by_role,
+    iter_waitlist,
+    get_waitlist_count,
     get_waitlist_position,
     remove_from_waitlist,
     notify_waitlist_users,
@@ -79,6 +116,7 @@ from database import (
     # Команды
     create_team,
     get_all_teams,
+    iter_teams,
     get_team_by_id,
     get_team_by_member,
     set_team_result,
@@ -97,6 +135,8 @@ from database import (
     archive_race_data,
     get_user_race_history,
     get_latest_user_result,
+    get_user_race_summary,
+    rebuild_user_race_summary,
     list_race_archives,
     is_current_event_active,
 
@@ -123,13 +163,29 @@ from database import (
     # Утилиты
     cancel_user_participation,
     cleanup_blocked_user,
+    cleanup_blocked_users,
+    get_blocked_user_ids,
     get_participant_by_team_invite_code,
+
+    # Статистика
+    get_event_stats,
+
+    # Журнал событий
+    record_event,
+    flush_events,
+    get_user_events,
 )
 
 __all__ = [
     # Экспортируем все импортированные функции
+    'use_database',
+    'use_snapshot',
     'init_db',
+    'unit_of_work',
     'get_all_participants',
+    'iter_participants',
+    'search_people',
+    'rebuild_people_search_index',
     'get_participant_by_user_id',
     'get_participant_count',
     'get_participant_count_by_role',
@@ -140,6 +196,7 @@ __all__ = [
     'update_payment_status',
     'set_bib_number',
     'set_result',
+    'bulk_set_results',
     'set_participant_category',
     'set_participant_cluster',
     'clear_all_categories',
@@ -154,6 +211,8 @@ __all__ = [
     'set_setting',
     'add_to_waitlist',
     'get_waitlist_by_role',
+    'iter_waitlist',
+    'get_waitlist_count',
     'get_waitlist_position',
     'remove_from_waitlist',
     'notify_waitlist_users',
@@ -171,6 +230,7 @@ __all__ = [
     'reject_edit_request',
     'create_team',
     'get_all_teams',
+    'iter_teams',
     'get_team_by_id',
     'get_team_by_member',
     'set_team_result',
@@ -187,6 +247,8 @@ __all__ = [
     'archive_race_data',
     'get_user_race_history',
     'get_latest_user_result',
+    'get_user_race_summary',
+    'rebuild_user_race_summary',
     'list_race_archives',
     'is_current_event_active',
     'create_slot_transfer_request',
@@ -205,5 +267,11 @@ __all__ = [
     'clear_bib_numbers_info',
     'cancel_user_participation',
     'cleanup_blocked_user',
+    'cleanup_blocked_users',
+    'get_blocked_user_ids',
     'get_participant_by_team_invite_code',
+    'get_event_stats',
+    'record_event',
+    'flush_events',
+    'get_user_events',
 ]
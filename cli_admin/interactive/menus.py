@@ -342,11 +342,12 @@ def mark_payment():
     user_id = questionary.text("Введите Telegram ID участника:").ask()
 
     if user_id:
-        from cli_admin.database import update_payment_status
+        from cli_admin.database import update_payment_status, unit_of_work
         from cli_admin.utils.display import print_success, print_error
 
         try:
-            success = update_payment_status(int(user_id), "paid")
+            with unit_of_work():
+                success = update_payment_status(int(user_id), "paid")
             if success:
                 print_success(f"Участник {user_id} отмечен как оплативший")
             else:
@@ -367,11 +368,12 @@ def assign_bib_number():
     if not bib_number:
         return
 
-    from cli_admin.database import set_bib_number
+    from cli_admin.database import set_bib_number, unit_of_work
     from cli_admin.utils.display import print_success, print_error
 
     try:
-        success = set_bib_number(int(user_id), bib_number)
+        with unit_of_work():
+            success = set_bib_number(int(user_id), bib_number)
         if success:
             print_success(f"Номер {bib_number} присвоен участнику {user_id}")
         else:
@@ -423,10 +425,11 @@ def edit_setting():
         value = questionary.text(f"Введите новое значение для '{key}':").ask()
 
         if value:
-            from cli_admin.database import set_setting
+            from cli_admin.database import set_setting, unit_of_work
             from cli_admin.utils.display import print_success, print_error
 
-            success = set_setting(key, value)
+            with unit_of_work():
+                success = set_setting(key, value)
             if success:
                 print_success(f"Настройка '{key}' установлена в '{value}'")
             else:
@@ -437,13 +440,14 @@ def edit_setting():
 
 def toggle_team_mode():
     """Переключить командный режим"""
-    from cli_admin.database import get_setting, set_setting
+    from cli_admin.database import get_setting, set_setting, unit_of_work
     from cli_admin.utils.display import print_success
 
     current = get_setting("team_mode_enabled")
     new_value = "0" if current == "1" or current == 1 else "1"
 
-    set_setting("team_mode_enabled", new_value)
+    with unit_of_work():
+        set_setting("team_mode_enabled", new_value)
     status = "включен" if new_value == "1" else "выключен"
     print_success(f"Командный режим {status}")
 
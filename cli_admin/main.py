@@ -11,6 +11,7 @@ Usage:
     ... и другие команды
 """
 
+import os
 import typer
 import sys
 from pathlib import Path
@@ -22,10 +23,10 @@ from rich.console import Console
 from rich.panel import Panel
 
 from cli_admin import __version__
-from cli_admin.database import init_db
+from cli_admin.database import use_database, use_snapshot
 from cli_admin.config import DB_PATH
 from cli_admin.utils.display import show_status, print_error
-from cli_admin.commands import participants, settings, waitlist, teams, stats
+from cli_admin.commands import participants, settings, waitlist, teams, stats, results, events, archive, db
 
 # Создать главное приложение
 app = typer.Typer(
@@ -44,6 +45,10 @@ app.add_typer(settings.app, name="settings")
 app.add_typer(waitlist.app, name="waitlist")
 app.add_typer(teams.app, name="teams")
 app.add_typer(stats.app, name="stats")
+app.add_typer(results.app, name="results")
+app.add_typer(events.app, name="events")
+app.add_typer(archive.app, name="archive")
+app.add_typer(db.app, name="db")
 
 
 @app.command()
@@ -91,6 +96,7 @@ def version():
 
 @app.callback()
 def main(
+    ctx: typer.Context,
     db_path: str = typer.Option(
         DB_PATH,
         "--db",
@@ -103,7 +109,12 @@ def main(
         "--verbose",
         "-v",
         help="Подробный вывод"
-    )
+    ),
+    snapshot: bool = typer.Option(
+        False,
+        "--snapshot",
+        help="Читать из снимка БД (backup API) — для тяжелых отчетов на живой базе"
+    ),
 ):
     """
     🍺 Beer Mile Admin CLI
@@ -122,6 +133,9 @@ def main(
         beermile waitlist list                        # Лист ожидания
         beermile teams list                           # Список команд
         beermile stats overview                       # Общая статистика
+        beermile results import results.csv           # Импорт результатов
+        beermile --snapshot stats season              # Тяжелый отчет по снимку БД
+        beermile db migrate                           # Создать/обновить схему БД
 
     \b
     Для получения помощи по конкретной команде:
@@ -131,18 +145,23 @@ def main(
     # Сохранить путь к БД глобально
     import cli_admin.config as config
     config.DB_PATH = db_path
+    use_database(db_path)
 
-    # Инициализировать БД
-    try:
-        init_db()
-    except Exception as e:
-        if verbose:
-            print_error(f"Ошибка при инициализации БД: {str(e)}")
-            console.print_exception()
-        else:
-            print_error(f"Ошибка при инициализации БД: {str(e)}")
+    # Схему создает и обновляет бот при старте (или `beermile db migrate`):
+    # остальные команды не выполняют DDL и не берут блокировку записи ради чтения
+    if ctx.invoked_subcommand not in ("db", "version") and not os.path.exists(db_path):
+        print_error(f"База данных {db_path} не найдена. Создайте ее: beermile db migrate")
         raise typer.Exit(1)
 
+    if snapshot:
+        try:
+            snapshot_path = use_snapshot()
+            if verbose:
+                console.print(f"[dim]Чтение из снимка {snapshot_path}[/dim]")
+        except Exception as e:
+            print_error(f"Не удалось создать снимок БД: {str(e)}")
+            raise typer.Exit(1)
+
 
 def cli():
     """Entry point для установленного пакета"""
@@ -0,0 +1,143 @@
+"""
+Колоночная выгрузка архивов забегов для аналитики сезона.
+
+Каждая таблица race_* пишется в свой раздел в стиле Hive:
+
+    <output>/race_date=YYYY-MM-DD/part-0.parquet
+
+Дата забега берется из имени каталога (pyarrow.dataset / pandas.read_parquet
+восстанавливают колонку race_date сами), остальные колонки — из
+database.ARCHIVE_EXPORT_COLUMNS, результаты уже переведены в секунды.
+pyarrow и pandas импортируются только при вызове функций.
+"""
+
+import csv
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from database import ARCHIVE_EXPORT_COLUMNS, iter_race_archives
+
+EXPORT_FORMATS = ("parquet", "feather", "csv")
+
+PARTITION_COLUMN = "race_date"
+
+_EXTENSIONS = {"parquet": "parquet", "feather": "arrow", "csv": "csv"}
+
+
+def _arrow_schema():
+    import pyarrow as pa
+
+    types = {
+        "season": pa.int16(),
+        "user_id": pa.int64(),
+        "target_seconds": pa.float64(),
+        "result_seconds": pa.float64(),
+        "dnf": pa.bool_(),
+    }
+    return pa.schema(
+        [(column, types.get(column, pa.string())) for column in ARCHIVE_EXPORT_COLUMNS if column != PARTITION_COLUMN]
+    )
+
+
+def _write_partition(path: Path, rows: list, fmt: str, schema=None):
+    """Write one race to a temporary file and move it into place"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    if fmt == "csv":
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=ARCHIVE_EXPORT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        import pyarrow as pa
+
+        columns = {name: [row[name] for row in rows] for name in schema.names}
+        table = pa.Table.from_pydict(columns, schema=schema)
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            pq.write_table(table, str(tmp_path), compression="zstd")
+        else:
+            import pyarrow.feather as feather
+
+            feather.write_feather(table, str(tmp_path), compression="zstd")
+    os.replace(tmp_path, path)
+
+
+def export_race_archives(output_dir: str, fmt: str = "parquet", overwrite: bool = False, progress=None) -> Dict[str, int]:
+    """
+    Stream all race archives into per-race partition files.
+
+    Archives do not change after a race, so existing partitions are skipped
+    unless overwrite is set. progress(race_date, rows_count) is called per
+    written race. Returns counts: races, rows, skipped.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат {fmt}, доступны: {', '.join(EXPORT_FORMATS)}")
+    schema = _arrow_schema() if fmt != "csv" else None
+
+    root = Path(output_dir)
+    stats = {"races": 0, "rows": 0, "skipped": 0}
+    for race_date, rows in iter_race_archives():
+        partition = root / f"{PARTITION_COLUMN}={race_date}"
+        path = partition / f"part-0.{_EXTENSIONS[fmt]}"
+        if path.exists() and not overwrite:
+            stats["skipped"] += 1
+            continue
+        partition.mkdir(parents=True, exist_ok=True)
+        _write_partition(path, rows, fmt, schema)
+        stats["races"] += 1
+        stats["rows"] += len(rows)
+        if progress:
+            progress(race_date, len(rows))
+    return stats
+
+
+def load_race_archives(input_dir: str, fmt: Optional[str] = None):
+    """
+    Read an export back as one pandas DataFrame with race_date as datetime64.
+
+    The format is detected from the partition files when not given.
+    """
+    import pandas as pd
+
+    root = Path(input_dir)
+    if fmt is None:
+        found = [f for f, ext in _EXTENSIONS.items() if next(root.glob(f"*/part-*.{ext}"), None)]
+        if not found:
+            raise FileNotFoundError(f"В {input_dir} нет выгруженных архивов")
+        fmt = found[0]
+
+    if fmt == "csv":
+        frames = [pd.read_csv(path) for path in sorted(root.glob("*/part-*.csv"))]
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=ARCHIVE_EXPORT_COLUMNS)
+    else:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(
+            str(root),
+            format="parquet" if fmt == "parquet" else "feather",
+            partitioning="hive",
+            schema=_arrow_schema().append(pa.field(PARTITION_COLUMN, pa.string())),
+        )
+        df = dataset.to_table().to_pandas()
+
+    df[PARTITION_COLUMN] = pd.to_datetime(df[PARTITION_COLUMN])
+    return df
+
+
+def archive_dataframe():
+    """All race archives straight from the database as one DataFrame, no files"""
+    import pandas as pd
+
+    frames = [
+        pd.DataFrame.from_records(rows, columns=ARCHIVE_EXPORT_COLUMNS)
+        for _, rows in iter_race_archives()
+        if rows
+    ]
+    if not frames:
+        return pd.DataFrame(columns=ARCHIVE_EXPORT_COLUMNS)
+    df = pd.concat(frames, ignore_index=True)
+    df[PARTITION_COLUMN] = pd.to_datetime(df[PARTITION_COLUMN])
+    return df
@@ -2,22 +2,21 @@
 Утилиты для отображения данных в консоли
 """
 
+import csv
+import json
+import sys
+
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.text import Text
-from rich.progress import Progress, SpinnerColumn, TextColumn
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 from cli_admin.config import *
 from cli_admin.database import (
-    get_participant_count,
-    get_participant_count_by_role,
-    get_waitlist_by_role,
-    get_all_teams,
-    count_complete_teams,
     get_setting,
+    get_event_stats,
 )
 
 console = Console()
@@ -66,22 +65,21 @@ def show_status():
 
     # Получить данные
     try:
-        total_participants = get_participant_count()
-        runners = get_participant_count_by_role("runner")
-        volunteers = get_participant_count_by_role("volunteer")
-        waitlist = len(get_waitlist_by_role())
-        teams = len(get_all_teams())
-        complete_teams = count_complete_teams()
-
-        max_runners = get_setting("max_runners") or 100
+        stats = get_event_stats(use_cache=False)
+        if not stats:
+            raise RuntimeError("не удалось получить данные из БД")
+
+        total_participants = stats["participants"]
+        runners = stats["runners"]
+        waitlist = stats["waitlist"]
+        teams = stats["teams"]
+        complete_teams = stats["complete_teams"]
+        max_runners = stats["max_runners"] or 100
+        paid_count = stats["paid"]
+
         event_date = get_setting("event_date") or "Не установлена"
         team_mode = get_setting("team_mode_enabled")
 
-        # Подсчет оплаченных
-        from cli_admin.database import get_all_participants
-        all_p = get_all_participants()
-        paid_count = sum(1 for p in all_p if p[6] == 'paid')
-
     except Exception as e:
         print_error(f"Ошибка при получении статистики: {str(e)}")
         return
@@ -108,6 +106,43 @@ def show_status():
     console.print()
 
 
+LIST_FORMATS = ("table", "jsonl", "csv")
+
+
+def stream_rows(rows, fmt: str, out=None) -> Optional[Any]:
+    """
+    Write rows one by one as JSON Lines or CSV (header from the first row)
+
+    Args:
+        rows: Итератор sqlite3.Row прямо из курсора
+        fmt: "jsonl" или "csv"
+        out: Поток вывода, по умолчанию stdout
+
+    Returns:
+        Ключ (первая колонка) последней строки для --after, None если строк нет
+    """
+    out = out or sys.stdout
+    writer = None
+    last_key = None
+    for row in rows:
+        if fmt == "jsonl":
+            out.write(json.dumps(dict(zip(row.keys(), row)), ensure_ascii=False) + "\n")
+        else:
+            if writer is None:
+                writer = csv.writer(out)
+                writer.writerow(row.keys())
+            writer.writerow(row)
+        last_key = row[0]
+    out.flush()
+    return last_key
+
+
+def print_next_page_hint(rows: list, limit: Optional[int]):
+    """Подсказать --after для следующей страницы, если страница заполнена"""
+    if limit and len(rows) == limit:
+        print_info(f"Следующая страница: --after {rows[-1][0]}")
+
+
 def display_participants_table(participants: List[tuple], title: str = "Список участников"):
     """
     Отобразить таблицу участников
@@ -183,13 +218,14 @@ def display_participant_details(participant: tuple):
     console.print("\n[cyan]━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━[/cyan]\n")
 
 
-def display_waitlist_table(waitlist: List[tuple], title: str = "Лист ожидания"):
+def display_waitlist_table(waitlist: List[tuple], title: str = "Лист ожидания", total: Optional[int] = None):
     """
     Отобразить таблицу листа ожидания
 
     Args:
-        waitlist: Список кортежей из БД
+        waitlist: Список кортежей из БД; если последняя колонка position, "#" — место в очереди роли
         title: Заголовок таблицы
+        total: Всего в очереди, если показана только одна страница
     """
     if not waitlist:
         print_warning("Лист ожидания пуст")
@@ -205,7 +241,7 @@ def display_waitlist_table(waitlist: List[tuple], title: str = "Лист ожи
     table.add_column("Статус", width=12)
 
     for idx, w in enumerate(waitlist, 1):
-        wl_id, user_id, username, name, target_time, role, gender, join_date, status, *_ = w
+        wl_id, user_id, username, name, target_time, role, gender, join_date, status, *extra = w
 
         role_emoji = EMOJI_RUNNER if role == "runner" else EMOJI_VOLUNTEER
 
@@ -217,7 +253,7 @@ def display_waitlist_table(waitlist: List[tuple], title: str = "Лист ожи
         }.get(status, status)
 
         table.add_row(
-            str(idx),
+            str(extra[0] if extra else idx),
             str(user_id),
             name[:18] + "..." if len(name) > 20 else name,
             role_emoji,
@@ -226,7 +262,7 @@ def display_waitlist_table(waitlist: List[tuple], title: str = "Лист ожи
         )
 
     console.print(table)
-    console.print(f"\n[cyan]Всего в очереди: {len(waitlist)}[/cyan]")
+    console.print(f"\n[cyan]Всего в очереди: {total if total is not None else len(waitlist)}[/cyan]")
 
 
 def display_teams_table(teams: List[tuple], title: str = "Список команд"):
@@ -354,6 +390,9 @@ def show_progress(total: int, description: str = "Processing"):
     Returns:
         Progress объект
     """
+    # rich.progress тянет за собой модули живого вывода, нужен только здесь
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+
     progress = Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
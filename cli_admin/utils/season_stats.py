@@ -0,0 +1,114 @@
+"""
+Аналитика сезона по архивам забегов.
+
+Все функции принимают DataFrame из archive_dataframe() / load_race_archives()
+(одна строка — участник одного забега) и считают показатели групповыми
+операциями pandas, без циклов по забегам и участникам.
+"""
+
+from typing import Dict
+
+
+def runners_only(df):
+    """Rows of runners; very old archives have no role and count as runners"""
+    return df[df["role"].isna() | (df["role"] == "runner")]
+
+
+def per_race_summary(df):
+    """Starters, finishers, DNF and time percentiles for every race"""
+    grouped = df.groupby("race_date")
+    summary = grouped.agg(
+        starters=("user_id", "size"),
+        finishers=("result_seconds", "count"),
+        dnf=("dnf", "sum"),
+        best=("result_seconds", "min"),
+    )
+    quantiles = grouped["result_seconds"].quantile([0.1, 0.5, 0.9]).unstack()
+    summary["p10"] = quantiles[0.1]
+    summary["median"] = quantiles[0.5]
+    summary["p90"] = quantiles[0.9]
+    summary["dnf"] = summary["dnf"].astype(int)
+    summary["dnf_rate"] = summary["dnf"] / summary["starters"]
+    return summary.reset_index()
+
+
+def percentiles_by_group(df, by=("gender", "category")):
+    """Finisher count and time percentiles per gender and category"""
+    finishers = df[df["result_seconds"].notna()]
+    quantiles = (
+        finishers.groupby(list(by), dropna=False)["result_seconds"]
+        .quantile([0.25, 0.5, 0.75, 0.9])
+        .unstack()
+        .rename(columns={0.25: "p25", 0.5: "median", 0.75: "p75", 0.9: "p90"})
+    )
+    quantiles.insert(0, "finishers", finishers.groupby(list(by), dropna=False).size())
+    return quantiles.reset_index().sort_values(["median"])
+
+
+def retention(df):
+    """
+    Runner retention between consecutive races.
+
+    new — first race of the runner, returning — ran before, retained — share
+    of the previous race's runners who started this one.
+    """
+    import pandas as pd
+
+    presence = pd.crosstab(df["user_id"], df["race_date"]).astype(bool)
+    first_race = df.groupby("user_id")["race_date"].min()
+    new_counts = first_race.value_counts().reindex(presence.columns, fill_value=0)
+
+    starters = presence.sum()
+    retained = (presence & presence.shift(1, axis=1, fill_value=False)).sum()
+    previous = starters.shift(1)
+
+    result = starters.to_frame("starters")
+    result["new"] = new_counts.values
+    result["returning"] = result["starters"] - result["new"]
+    result["retained"] = retained
+    result["retention_rate"] = retained / previous
+    return result.reset_index()
+
+
+def personal_bests(df, top: int = 10) -> Dict[str, object]:
+    """
+    Personal-best progression.
+
+    per_race — how many finishers improved their previous best at each race;
+    improvers — top runners by seconds gained from the first finish to the best one.
+    """
+    finishers = df[df["result_seconds"].notna()].sort_values(["user_id", "race_date"])
+    previous_best = finishers.groupby("user_id")["result_seconds"].cummin().groupby(finishers["user_id"]).shift(1)
+    finishers = finishers.assign(pb=finishers["result_seconds"] < previous_best)
+
+    per_race = finishers.groupby("race_date").agg(
+        finishers=("user_id", "size"),
+        personal_bests=("pb", "sum"),
+    )
+    per_race["personal_bests"] = per_race["personal_bests"].astype(int)
+
+    by_runner = finishers.groupby("user_id").agg(
+        name=("name", "last"),
+        races=("result_seconds", "size"),
+        first=("result_seconds", "first"),
+        best=("result_seconds", "min"),
+        latest=("result_seconds", "last"),
+    )
+    by_runner = by_runner[by_runner["races"] > 1]
+    by_runner["improvement"] = by_runner["first"] - by_runner["best"]
+    improvers = by_runner[by_runner["improvement"] > 0].nlargest(top, "improvement")
+
+    return {"per_race": per_race.reset_index(), "improvers": improvers.reset_index()}
+
+
+def season_report(df, top: int = 10) -> Dict[str, object]:
+    """All season tables keyed by sheet name"""
+    runners = runners_only(df)
+    bests = personal_bests(runners, top)
+    return {
+        "races": per_race_summary(runners),
+        "groups": percentiles_by_group(runners),
+        "retention": retention(runners),
+        "personal_bests": bests["per_race"],
+        "improvers": bests["improvers"],
+    }
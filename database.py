@@ -1,28 +1,31 @@
+import atexit
+import contextlib
+import functools
+import itertools
 import json
 import sqlite3
 import os
+import threading
+import time
 from datetime import datetime
+from pytz import timezone
+from handlers.validation import time_to_seconds
 from logging_config import get_logger
 
 logger = get_logger(__name__)
-DB_PATH = "/app/data/race_participants.db"
+DB_PATH = os.environ.get("DATABASE_PATH", "/app/data/race_participants.db")
 
-try:
-    with open("config.json", "r", encoding="utf-8") as f:
-        config = json.load(f)
-    logger.info("Файл config.json успешно загружен")
-except FileNotFoundError:
-    logger.error("Файл config.json не найден")
-    raise
-except json.JSONDecodeError as e:
-    logger.error(f"Ошибка при разборе config.json: {e}")
-    raise
+# URI для чтения (file:...?mode=ro), None — читать из DB_PATH обычным соединением.
+# Админский CLI читает через read-only соединение или снимок, бот — как раньше.
+DB_READ_URI = None
 
 
 def init_db():
     try:
         with sqlite3.connect(DB_PATH, timeout=10) as conn:
             cursor = conn.cursor()
+            # WAL: чтения (CLI, отчеты, потоковые выгрузки) не блокируют запись бота
+            cursor.execute("PRAGMA journal_mode=WAL")
             cursor.execute(
                 """
                 CREATE TABLE IF NOT EXISTS participants (
@@ -227,6 +230,332 @@ def init_db():
 
     # Run migration for bib_number to TEXT
     migrate_bib_numbers_to_text()
+    ensure_bib_number_index()
+    ensure_table_version_triggers()
+    ensure_user_race_summary()
+    ensure_events_table()
+    ensure_blocked_users_table()
+    ensure_people_search_index()
+
+
+# Ключ уникальности номера: цифровые номера сравниваются как числа ("7" и "007" —
+# один номер), остальные — как текст
+BIB_NUMBER_KEY_SQL = (
+    "CASE WHEN bib_number NOT GLOB '*[^0-9]*' THEN CAST(bib_number AS INTEGER) ELSE bib_number END"
+)
+
+
+def ensure_bib_number_index():
+    """Create a unique index on bib numbers so duplicates are rejected by SQLite"""
+    try:
+        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+            conn.execute(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS idx_participants_bib_value "
+                f"ON participants({BIB_NUMBER_KEY_SQL}) WHERE bib_number IS NOT NULL AND bib_number != ''"
+            )
+            # Прежний индекс по тексту номера покрывается новым
+            conn.execute("DROP INDEX IF EXISTS idx_participants_bib_number")
+            conn.commit()
+    except sqlite3.IntegrityError:
+        # Существующие дубликаты не должны мешать запуску бота
+        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+            duplicates = conn.execute(
+                f"SELECT GROUP_CONCAT(bib_number, ' = ') FROM participants "
+                f"WHERE bib_number IS NOT NULL AND bib_number != '' "
+                f"GROUP BY {BIB_NUMBER_KEY_SQL} HAVING COUNT(*) > 1"
+            ).fetchall()
+        logger.warning(
+            f"Уникальный индекс беговых номеров не создан, найдены дубликаты: "
+            f"{', '.join(row[0] for row in duplicates)}"
+        )
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при создании индекса беговых номеров: {e}")
+
+
+# Таблицы, изменения которых отслеживаются счетчиками версий для кешей
+VERSIONED_TABLES = ("participants", "waitlist", "settings", "pending_registrations", "teams")
+
+
+def ensure_table_version_triggers():
+    """Keep a version counter per table, bumped by triggers on every insert/update/delete"""
+    try:
+        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS table_versions (
+                    table_name TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            cursor.executemany(
+                "INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)",
+                [(table,) for table in VERSIONED_TABLES],
+            )
+            # Триггеры создаются после миграций, пересоздающих таблицу participants
+            for table in VERSIONED_TABLES:
+                for operation in ("INSERT", "UPDATE", "DELETE"):
+                    cursor.execute(
+                        f"""
+                        CREATE TRIGGER IF NOT EXISTS {table}_version_{operation.lower()}
+                        AFTER {operation} ON {table}
+                        BEGIN
+                            UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+                        END
+                        """
+                    )
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при создании триггеров версий таблиц: {e}")
+        raise
+
+
+def get_table_versions() -> dict:
+    """Current version of each tracked table: {table_name: version}, {} on error"""
+    try:
+        with _read_connection() as conn:
+            return dict(conn.execute("SELECT table_name, version FROM table_versions").fetchall())
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при получении версий таблиц: {e}")
+        return {}
+
+
+# Поколение кешей процесса: счетчики версий восстановленной базы начинаются заново,
+# поэтому после восстановления кеши сбрасываются сменой поколения
+_cache_generation = 0
+
+
+def get_cache_generation() -> int:
+    """Generation of in-process caches, bumped by invalidate_caches()"""
+    return _cache_generation
+
+
+def invalidate_caches():
+    """Drop every memoized view and in-memory lookup set, e.g. after the database is replaced"""
+    global _cache_generation, _blocked_user_ids, _historical_runner_ids
+    _cache_generation += 1
+    _blocked_user_ids = None
+    _historical_runner_ids = None
+
+
+def memoize_by_table_versions(*tables: str):
+    """
+    Cache a function result until one of the given tables changes.
+
+    Results are keyed by call arguments; None is not cached so errors are retried.
+    invalidate_caches() drops all results regardless of table versions.
+    """
+
+    def decorator(func):
+        cache = {}
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            versions = get_table_versions()
+            stamp = (_cache_generation,) + tuple(versions.get(table) for table in tables)
+            cached = cache.get(args)
+            if cached is not None and None not in stamp and cached[0] == stamp:
+                return cached[1]
+            value = func(*args)
+            if value is not None and None not in stamp:
+                cache[args] = (stamp, value)
+            return value
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
+
+
+# ============================================================================
+# UNIT OF WORK
+# ============================================================================
+
+
+# Транзакция unit_of_work(), открытая в этом потоке: вложенные операции и функции
+# записи через _connection() работают в ней, а не открывают второе соединение
+_active_uow = threading.local()
+_savepoint_ids = itertools.count(1)
+
+
+class UnitOfWork:
+    """Connection and cursor shared by all steps of one compound operation"""
+
+    def __init__(self, conn: sqlite3.Connection, savepoint: str = None):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.savepoint = savepoint
+        self.rolled_back = False
+
+    def rollback(self):
+        """Discard everything written so far; unit_of_work() then has nothing to commit"""
+        if self.savepoint:
+            self.conn.execute(f"ROLLBACK TO {self.savepoint}")
+            self.rolled_back = True
+        elif self.conn.in_transaction:
+            self.conn.execute("ROLLBACK")
+
+
+@contextlib.contextmanager
+def _savepoint(conn: sqlite3.Connection):
+    """Nested step of the active unit of work: released on success, undone alone on error"""
+    name = f"uow_{next(_savepoint_ids)}"
+    conn.execute(f"SAVEPOINT {name}")
+    uow = UnitOfWork(conn, savepoint=name)
+    try:
+        with _deferred_events() as events:
+            yield uow
+    except BaseException:
+        conn.execute(f"ROLLBACK TO {name}")
+        conn.execute(f"RELEASE {name}")
+        raise
+    conn.execute(f"RELEASE {name}")
+    if not uow.rolled_back:
+        _emit_events(events)
+
+
+@contextlib.contextmanager
+def unit_of_work():
+    """
+    One connection and one write transaction for a compound operation.
+
+        with unit_of_work() as uow:
+            count = get_participant_count_by_role("runner", conn=uow.conn)
+            uow.cursor.execute("DELETE FROM waitlist WHERE user_id = ?", (user_id,))
+
+    BEGIN IMMEDIATE takes the write lock up front, so helpers called with
+    conn=uow.conn never wait on a second connection of the same operation.
+    Everything is committed on exit and rolled back on any exception; audit
+    events recorded inside are queued only after the COMMIT.
+
+    While it is open, write functions using _connection() and nested
+    unit_of_work() calls in the same thread join it as savepoints, so a whole
+    CLI command can run as one transaction.
+    """
+    active = getattr(_active_uow, "conn", None)
+    if active is not None:
+        with _savepoint(active) as uow:
+            yield uow
+        return
+
+    conn = sqlite3.connect(DB_PATH, timeout=10, isolation_level=None)
+    try:
+        with _deferred_events() as events:
+            conn.execute("BEGIN IMMEDIATE")
+            _active_uow.conn = conn
+            try:
+                yield UnitOfWork(conn)
+            finally:
+                _active_uow.conn = None
+            committed = conn.in_transaction
+            if committed:
+                conn.execute("COMMIT")
+        # События откатенной операции (uow.rollback()) не записываются
+        if committed:
+            _emit_events(events)
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+@contextlib.contextmanager
+def _connection(conn: sqlite3.Connection = None):
+    """Reuse the caller's unit-of-work connection or open a short-lived one committed on exit"""
+    if conn is not None:
+        yield conn
+        return
+    active = getattr(_active_uow, "conn", None)
+    if active is not None:
+        with _savepoint(active) as uow:
+            yield uow.conn
+        return
+    own = sqlite3.connect(DB_PATH, timeout=10)
+    try:
+        with _deferred_events() as events:
+            with own:
+                yield own
+        _emit_events(events)
+    finally:
+        own.close()
+
+
+@contextlib.contextmanager
+def _reading(conn: sqlite3.Connection = None):
+    """Reuse the caller's unit-of-work connection or read through _read_connection()"""
+    conn = conn or getattr(_active_uow, "conn", None)
+    if conn is not None:
+        yield conn
+        return
+    own = _read_connection()
+    try:
+        yield own
+    finally:
+        own.close()
+
+
+def read_only_uri(path: str) -> str:
+    """SQLite URI that opens the file strictly read-only"""
+    from urllib.request import pathname2url
+
+    return f"file:{pathname2url(os.path.abspath(path))}?mode=ro"
+
+
+def _read_connection() -> sqlite3.Connection:
+    """Connection for read-only functions: DB_READ_URI when set, the live DB_PATH otherwise"""
+    if DB_READ_URI:
+        return sqlite3.connect(DB_READ_URI, timeout=10, uri=True)
+    return sqlite3.connect(DB_PATH, timeout=10)
+
+
+def use_read_only(path: str = None):
+    """Route read functions to a mode=ro connection; write functions keep using DB_PATH"""
+    global DB_READ_URI
+    DB_READ_URI = read_only_uri(path or DB_PATH)
+
+
+def snapshot_database(target_path: str = None, pages: int = 1024) -> str:
+    """
+    Copy the live database into target_path (a temp file by default) with the backup API.
+
+    The source is opened read-only and copied `pages` pages per step, so the
+    bot's writers only wait for one short step at a time. Returns the snapshot path.
+    """
+    if target_path is None:
+        import tempfile
+
+        fd, target_path = tempfile.mkstemp(prefix="beermile_snapshot_", suffix=".db")
+        os.close(fd)
+    source = sqlite3.connect(read_only_uri(DB_PATH), timeout=10, uri=True)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target, pages=pages)
+    finally:
+        target.close()
+        source.close()
+    logger.info(f"Снимок базы данных создан: {target_path}")
+    return target_path
+
+
+def restore_database(source_path: str):
+    """
+    Replace the live database contents with source_path through the backup API.
+
+    Unlike copying the file over DB_PATH, this is safe while the bot holds
+    connections and never leaves a stale -wal file next to the restored data.
+    """
+    source = sqlite3.connect(read_only_uri(source_path), timeout=10, uri=True)
+    target = sqlite3.connect(DB_PATH, timeout=10)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    invalidate_caches()
+    logger.info(f"База данных восстановлена из {source_path}")
 
 
 def migrate_bib_numbers_to_text():
@@ -325,7 +654,7 @@ def add_pending_registration(
 
 def get_pending_registrations():
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "SELECT user_id, username, name, target_time, role FROM pending_registrations"
@@ -356,9 +685,22 @@ def delete_pending_registration(user_id: int) -> bool:
         return False
 
 
+# Позиции полей в строках get_all_participants() (SELECT * FROM participants):
+# (user_id, username, name, target_time, role, reg_date, payment_status, bib_number,
+#  result, gender, category, cluster, team_name, team_invite_code)
+PARTICIPANT_USER_ID = 0
+PARTICIPANT_NAME = 2
+PARTICIPANT_TARGET_TIME = 3
+PARTICIPANT_ROLE = 4
+PARTICIPANT_BIB = 7
+PARTICIPANT_RESULT = 8
+PARTICIPANT_CATEGORY = 10
+PARTICIPANT_CLUSTER = 11
+
+
 def get_all_participants():
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "SELECT * FROM participants ORDER BY role = 'runner' DESC, reg_date ASC"
@@ -372,7 +714,7 @@ def get_all_participants():
 
 def get_participant_count():
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM participants")
             count = cursor.fetchone()[0]
@@ -382,9 +724,9 @@ def get_participant_count():
         return 0
 
 
-def get_participant_count_by_role(role: str):
+def get_participant_count_by_role(role: str, conn: sqlite3.Connection = None):
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _reading(conn) as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM participants WHERE role = ?", (role,))
             count = cursor.fetchone()[0]
@@ -396,29 +738,34 @@ def get_participant_count_by_role(role: str):
 
 def update_payment_status(user_id: int, status: str):
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "UPDATE participants SET payment_status = ? WHERE user_id = ?",
                 (status, user_id),
             )
-            conn.commit()
             logger.info(f"Статус оплаты обновлён для user_id={user_id}: {status}")
+            record_event(EVENT_PAYMENT, user_id, status=status)
+            return True
     except sqlite3.Error as e:
         logger.error(f"Ошибка при обновлении статуса оплаты для user_id={user_id}: {e}")
+        return False
 
 
 def set_bib_number(user_id: int, bib_number: str):
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "UPDATE participants SET bib_number = ? WHERE user_id = ?",
                 (bib_number, user_id),
             )
-            conn.commit()
             logger.info(f"Беговой номер {bib_number} установлен для user_id={user_id}")
+            record_event(EVENT_BIB, user_id, bib_number=bib_number)
             return True
+    except sqlite3.IntegrityError:
+        logger.error(f"Беговой номер {bib_number} уже занят другим участником (user_id={user_id})")
+        return False
     except sqlite3.Error as e:
         logger.error(f"Ошибка при установке бегового номера для user_id={user_id}: {e}")
         return False
@@ -434,15 +781,43 @@ def set_result(user_id: int, result: str):
             )
             success = cursor.rowcount > 0
             conn.commit()
+            if success:
+                record_event(EVENT_RESULT, user_id, result=result)
             return success
     except sqlite3.Error as e:
         logger.error(f"Ошибка при записи результата для user_id={user_id}: {e}")
         return False
 
 
+def bulk_set_results(results: list) -> int:
+    """Write many results in one transaction
+    results: [(result, user_id)]
+    Returns: number of updated participants, -1 on error"""
+    if not results:
+        return 0
+    try:
+        with _connection() as conn:
+            cursor = conn.cursor()
+            updated = 0
+            for result, user_id in results:
+                cursor.execute(
+                    "UPDATE participants SET result = ? WHERE user_id = ?",
+                    (result, user_id),
+                )
+                # Событие пишется только для найденных участников
+                if cursor.rowcount:
+                    updated += 1
+                    record_event(EVENT_RESULT, user_id, result=result, source="import")
+            logger.info(f"Импортировано результатов: {updated}")
+            return updated
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при массовой записи результатов: {e}")
+        return -1
+
+
 def delete_participant(user_id: int) -> bool:
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+        with _connection() as conn:
             cursor = conn.cursor()
             # Проверяем наличие пользователя
             cursor.execute(
@@ -455,7 +830,6 @@ def delete_participant(user_id: int) -> bool:
                 return False
             # Выполняем удаление
             cursor.execute("DELETE FROM participants WHERE user_id = ?", (user_id,))
-            conn.commit()
             if cursor.rowcount > 0:
                 logger.info(
                     f"Пользователь user_id={user_id} успешно удалён из participants"
@@ -473,7 +847,7 @@ def delete_participant(user_id: int) -> bool:
 
 def get_participant_by_user_id(user_id: int):
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM participants WHERE user_id = ?", (user_id,))
             participant = cursor.fetchone()
@@ -484,10 +858,11 @@ def get_participant_by_user_id(user_id: int):
 
 
 def add_participant(
-    user_id: int, username: str, name: str, target_time: str, role: str, gender: str
+    user_id: int, username: str, name: str, target_time: str, role: str, gender: str,
+    conn: sqlite3.Connection = None,
 ):
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _connection(conn) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -504,8 +879,8 @@ def add_participant(
                     gender,
                 ),
             )
-            conn.commit()
             logger.info(f"Участник добавлен: {name}, {role}, user_id={user_id}")
+            record_event(EVENT_REGISTERED, user_id, name=name, role=role)
             return True
     except sqlite3.Error as e:
         logger.error(f"Ошибка при добавлении участника user_id={user_id}: {e}")
@@ -540,44 +915,44 @@ def add_participant_with_team(
             )
             conn.commit()
             logger.info(f"Участник команды добавлен: {name}, команда: {team_name}, user_id={user_id}")
+            record_event(EVENT_REGISTERED, user_id, name=name, role=role, team_name=team_name)
             return True
     except sqlite3.Error as e:
         logger.error(f"Ошибка при добавлении участника команды user_id={user_id}: {e}")
         return False
 
 
-def get_setting(key: str):
+def get_setting(key: str, conn: sqlite3.Connection = None):
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT value FROM settings WHERE key = ?", (key,))
-        result = cursor.fetchone()
+        with _reading(conn) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT value FROM settings WHERE key = ?", (key,))
+            result = cursor.fetchone()
         if result:
-            if key == "reg_end_date":
+            if key == "reg_end_date" or not isinstance(result[0], str):
                 return result[0]
             return int(result[0]) if result[0].isdigit() else result[0]
         return None
     except sqlite3.Error as e:
         logger.error(f"Ошибка получения настройки {key}: {e}")
         return None
-    finally:
-        conn.close()
 
 
-def set_setting(key: str, value):
+def set_setting(key: str, value, conn: sqlite3.Connection = None):
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+        with _connection(conn) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
                 (key, str(value)),
             )
-            conn.commit()
             logger.info(f"Настройка {key} установлена в {value}")
-            return True
     except sqlite3.Error as e:
         logger.error(f"Ошибка при установке настройки {key}: {e}")
         return False
+    if key == "reg_end_date":
+        _on_reg_end_date_changed(value)
+    return True
 
 
 def save_race_to_db(race_date: str) -> bool:
@@ -642,7 +1017,7 @@ def clear_participants() -> bool:
 
 
 def get_past_races():
-    conn = sqlite3.connect(DB_PATH)
+    conn = _read_connection()
     cursor = conn.cursor()
     cursor.execute(
         "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'race_%'"
@@ -684,7 +1059,7 @@ def get_race_data(race_date: str):
         table_name_dd_mm_yyyy = f"race_{date_obj.strftime('%d_%m_%Y')}"
         table_name_yyyy_mm_dd = f"race_{date_obj.strftime('%Y_%m_%d')}"
 
-        conn = sqlite3.connect(DB_PATH)
+        conn = _read_connection()
         cursor = conn.cursor()
 
         # Check which table exists
@@ -723,14 +1098,13 @@ def get_race_data(race_date: str):
 def update_participant_field(user_id: int, field: str, value: str) -> bool:
     """Update a single field for a participant"""
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+        with _connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 f"UPDATE participants SET {field} = ? WHERE user_id = ?",
                 (value, user_id),
             )
             success = cursor.rowcount > 0
-            conn.commit()
             if success:
                 logger.info(f"Обновлено поле {field} для user_id={user_id}: {value}")
             return success
@@ -767,7 +1141,7 @@ def create_edit_request(
 def get_pending_edit_requests():
     """Get all pending edit requests"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -847,11 +1221,11 @@ def reject_edit_request(request_id: int) -> bool:
 
 def add_to_waitlist(
     user_id: int, username: str, name: str, target_time: str, role: str, gender: str,
-    team_name: str = None, team_invite_code: str = None
+    team_name: str = None, team_invite_code: str = None, conn: sqlite3.Connection = None
 ) -> bool:
     """Add user to waitlist when regular slots are full"""
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+        with _connection(conn) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -860,10 +1234,10 @@ def add_to_waitlist(
                 """,
                 (user_id, username, name, target_time, role, gender, team_name, team_invite_code),
             )
-            conn.commit()
             logger.info(
                 f"Пользователь {name} (ID: {user_id}) добавлен в очередь ожидания для роли {role}"
             )
+            record_event(EVENT_WAITLISTED, user_id, name=name, role=role)
             return True
     except sqlite3.Error as e:
         logger.error(f"Ошибка при добавлении user_id={user_id} в очередь ожидания: {e}")
@@ -873,7 +1247,7 @@ def add_to_waitlist(
 def get_waitlist_by_role(role: str = None):
     """Get waitlist participants, optionally filtered by role"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             if role:
                 cursor.execute(
@@ -898,10 +1272,26 @@ def get_waitlist_by_role(role: str = None):
         return []
 
 
+def get_waitlist_count(role: str = None) -> int:
+    """Count waiting users, optionally for one role; 0 on error"""
+    try:
+        with _read_connection() as conn:
+            if role:
+                row = conn.execute(
+                    "SELECT COUNT(*) FROM waitlist WHERE role = ? AND status = 'waiting'", (role,)
+                ).fetchone()
+            else:
+                row = conn.execute("SELECT COUNT(*) FROM waitlist WHERE status = 'waiting'").fetchone()
+            return row[0]
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при подсчете очереди ожидания: {e}")
+        return 0
+
+
 def get_waitlist_position(user_id: int) -> tuple:
     """Get user's position in waitlist and total waiting for their role"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
 
             # First get user's role
@@ -947,11 +1337,10 @@ def get_waitlist_position(user_id: int) -> tuple:
 def remove_from_waitlist(user_id: int) -> bool:
     """Remove user from waitlist"""
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+        with _connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM waitlist WHERE user_id = ?", (user_id,))
             success = cursor.rowcount > 0
-            conn.commit()
             if success:
                 logger.info(
                     f"Пользователь user_id={user_id} удалён из очереди ожидания"
@@ -1016,8 +1405,8 @@ def notify_waitlist_users(role: str, available_slots: int) -> list:
 def confirm_waitlist_participation(user_id: int) -> bool:
     """Confirm participation from waitlist and move to participants"""
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
-            cursor = conn.cursor()
+        with unit_of_work() as uow:
+            cursor = uow.cursor
 
             # Get user data from waitlist
             cursor.execute(
@@ -1039,7 +1428,7 @@ def confirm_waitlist_participation(user_id: int) -> bool:
 
             # Add to participants
             success = add_participant(
-                user_id, username, name, target_time, role, gender
+                user_id, username, name, target_time, role, gender, conn=uow.conn
             )
 
             if success:
@@ -1051,13 +1440,13 @@ def confirm_waitlist_participation(user_id: int) -> bool:
                 # Remove from waitlist (user becomes participant)
                 cursor.execute("DELETE FROM waitlist WHERE user_id = ?", (user_id,))
 
-                conn.commit()
                 logger.info(
                     f"Пользователь {name} (ID: {user_id}) подтвердил участие из очереди ожидания"
                 )
                 logger.info(
                     f"Пользователь {user_id} удален из pending_registrations и waitlist"
                 )
+                record_event(EVENT_CONFIRMED, user_id, role=role)
                 return True
 
     except sqlite3.Error as e:
@@ -1114,10 +1503,10 @@ def decline_waitlist_participation(user_id: int) -> bool:
         return False
 
 
-def get_expired_waitlist_notifications() -> list:
+def get_expired_waitlist_notifications(conn: sqlite3.Connection = None) -> list:
     """Get waitlist notifications that have expired"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _reading(conn) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -1136,14 +1525,12 @@ def expire_waitlist_notifications() -> list:
     """Mark expired notifications as waiting again"""
     expired_users = []
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
-            cursor = conn.cursor()
-
+        with unit_of_work() as uow:
             # Get expired users first
-            expired_users = get_expired_waitlist_notifications()
+            expired_users = get_expired_waitlist_notifications(conn=uow.conn)
 
             # Mark them as waiting again
-            cursor.execute(
+            uow.cursor.execute(
                 """
                 UPDATE waitlist 
                 SET status = 'waiting', notified_date = NULL, expire_date = NULL
@@ -1151,7 +1538,6 @@ def expire_waitlist_notifications() -> list:
                 """
             )
 
-            conn.commit()
             logger.info(f"Истекло {len(expired_users)} уведомлений очереди ожидания")
 
     except sqlite3.Error as e:
@@ -1163,7 +1549,7 @@ def expire_waitlist_notifications() -> list:
 def is_user_in_waitlist(user_id: int) -> bool:
     """Check if user is currently in waitlist"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "SELECT COUNT(*) FROM waitlist WHERE user_id = ?", (user_id,)
@@ -1178,7 +1564,7 @@ def is_user_in_waitlist(user_id: int) -> bool:
 def get_waitlist_by_user_id(user_id: int) -> tuple:
     """Get waitlist entry for specific user"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM waitlist WHERE user_id = ?", (user_id,))
             return cursor.fetchone()
@@ -1279,6 +1665,36 @@ def archive_race_data(race_date: str) -> bool:
                 (current_time,),
             )
 
+            # Update per-user participation summary for the archived participants
+            race_iso_date = date_obj.strftime("%Y-%m-%d")
+            cursor.execute(
+                """
+                SELECT user_id, races_count, runner_races, latest_race_date, latest_table,
+                       latest_name, latest_result, best_result, best_seconds
+                FROM user_race_summary
+                WHERE user_id IN (SELECT user_id FROM participants)
+                """
+            )
+            summaries = {
+                row[0]: dict(
+                    zip(
+                        ("races_count", "runner_races", "latest_race_date", "latest_table",
+                         "latest_name", "latest_result", "best_result", "best_seconds"),
+                        row[1:],
+                    )
+                )
+                for row in cursor.fetchall()
+            }
+            cursor.execute("SELECT user_id, name, role, result FROM participants")
+            archived_runner_ids = set()
+            for user_id, name, role, result in cursor.fetchall():
+                summaries[user_id] = _merge_race_summary(
+                    summaries.get(user_id), table_name, race_iso_date, name, role, result
+                )
+                if role == "runner":
+                    archived_runner_ids.add(user_id)
+            _write_race_summaries(cursor, summaries)
+
             # Get total users collected
             cursor.execute("SELECT COUNT(*) FROM bot_users")
             total_users = cursor.fetchone()[0]
@@ -1315,11 +1731,19 @@ def archive_race_data(race_date: str) -> bool:
                     "DELETE FROM sqlite_sequence WHERE name = 'edit_requests'"
                 )
 
+            cursor.execute(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES ('event_state', ?)",
+                (EVENT_STATE_ARCHIVED,),
+            )
+
             conn.commit()
             logger.info(
                 f"Архивированы данные гонки в таблицу {table_name} (участники: {participants_count}). Всего пользователей в bot_users: {total_users}"
             )
-            return True
+        if _historical_runner_ids is not None:
+            _historical_runner_ids.update(archived_runner_ids)
+        _cache_event_state(EVENT_STATE_ARCHIVED, _event_state_cache["deadline"])
+        return True
 
     except sqlite3.Error as e:
         logger.error(f"Ошибка при архивировании данных гонки: {e}")
@@ -1329,7 +1753,7 @@ def archive_race_data(race_date: str) -> bool:
 def get_user_race_history(user_id: int) -> list:
     """Get user's participation history from all race archive tables"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
 
             # Get list of all race archive tables
@@ -1427,17 +1851,42 @@ def get_user_race_history(user_id: int) -> list:
 
 
 def get_latest_user_result(user_id: int) -> dict:
-    """Get user's latest race result from archive tables"""
-    history = get_user_race_history(user_id)
-    if history:
-        return history[0]  # Latest race (sorted DESC)
-    return None
+    """Get user's latest race result: summary lookup plus one row of the latest archive table"""
+    summary = get_user_race_summary(user_id)
+    if not summary:
+        return None
+    latest = {
+        "table_name": summary["table_name"],
+        "race_date": summary["race_date"],
+        "name": summary["name"],
+        "target_time": None,
+        "result": summary["result"],
+        "bib_number": None,
+        "payment_status": None,
+        "archive_date": None,
+        "reg_date": None,
+    }
+    try:
+        with _read_connection() as conn:
+            row = conn.execute(
+                f"""
+                SELECT target_time, bib_number, payment_status, archive_date, reg_date
+                FROM {summary["table_name"]} WHERE user_id = ?
+                """,
+                (user_id,),
+            ).fetchone()
+        if row:
+            latest.update(zip(("target_time", "bib_number", "payment_status", "archive_date", "reg_date"), row))
+    except sqlite3.Error as e:
+        # Старые архивы без части столбцов: достаточно данных сводки
+        logger.warning(f"Не удалось прочитать данные из таблицы {summary['table_name']}: {e}")
+    return latest
 
 
 def list_race_archives() -> list:
     """List all race archive tables"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -1455,167 +1904,629 @@ def list_race_archives() -> list:
         return []
 
 
-def is_current_event_active() -> bool:
-    """Check if current event is active based on registration end date"""
+# ============================================================================
+# ARCHIVE EXPORT
+# ============================================================================
+
+# Колонки нормализованной выгрузки архивов; race_date — ISO, секунды — REAL
+ARCHIVE_EXPORT_COLUMNS = (
+    "race_date",
+    "season",
+    "user_id",
+    "username",
+    "name",
+    "role",
+    "gender",
+    "category",
+    "cluster",
+    "bib_number",
+    "payment_status",
+    "target_time",
+    "target_seconds",
+    "result",
+    "result_seconds",
+    "dnf",
+)
+
+_ARCHIVE_SOURCE_COLUMNS = (
+    "user_id", "username", "name", "role", "gender", "category", "cluster",
+    "bib_number", "payment_status", "target_time", "result",
+)
+
+
+def iter_race_archives():
+    """
+    Yield (race_date, rows) per race_* archive table, oldest race first.
+
+    race_date is ISO (YYYY-MM-DD); rows are dicts keyed by ARCHIVE_EXPORT_COLUMNS
+    with results normalized to seconds. Only one race is held in memory at a time;
+    columns missing from old archive tables come back as None.
+    """
     try:
-        reg_end_date = get_setting("reg_end_date")
-        if not reg_end_date:
-            return False
+        with _read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'race_%'"
+            )
+            tables = []
+            for (table_name,) in cursor.fetchall():
+                race_date = _race_table_date(table_name)
+                if race_date is None:
+                    logger.warning(f"Таблица {table_name} пропущена: не удалось определить дату")
+                    continue
+                tables.append((race_date, table_name))
+
+            for race_date, table_name in sorted(tables):
+                cursor.execute(f"PRAGMA table_info({table_name})")
+                existing = {row[1] for row in cursor.fetchall()}
+                select = ", ".join(c if c in existing else "NULL" for c in _ARCHIVE_SOURCE_COLUMNS)
+                cursor.execute(f"SELECT {select} FROM {table_name}")
+                rows = []
+                for values in cursor.fetchall():
+                    row = dict(zip(_ARCHIVE_SOURCE_COLUMNS, values))
+                    result = row["result"]
+                    row["race_date"] = race_date
+                    row["season"] = int(race_date[:4])
+                    row["bib_number"] = None if row["bib_number"] is None else str(row["bib_number"])
+                    row["target_seconds"] = time_to_seconds(row["target_time"])
+                    row["result_seconds"] = time_to_seconds(result)
+                    row["dnf"] = bool(result) and str(result).strip().upper() == "DNF"
+                    rows.append(row)
+                yield race_date, rows
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при чтении архивов забегов: {e}")
 
-        from datetime import datetime
-        from pytz import timezone
 
-        end_date = datetime.strptime(reg_end_date, "%H:%M %d.%m.%Y")
-        moscow_tz = timezone("Europe/Moscow")
-        end_date = moscow_tz.localize(end_date)
-        current_time = datetime.now(moscow_tz)
+# ============================================================================
+# USER RACE SUMMARY
+# ============================================================================
+
+# user_id участников, бегавших хотя бы в одном архивном забеге; None — не загружено
+_historical_runner_ids = None
+
+
+def _race_table_date(table_name: str):
+    """ISO date (YYYY-MM-DD) of a race_DD_MM_YYYY archive table, None for other names"""
+    try:
+        return datetime.strptime(table_name[len("race_"):], "%d_%m_%Y").strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def _merge_race_summary(summary, table_name: str, race_date: str, name, role, result) -> dict:
+    """Fold one archived race row into a user's summary dict"""
+    if summary is None:
+        summary = {
+            "races_count": 0,
+            "runner_races": 0,
+            "latest_race_date": None,
+            "latest_table": None,
+            "latest_name": None,
+            "latest_result": None,
+            "best_result": None,
+            "best_seconds": None,
+        }
+    summary["races_count"] += 1
+    if role == "runner":
+        summary["runner_races"] += 1
+    if summary["latest_race_date"] is None or race_date >= summary["latest_race_date"]:
+        summary["latest_race_date"] = race_date
+        summary["latest_table"] = table_name
+        summary["latest_name"] = name
+        summary["latest_result"] = result
+    seconds = time_to_seconds(result)
+    if seconds is not None and (summary["best_seconds"] is None or seconds < summary["best_seconds"]):
+        summary["best_result"] = result
+        summary["best_seconds"] = seconds
+    return summary
+
+
+def _write_race_summaries(cursor, summaries: dict):
+    cursor.executemany(
+        """
+        INSERT OR REPLACE INTO user_race_summary
+        (user_id, races_count, runner_races, latest_race_date, latest_table, latest_name, latest_result,
+         best_result, best_seconds)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                user_id,
+                s["races_count"],
+                s["runner_races"],
+                s["latest_race_date"],
+                s["latest_table"],
+                s["latest_name"],
+                s["latest_result"],
+                s["best_result"],
+                s["best_seconds"],
+            )
+            for user_id, s in summaries.items()
+        ],
+    )
 
-        return current_time <= end_date
 
-    except (ValueError, Exception) as e:
-        logger.error(f"Ошибка при проверке активности события: {e}")
+def _read_race_rows(cursor, table_name: str) -> list:
+    """(user_id, name, role, result) of an archive table; role is NULL in very old tables"""
+    try:
+        cursor.execute(f"SELECT user_id, name, role, result FROM {table_name}")
+    except sqlite3.OperationalError:
+        cursor.execute(f"SELECT user_id, name, NULL, result FROM {table_name}")
+    return cursor.fetchall()
+
+
+def rebuild_user_race_summary() -> int:
+    """Recompute user_race_summary from all race_* archive tables; returns users count or -1"""
+    global _historical_runner_ids
+    try:
+        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'race_%'"
+            )
+            tables = []
+            for (table_name,) in cursor.fetchall():
+                race_date = _race_table_date(table_name)
+                if race_date:
+                    tables.append((race_date, table_name))
+
+            summaries = {}
+            for race_date, table_name in sorted(tables):
+                try:
+                    rows = _read_race_rows(cursor, table_name)
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"Не удалось прочитать данные из таблицы {table_name}: {e}")
+                    continue
+                for user_id, name, role, result in rows:
+                    summaries[user_id] = _merge_race_summary(
+                        summaries.get(user_id), table_name, race_date, name, role, result
+                    )
+
+            cursor.execute("DELETE FROM user_race_summary")
+            _write_race_summaries(cursor, summaries)
+            conn.commit()
+        _historical_runner_ids = None
+        logger.info(
+            f"Сводка участия пересчитана: {len(summaries)} пользователей, архивов: {len(tables)}"
+        )
+        return len(summaries)
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при пересчете сводки участия: {e}")
+        return -1
+
+
+def ensure_user_race_summary():
+    """Create user_race_summary and fill it from existing archives on first run"""
+    global _historical_runner_ids
+    try:
+        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS user_race_summary (
+                    user_id INTEGER PRIMARY KEY,
+                    races_count INTEGER NOT NULL DEFAULT 0,
+                    runner_races INTEGER NOT NULL DEFAULT 0,
+                    latest_race_date TEXT,
+                    latest_table TEXT,
+                    latest_name TEXT,
+                    latest_result TEXT,
+                    best_result TEXT,
+                    best_seconds REAL
+                )
+                """
+            )
+            conn.commit()
+            has_summary = cursor.execute("SELECT 1 FROM user_race_summary LIMIT 1").fetchone()
+            has_archives = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name LIKE 'race_%' LIMIT 1"
+            ).fetchone()
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при создании сводки участия: {e}")
+        raise
+    _historical_runner_ids = None
+    if has_archives and not has_summary:
+        rebuild_user_race_summary()
+
+
+def _load_historical_runner_ids() -> set:
+    global _historical_runner_ids
+    if _historical_runner_ids is None:
+        try:
+            with _read_connection() as conn:
+                rows = conn.execute(
+                    "SELECT user_id FROM user_race_summary WHERE runner_races > 0"
+                ).fetchall()
+            _historical_runner_ids = {row[0] for row in rows}
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка при загрузке исторических участников: {e}")
+            return set()
+    return _historical_runner_ids
+
+
+def is_historical_participant(user_id: int) -> bool:
+    """True if the user ran in any archived race; a cache miss is checked in user_race_summary"""
+    historical = _load_historical_runner_ids()
+    if user_id in historical:
+        return True
+    try:
+        with _read_connection() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM user_race_summary WHERE user_id = ? AND runner_races > 0",
+                (user_id,),
+            ).fetchone()
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при проверке исторического участника {user_id}: {e}")
         return False
+    if row:
+        historical.add(user_id)
+    return row is not None
 
 
-def get_event_state() -> str:
+def get_user_race_summary(user_id: int) -> dict:
     """
-    Determine current event state for UI logic
+    User's archived participation in one indexed lookup.
 
-    Returns:
-        - "no_event": No active event and participants table is empty
-        - "active_event": Active event (reg_end_date set and not passed)
-        - "finished_not_archived": Event finished or has participants but no archive table exists
-        - "has_participants_no_archive": Has participants but no active event and no archive
+    Returns dict with races_count, runner_races, race_date (DD-MM-YYYY), table_name,
+    name, result (of the latest race) and best_result, or None if the user never raced.
     """
     try:
-        # Check if there are any participants
-        participants_count = get_participant_count()
-        has_participants = participants_count > 0
+        with _read_connection() as conn:
+            row = conn.execute(
+                """
+                SELECT races_count, runner_races, latest_table, latest_name, latest_result, best_result
+                FROM user_race_summary WHERE user_id = ?
+                """,
+                (user_id,),
+            ).fetchone()
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при получении сводки участия пользователя {user_id}: {e}")
+        return None
+    if not row:
+        return None
+    races_count, runner_races, table_name, name, result, best_result = row
+    return {
+        "races_count": races_count,
+        "runner_races": runner_races,
+        "table_name": table_name,
+        "race_date": table_name.replace("race_", "").replace("_", "-") if table_name else None,
+        "name": name,
+        "result": result,
+        "best_result": best_result,
+    }
 
-        # Check if event is currently active
-        is_active = is_current_event_active()
 
-        # Get reg_end_date to check for archive table
-        reg_end_date = get_setting("reg_end_date")
+# ============================================================================
+# EVENT STATE MACHINE
+# ============================================================================
 
-        # Check if archive table exists for current event date
-        has_archive = False
-        if reg_end_date:
-            try:
-                from datetime import datetime
-                # Parse the date from reg_end_date format "%H:%M %d.%m.%Y"
-                date_obj = datetime.strptime(reg_end_date, "%H:%M %d.%m.%Y")
-                table_name = f"race_{date_obj.strftime('%d_%m_%Y')}"
+EVENT_STATE_NO_EVENT = "no_event"
+EVENT_STATE_ACTIVE = "active_event"
+EVENT_STATE_FINISHED = "finished_not_archived"
+EVENT_STATE_ARCHIVED = "archived"
 
-                with sqlite3.connect(DB_PATH, timeout=10) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
-                        (table_name,)
-                    )
-                    has_archive = cursor.fetchone() is not None
-            except (ValueError, Exception) as e:
-                logger.warning(f"Ошибка при проверке архивной таблицы: {e}")
-                has_archive = False
-
-        # Determine state based on conditions
-        if not has_participants and not reg_end_date:
-            return "no_event"
-        elif is_active:
-            return "active_event"
-        elif has_participants and not has_archive:
-            return "finished_not_archived"
-        elif has_participants and not is_active and not has_archive:
-            return "has_participants_no_archive"
-        elif not has_participants and reg_end_date:
-            # Event registered but no participants yet
-            return "active_event" if is_active else "finished_not_archived"
-        else:
-            return "no_event"
+# Разрешенные переходы: active -> active означает перенос дедлайна
+EVENT_STATE_TRANSITIONS = {
+    EVENT_STATE_NO_EVENT: {EVENT_STATE_ACTIVE, EVENT_STATE_FINISHED},
+    EVENT_STATE_ACTIVE: {EVENT_STATE_ACTIVE, EVENT_STATE_FINISHED, EVENT_STATE_ARCHIVED},
+    EVENT_STATE_FINISHED: {EVENT_STATE_ACTIVE, EVENT_STATE_FINISHED, EVENT_STATE_ARCHIVED},
+    EVENT_STATE_ARCHIVED: {EVENT_STATE_ACTIVE, EVENT_STATE_FINISHED, EVENT_STATE_NO_EVENT},
+}
 
-    except Exception as e:
-        logger.error(f"Ошибка при определении состояния события: {e}")
-        return "no_event"
+# Persisted copy is re-read after this many seconds to pick up changes
+# made by other processes (admin CLI)
+EVENT_STATE_CACHE_TTL = 60
 
+_event_state_cache = {"state": None, "deadline": None, "expires": 0.0}
 
-# ============================================================================
-# BLOCKED USERS CLEANUP FUNCTIONS
-# ============================================================================
 
+def is_current_event_active() -> bool:
+    """Check if current event is active (registration open)"""
+    return get_event_state() == EVENT_STATE_ACTIVE
 
-def cleanup_blocked_user(user_id: int) -> bool:
+
+def _derive_event_state() -> str:
     """
-    Remove blocked user from all database tables
-    This function should be called when TelegramForbiddenError occurs
-    Note: Does not decrease limit - blocked users are not considered active participants
+    Derive event state from participants, reg_end_date and archive tables.
+
+    Used once to seed the persisted state machine on databases created
+    before the event_state setting existed.
     """
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
-            cursor = conn.cursor()
+        has_participants = get_participant_count() > 0
+        reg_end_date = get_setting("reg_end_date")
+        deadline = _parse_reg_end_date(reg_end_date)
 
-            # Get user info before deletion for logging
-            cursor.execute(
-                "SELECT name, username FROM participants WHERE user_id = ?", (user_id,)
-            )
-            participant_data = cursor.fetchone()
+        if deadline is None:
+            return EVENT_STATE_FINISHED if has_participants else EVENT_STATE_NO_EVENT
 
-            # Remove from all main tables
-            cursor.execute("DELETE FROM participants WHERE user_id = ?", (user_id,))
-            participants_deleted = cursor.rowcount > 0
+        if datetime.now(timezone("Europe/Moscow")) <= deadline:
+            return EVENT_STATE_ACTIVE
 
+        table_name = f"race_{deadline.strftime('%d_%m_%Y')}"
+        with _read_connection() as conn:
+            cursor = conn.cursor()
             cursor.execute(
-                "DELETE FROM pending_registrations WHERE user_id = ?", (user_id,)
+                "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
+                (table_name,),
             )
-            pending_deleted = cursor.rowcount > 0
+            has_archive = cursor.fetchone() is not None
+        if has_archive and not has_participants:
+            return EVENT_STATE_ARCHIVED
+        return EVENT_STATE_FINISHED
+
+    except Exception as e:
+        logger.error(f"Ошибка при определении состояния события: {e}")
+        return EVENT_STATE_NO_EVENT
+
+
+def _parse_reg_end_date(value):
+    """Parse reg_end_date ("%H:%M %d.%m.%Y", Moscow time) into an aware datetime"""
+    if not value:
+        return None
+    try:
+        return timezone("Europe/Moscow").localize(
+            datetime.strptime(str(value), "%H:%M %d.%m.%Y")
+        )
+    except ValueError as e:
+        logger.error(f"Некорректная дата окончания регистрации {value}: {e}")
+        return None
+
+
+def _cache_event_state(state: str, deadline):
+    _event_state_cache["state"] = state
+    _event_state_cache["deadline"] = deadline
+    _event_state_cache["expires"] = time.monotonic() + EVENT_STATE_CACHE_TTL
 
-            cursor.execute("DELETE FROM waitlist WHERE user_id = ?", (user_id,))
-            waitlist_deleted = cursor.rowcount > 0
 
-            # Check if edit_requests table exists and clean it
+def _load_event_state():
+    """Load persisted state and deadline with a single query, seeding it if missing
+
+    Read-only processes (the CLI) derive a missing state in memory and never write it."""
+    try:
+        with _read_connection() as conn:
+            cursor = conn.cursor()
             cursor.execute(
-                """
-                SELECT name FROM sqlite_master
-                WHERE type='table' AND name='edit_requests'
-            """
+                "SELECT key, value FROM settings WHERE key IN ('event_state', 'reg_end_date')"
             )
-            if cursor.fetchone():
-                cursor.execute(
-                    "DELETE FROM edit_requests WHERE user_id = ?", (user_id,)
-                )
-                edit_requests_deleted = cursor.rowcount > 0
+            values = dict(cursor.fetchall())
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при загрузке состояния события: {e}")
+        return
+
+    state = values.get("event_state")
+    if state not in EVENT_STATE_TRANSITIONS:
+        state = _derive_event_state()
+        if not DB_READ_URI:
+            set_setting("event_state", state)
+            logger.info(f"Состояние события инициализировано: {state}")
+    _cache_event_state(state, _parse_reg_end_date(values.get("reg_end_date")))
+
+
+def get_event_state() -> str:
+    """
+    Get current event state from the cached state machine
+
+    Returns:
+        - "no_event": No event has been created yet
+        - "active_event": Registration is open (reg_end_date not passed)
+        - "finished_not_archived": Registration closed, participants not archived
+        - "archived": Event archived, a new one can be created
+    """
+    if _event_state_cache["state"] is None or time.monotonic() >= _event_state_cache["expires"]:
+        _load_event_state()
+        if _event_state_cache["state"] is None:
+            return EVENT_STATE_NO_EVENT
+
+    state = _event_state_cache["state"]
+    deadline = _event_state_cache["deadline"]
+    if state == EVENT_STATE_ACTIVE and deadline is not None:
+        if datetime.now(timezone("Europe/Moscow")) > deadline:
+            # Переход сохраняет бот; чтение из CLI только видит его
+            if DB_READ_URI:
+                _cache_event_state(EVENT_STATE_FINISHED, deadline)
             else:
-                edit_requests_deleted = False
+                transition_event_state(EVENT_STATE_FINISHED, "registration deadline passed")
+            state = EVENT_STATE_FINISHED
+    return state
 
-            conn.commit()
 
-            # Log cleanup results
-            tables_cleaned = []
-            if participants_deleted:
-                tables_cleaned.append("participants")
-            if pending_deleted:
-                tables_cleaned.append("pending_registrations")
-            if waitlist_deleted:
-                tables_cleaned.append("waitlist")
-            if edit_requests_deleted:
-                tables_cleaned.append("edit_requests")
-
-            if tables_cleaned:
-                name = participant_data[0] if participant_data else "неизвестно"
-                username = participant_data[1] if participant_data else "неизвестно"
-                logger.info(
-                    f"Заблокированный пользователь {name} (@{username}, ID: {user_id}) "
-                    f"удалён из таблиц: {', '.join(tables_cleaned)}"
+def get_event_deadline():
+    """Get cached registration deadline as an aware datetime (Moscow) or None"""
+    get_event_state()
+    return _event_state_cache["deadline"]
+
+
+def transition_event_state(new_state: str, reason: str = "") -> bool:
+    """Persist an explicit event state transition and update the cache"""
+    current = _event_state_cache["state"]
+    if current is not None and new_state not in EVENT_STATE_TRANSITIONS.get(current, ()):
+        logger.error(f"Недопустимый переход состояния события: {current} -> {new_state}")
+        return False
+    if not set_setting("event_state", new_state):
+        return False
+    _cache_event_state(new_state, _event_state_cache["deadline"])
+    if current != new_state:
+        logger.info(f"Состояние события: {current} -> {new_state} ({reason})")
+    return True
+
+
+def _on_reg_end_date_changed(value):
+    """Move the state machine when the registration deadline is set or cleared"""
+    deadline = _parse_reg_end_date(value)
+    _event_state_cache["deadline"] = deadline
+    if deadline is None:
+        # Пустая дата — регистрация закрыта; архивирование переводит в archived само
+        if _event_state_cache["state"] == EVENT_STATE_ACTIVE:
+            transition_event_state(EVENT_STATE_FINISHED, "reg_end_date cleared")
+        return
+
+    if datetime.now(timezone("Europe/Moscow")) <= deadline:
+        transition_event_state(EVENT_STATE_ACTIVE, f"reg_end_date set to {value}")
+    else:
+        transition_event_state(EVENT_STATE_FINISHED, f"reg_end_date {value} already passed")
+
+
+# ============================================================================
+# BLOCKED USERS CLEANUP FUNCTIONS
+# ============================================================================
+
+
+# user_id пользователей, заблокировавших бота; None — не загружено
+_blocked_user_ids = None
+
+# Таблицы, из которых удаляются заблокировавшие бота пользователи
+BLOCKED_CLEANUP_TABLES = ("participants", "pending_registrations", "waitlist", "edit_requests")
+
+# Размер пачки для DELETE ... WHERE user_id IN (...): ниже лимита параметров SQLite
+BLOCKED_CLEANUP_CHUNK = 500
+
+
+def ensure_blocked_users_table():
+    """Create the table of users who blocked the bot and drop the in-memory set"""
+    global _blocked_user_ids
+    try:
+        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS blocked_users (
+                    user_id INTEGER PRIMARY KEY,
+                    blocked_at TEXT NOT NULL,
+                    source TEXT
                 )
-                return True
-            else:
-                logger.info(f"Пользователь {user_id} не найден ни в одной таблице")
-                return False
+                """
+            )
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при создании таблицы blocked_users: {e}")
+        raise
+    # После восстановления из копии множество перечитывается из новой базы
+    _blocked_user_ids = None
+
+
+def _load_blocked_user_ids() -> set:
+    global _blocked_user_ids
+    if _blocked_user_ids is None:
+        try:
+            with _read_connection() as conn:
+                rows = conn.execute("SELECT user_id FROM blocked_users").fetchall()
+            _blocked_user_ids = {row[0] for row in rows}
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка при загрузке заблокировавших бота пользователей: {e}")
+            return set()
+    return _blocked_user_ids
+
+
+def get_blocked_user_ids() -> set:
+    """Users who blocked the bot; broadcasts skip them without a send attempt"""
+    return set(_load_blocked_user_ids())
 
+
+def is_blocked_user(user_id: int) -> bool:
+    """In-memory set lookup, no query"""
+    return user_id in _load_blocked_user_ids()
+
+
+def clear_blocked_user(user_id: int) -> bool:
+    """Forget the block once the user writes to the bot again"""
+    if not is_blocked_user(user_id):
+        return False
+    try:
+        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+            conn.execute("DELETE FROM blocked_users WHERE user_id = ?", (user_id,))
+            conn.commit()
+        _blocked_user_ids.discard(user_id)
+        logger.info(f"Пользователь {user_id} снова пишет боту, отметка о блокировке снята")
+        return True
     except sqlite3.Error as e:
-        logger.error(f"Ошибка при очистке заблокированного пользователя {user_id}: {e}")
+        logger.error(f"Ошибка при снятии отметки о блокировке для {user_id}: {e}")
         return False
 
 
+def cleanup_blocked_users(user_ids, source: str = None) -> int:
+    """
+    Remove users who blocked the bot from all tables in one transaction.
+
+    Deletes are set-based (DELETE ... WHERE user_id IN (...), in chunks) and
+    every user is recorded in blocked_users, so later audiences skip them.
+    Does not decrease the limit - blocked users are not active participants.
+    Returns the number of deleted rows, or -1 on error.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return 0
+    blocked_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    deleted = {table: 0 for table in BLOCKED_CLEANUP_TABLES}
+    try:
+        with unit_of_work() as uow:
+            uow.cursor.executemany(
+                "INSERT OR REPLACE INTO blocked_users (user_id, blocked_at, source) VALUES (?, ?, ?)",
+                [(user_id, blocked_at, source) for user_id in user_ids],
+            )
+            for start in range(0, len(user_ids), BLOCKED_CLEANUP_CHUNK):
+                chunk = user_ids[start:start + BLOCKED_CLEANUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                for table in BLOCKED_CLEANUP_TABLES:
+                    uow.cursor.execute(
+                        f"DELETE FROM {table} WHERE user_id IN ({placeholders})", chunk
+                    )
+                    deleted[table] += uow.cursor.rowcount
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при очистке заблокированных пользователей ({len(user_ids)}): {e}")
+        return -1
+
+    if _blocked_user_ids is not None:
+        _blocked_user_ids.update(user_ids)
+    for user_id in user_ids:
+        record_event(EVENT_BLOCKED, user_id, source=source)
+
+    cleaned = ", ".join(f"{table}: {count}" for table, count in deleted.items() if count)
+    logger.info(
+        f"Заблокировавшие бота пользователи ({len(user_ids)}) отмечены"
+        + (f", удалено строк — {cleaned}" if cleaned else ", записей в таблицах не было")
+    )
+    return sum(deleted.values())
+
+
+def cleanup_blocked_user(user_id: int) -> bool:
+    """
+    Remove blocked user from all database tables
+    This function should be called when TelegramForbiddenError occurs outside
+    of a broadcast loop; loops collect users into a BlockedUsersBatch instead
+    """
+    return cleanup_blocked_users([user_id]) > 0
+
+
+class BlockedUsersBatch:
+    """
+    Collects users who blocked the bot during a broadcast.
+
+    add() only remembers the id; the purge runs as one cleanup_blocked_users()
+    call every flush_size users and on flush() after the loop.
+    """
+
+    def __init__(self, source: str = None, flush_size: int = 200):
+        self.source = source
+        self.flush_size = flush_size
+        self.user_ids = []
+        self.total = 0
+
+    def add(self, user_id: int):
+        self.user_ids.append(user_id)
+        self.total += 1
+        if len(self.user_ids) >= self.flush_size:
+            self.flush()
+
+    def flush(self) -> int:
+        if not self.user_ids:
+            return 0
+        user_ids, self.user_ids = self.user_ids, []
+        return cleanup_blocked_users(user_ids, source=self.source)
+
+    def __len__(self):
+        return self.total
+
+
 # ============================================================================
 # BOT USERS MANAGEMENT FUNCTIONS
 # ============================================================================
@@ -1668,71 +2579,35 @@ def add_or_update_bot_user(
 
     except sqlite3.Error as e:
         logger.error(
-            f"Ошибка при добавлении/обновлении пользователя бота {user_id}: {e}"
-        )
-        return False
-
-
-def get_all_bot_users() -> list:
-    """Get all users who interacted with bot"""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT user_id, username, first_name, last_name, first_interaction, last_interaction
-                FROM bot_users
-                ORDER BY last_interaction DESC
-            """
-            )
-            return cursor.fetchall()
-
-    except sqlite3.Error as e:
-        logger.error(f"Ошибка при получении списка пользователей бота: {e}")
-        return []
-
-
-def get_historical_participants() -> list:
-    """Get all users who participated in any archived race as runners (historical participants)"""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-
-            # Get list of all race archive tables
-            cursor.execute(
-                """
-                SELECT name FROM sqlite_master 
-                WHERE type='table' AND name LIKE 'race_%'
-                ORDER BY name DESC
-            """
-            )
-
-            race_tables = cursor.fetchall()
-            historical_users = set()
-
-            for (table_name,) in race_tables:
-                try:
-                    cursor.execute(
-                        f"""
-                        SELECT user_id FROM {table_name} WHERE role = 'runner'
-                    """
-                    )
-
-                    results = cursor.fetchall()
-                    for (user_id,) in results:
-                        historical_users.add(user_id)
+            f"Ошибка при добавлении/обновлении пользователя бота {user_id}: {e}"
+        )
+        return False
 
-                except sqlite3.OperationalError as e:
-                    logger.error(f"Ошибка при чтении таблицы {table_name}: {e}")
-                    continue
 
-            return list(historical_users)
+def get_all_bot_users() -> list:
+    """Get all users who interacted with bot"""
+    try:
+        with _read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT user_id, username, first_name, last_name, first_interaction, last_interaction
+                FROM bot_users
+                ORDER BY last_interaction DESC
+            """
+            )
+            return cursor.fetchall()
 
     except sqlite3.Error as e:
-        logger.error(f"Ошибка при получении исторических участников: {e}")
+        logger.error(f"Ошибка при получении списка пользователей бота: {e}")
         return []
 
 
+def get_historical_participants() -> list:
+    """Get all users who participated in any archived race as runners (historical participants)"""
+    return list(_load_historical_runner_ids())
+
+
 # ============================================================================
 # CATEGORIES AND CLUSTERS MANAGEMENT FUNCTIONS
 # ============================================================================
@@ -1741,14 +2616,13 @@ def get_historical_participants() -> list:
 def set_participant_category(user_id: int, category: str) -> bool:
     """Set category for participant"""
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+        with _connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "UPDATE participants SET category = ? WHERE user_id = ?",
                 (category, user_id),
             )
             success = cursor.rowcount > 0
-            conn.commit()
             if success:
                 logger.info(f"Установлена категория {category} для user_id={user_id}")
             return success
@@ -1760,14 +2634,13 @@ def set_participant_category(user_id: int, category: str) -> bool:
 def set_participant_cluster(user_id: int, cluster: str) -> bool:
     """Set cluster for participant"""
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+        with _connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "UPDATE participants SET cluster = ? WHERE user_id = ?",
                 (cluster, user_id),
             )
             success = cursor.rowcount > 0
-            conn.commit()
             if success:
                 logger.info(f"Установлен кластер {cluster} для user_id={user_id}")
             return success
@@ -1776,10 +2649,77 @@ def set_participant_cluster(user_id: int, cluster: str) -> bool:
         return False
 
 
+def bulk_set_participant_clusters(assignments: dict) -> int:
+    """Set clusters for many participants in one transaction
+    assignments: {user_id: cluster}
+    Returns: number of updated participants, -1 on error"""
+    if not assignments:
+        return 0
+    items = list(assignments.items())
+    try:
+        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+            cursor = conn.cursor()
+            updated = 0
+            # UPDATE ... CASE пачками, чтобы не превысить лимит параметров SQLite (999)
+            for start in range(0, len(items), 300):
+                chunk = items[start:start + 300]
+                case_sql = " ".join("WHEN ? THEN ?" for _ in chunk)
+                params = [value for pair in chunk for value in pair]
+                params.extend(user_id for user_id, _ in chunk)
+                cursor.execute(
+                    f"UPDATE participants SET cluster = CASE user_id {case_sql} END "
+                    f"WHERE user_id IN ({','.join('?' for _ in chunk)})",
+                    params,
+                )
+                updated += cursor.rowcount
+            conn.commit()
+            logger.info(f"Массово назначены кластеры для {updated} участников")
+            return updated
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при массовом назначении кластеров: {e}")
+        return -1
+
+
+def bulk_set_bib_numbers(assignments: dict) -> int:
+    """Set bib numbers for many participants in one transaction
+    assignments: {user_id: bib_number}
+    Returns: number of updated participants, -1 on error (including duplicates)"""
+    if not assignments:
+        return 0
+    items = list(assignments.items())
+    try:
+        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+            cursor = conn.cursor()
+            # Сначала снимаем старые номера, чтобы обмен номерами не нарушал уникальный индекс
+            for start in range(0, len(items), 900):
+                chunk = [user_id for user_id, _ in items[start:start + 900]]
+                cursor.execute(
+                    f"UPDATE participants SET bib_number = NULL "
+                    f"WHERE user_id IN ({','.join('?' for _ in chunk)})",
+                    chunk,
+                )
+            cursor.executemany(
+                "UPDATE participants SET bib_number = ? WHERE user_id = ?",
+                [(bib_number, user_id) for user_id, bib_number in items],
+            )
+            updated = cursor.rowcount
+            conn.commit()
+            logger.info(f"Массово присвоены беговые номера {updated} участникам")
+            for user_id, bib_number in items:
+                record_event(EVENT_BIB, user_id, bib_number=bib_number, source="bulk")
+            return updated
+    except sqlite3.IntegrityError as e:
+        logger.error(f"Массовое присвоение номеров отменено, дубликат номера: {e}")
+        return -1
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при массовом присвоении беговых номеров: {e}")
+        return -1
+
+
 def get_participants_by_role(role: str = None) -> list:
     """Get all participants by role for cluster assignment"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             if role:
                 cursor.execute(
@@ -1799,7 +2739,7 @@ def get_participants_by_role(role: str = None) -> list:
 def get_participants_with_categories() -> list:
     """Get all participants with their categories and clusters for final display"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -1833,7 +2773,7 @@ def get_participants_with_categories() -> list:
 def get_participants_for_excel_export() -> list:
     """Get all participants sorted by category and cluster for Excel export"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -1868,11 +2808,10 @@ def get_participants_for_excel_export() -> list:
 def clear_all_categories() -> bool:
     """Clear all categories for all participants"""
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+        with _connection() as conn:
             cursor = conn.cursor()
             cursor.execute("UPDATE participants SET category = NULL")
             success = cursor.rowcount > 0
-            conn.commit()
             logger.info("Очищены все категории участников")
             return success
     except sqlite3.Error as e:
@@ -1883,11 +2822,10 @@ def clear_all_categories() -> bool:
 def clear_all_clusters() -> bool:
     """Clear all clusters for all participants"""
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+        with _connection() as conn:
             cursor = conn.cursor()
             cursor.execute("UPDATE participants SET cluster = NULL")
             success = cursor.rowcount > 0
-            conn.commit()
             logger.info("Очищены все кластеры участников")
             return success
     except sqlite3.Error as e:
@@ -1898,8 +2836,8 @@ def clear_all_clusters() -> bool:
 def promote_waitlist_user_by_id(user_id: int) -> dict:
     """Promote user from waitlist to participants by user_id and increase limit automatically"""
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
-            cursor = conn.cursor()
+        with unit_of_work() as uow:
+            cursor = uow.cursor
 
             # Get user data from waitlist including team info
             cursor.execute(
@@ -1917,8 +2855,8 @@ def promote_waitlist_user_by_id(user_id: int) -> dict:
             username, name, target_time, role, gender, team_name, team_invite_code = user_data
 
             # Get current participant count and limit for this role
-            current_count = get_participant_count_by_role(role)
-            current_limit = get_setting(f"max_{role}s")  # max_runners
+            current_count = get_participant_count_by_role(role, conn=uow.conn)
+            current_limit = get_setting(f"max_{role}s", conn=uow.conn)  # max_runners
 
             if current_limit is None:
                 current_limit = 0
@@ -1935,7 +2873,7 @@ def promote_waitlist_user_by_id(user_id: int) -> dict:
             second_member_user_id = None
 
             if team_name:
-                second_member_data = get_team_member_in_waitlist(team_name, user_id)
+                second_member_data = get_team_member_in_waitlist(team_name, user_id, conn=uow.conn)
 
             # Calculate new limit (account for both members if second exists)
             members_to_promote = 2 if second_member_data else 1
@@ -1949,7 +2887,7 @@ def promote_waitlist_user_by_id(user_id: int) -> dict:
                 )
                 logger.info(f"Лимит {role}s увеличен с {current_limit} до {new_limit}")
 
-            # Add first user to participants (directly via cursor to avoid database lock)
+            # Add first user to participants
             if team_name:
                 # This is a team member - manually insert with "Команда" category
                 cursor.execute(
@@ -2040,10 +2978,11 @@ def promote_waitlist_user_by_id(user_id: int) -> dict:
                 second_member_role = None
                 second_member_gender = None
 
-            conn.commit()
-
             logger.info(f"Пользователь {name} (ID: {user_id}) переведен из очереди ожидания в участники. "
                        f"Лимит {role}s: {current_limit} -> {new_limit}")
+            record_event(EVENT_PROMOTED, user_id, role=role, old_limit=current_limit, new_limit=new_limit)
+            if second_member_promoted:
+                record_event(EVENT_PROMOTED, second_member_user_id, role=second_member_role, team_name=team_name)
 
             return {
                 "success": True,
@@ -2070,8 +3009,8 @@ def promote_waitlist_user_by_id(user_id: int) -> dict:
 def demote_participant_to_waitlist(user_id: int) -> dict:
     """Move participant to waitlist and decrease limit automatically"""
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
-            cursor = conn.cursor()
+        with unit_of_work() as uow:
+            cursor = uow.cursor
             
             # Get user data from participants
             cursor.execute(
@@ -2089,8 +3028,8 @@ def demote_participant_to_waitlist(user_id: int) -> dict:
             username, name, target_time, role, gender = user_data
             
             # Get current participant count and limit for this role
-            current_count = get_participant_count_by_role(role)
-            current_limit = get_setting(f"max_{role}s")  # max_runners
+            current_count = get_participant_count_by_role(role, conn=uow.conn)
+            current_limit = get_setting(f"max_{role}s", conn=uow.conn)  # max_runners
             
             if current_limit is None:
                 current_limit = 0
@@ -2105,24 +3044,25 @@ def demote_participant_to_waitlist(user_id: int) -> dict:
             
             # Update the limit only if it changes
             if new_limit != current_limit:
-                success = set_setting(f"max_{role}s", new_limit)
+                success = set_setting(f"max_{role}s", new_limit, conn=uow.conn)
                 if not success:
                     return {"success": False, "error": "Ошибка при обновлении лимита"}
                 logger.info(f"Лимит {role}s уменьшен с {current_limit} до {new_limit}")
             
             # Add user to waitlist
-            success = add_to_waitlist(user_id, username, name, target_time, role, gender)
+            success = add_to_waitlist(user_id, username, name, target_time, role, gender, conn=uow.conn)
             
             if not success:
+                # Откатываем уже измененный лимит вместе с остальными шагами
+                uow.rollback()
                 return {"success": False, "error": "Ошибка при добавлении в очередь ожидания"}
             
             # Remove from participants
             cursor.execute("DELETE FROM participants WHERE user_id = ?", (user_id,))
             
-            conn.commit()
-            
             logger.info(f"Пользователь {name} (ID: {user_id}) переведен из участников в очередь ожидания. "
                        f"Лимит {role}s: {current_limit} -> {new_limit}")
+            record_event(EVENT_DEMOTED, user_id, role=role, old_limit=current_limit, new_limit=new_limit)
             
             return {
                 "success": True,
@@ -2213,7 +3153,7 @@ def create_team(member1_id: int, member2_id: int, team_name: str = None) -> dict
 def get_all_teams() -> list:
     """Get all teams with member information"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -2235,7 +3175,7 @@ def get_all_teams() -> list:
 def get_team_by_id(team_id: int) -> tuple:
     """Get team information by team_id"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -2258,7 +3198,7 @@ def get_team_by_id(team_id: int) -> tuple:
 def get_team_by_member(user_id: int) -> tuple:
     """Get team information by member user_id"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -2281,14 +3221,13 @@ def get_team_by_member(user_id: int) -> tuple:
 def set_team_result(team_id: int, result: str) -> bool:
     """Set result for a team"""
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+        with _connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "UPDATE teams SET result = ? WHERE team_id = ?",
                 (result, team_id)
             )
             success = cursor.rowcount > 0
-            conn.commit()
             if success:
                 logger.info(f"Установлен результат {result} для команды team_id={team_id}")
             return success
@@ -2300,11 +3239,10 @@ def set_team_result(team_id: int, result: str) -> bool:
 def delete_team(team_id: int) -> bool:
     """Delete a team"""
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+        with _connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM teams WHERE team_id = ?", (team_id,))
             success = cursor.rowcount > 0
-            conn.commit()
             if success:
                 logger.info(f"Команда team_id={team_id} удалена")
             return success
@@ -2316,7 +3254,7 @@ def delete_team(team_id: int) -> bool:
 def get_participants_with_team_category() -> list:
     """Get all participants with category 'Команда' who are not yet in a team"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -2336,11 +3274,10 @@ def get_participants_with_team_category() -> list:
 def clear_all_teams() -> bool:
     """Clear all teams"""
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+        with _connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM teams")
             success = cursor.rowcount >= 0
-            conn.commit()
             logger.info("Все команды удалены")
             return success
     except sqlite3.Error as e:
@@ -2359,8 +3296,8 @@ def cancel_user_participation(user_id: int) -> dict:
     Returns dict with success status and details
     """
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
-            cursor = conn.cursor()
+        with unit_of_work() as uow:
+            cursor = uow.cursor
 
             # Check if user is in participants (включая team_name)
             cursor.execute(
@@ -2415,7 +3352,7 @@ def cancel_user_participation(user_id: int) -> dict:
                         }
 
                 # Get current limit for this role
-                current_limit = get_setting(f"max_{role}s")  # max_runners
+                current_limit = get_setting(f"max_{role}s", conn=uow.conn)  # max_runners
 
                 if current_limit is None:
                     current_limit = 0
@@ -2426,14 +3363,14 @@ def cancel_user_participation(user_id: int) -> dict:
                         current_limit = 0
 
                 # Get current participant count
-                current_count = get_participant_count_by_role(role)
+                current_count = get_participant_count_by_role(role, conn=uow.conn)
 
                 # Calculate new limit (decrease by 1, but not less than current_count - 1)
                 new_limit = max(current_count - 1, 0)
 
                 # Update the limit
                 if new_limit != current_limit:
-                    success = set_setting(f"max_{role}s", new_limit)
+                    success = set_setting(f"max_{role}s", new_limit, conn=uow.conn)
                     if not success:
                         return {"success": False, "error": "Ошибка при обновлении лимита"}
                     logger.info(f"Лимит {role}s уменьшен с {current_limit} до {new_limit}")
@@ -2515,11 +3452,10 @@ def cancel_user_participation(user_id: int) -> dict:
 
                     logger.info(f"Создан новый team_invite_code для оставшегося участника команды {partner_user_id}")
 
-            conn.commit()
-
             logger.info(f"Пользователь {name} (ID: {user_id}) отменил участие. "
                        f"Удален из {source}, добавлен в pending_registrations. "
                        f"Лимит: {current_limit} -> {new_limit if new_limit is not None else 'N/A'}")
+            record_event(EVENT_CANCELLED, user_id, role=role, source=source, old_limit=current_limit, new_limit=new_limit)
 
             return {
                 "success": True,
@@ -2612,7 +3548,7 @@ def create_slot_transfer_request(user_id: int) -> dict:
 def get_slot_transfer_by_code(referral_code: str) -> tuple:
     """Get slot transfer request by referral code"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -2718,6 +3654,11 @@ def approve_slot_transfer(transfer_id: int) -> dict:
             conn.commit()
 
             logger.info(f"Переоформление слота одобрено: {original_name} -> {new_name} (transfer_id={transfer_id})")
+            record_event(EVENT_SLOT_TRANSFERRED, original_user_id, transfer_id=transfer_id, to_user_id=new_user_id)
+            record_event(
+                EVENT_SLOT_RECEIVED, new_user_id, transfer_id=transfer_id, from_user_id=original_user_id,
+                name=new_name, role=role, bib_number=bib_number, payment_status=payment_status,
+            )
 
             return {
                 "success": True,
@@ -2789,7 +3730,7 @@ def reject_slot_transfer(transfer_id: int) -> dict:
 def get_pending_slot_transfers() -> list:
     """Get all pending slot transfer requests awaiting admin approval"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -2882,7 +3823,7 @@ def add_bib_number_info(bib_number: str, description: str) -> bool:
 def get_bib_number_description(bib_number: str) -> str:
     """Get description for a bib number"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "SELECT description FROM bib_numbers_info WHERE bib_number = ?",
@@ -2898,7 +3839,7 @@ def get_bib_number_description(bib_number: str) -> str:
 def get_all_bib_numbers_info() -> list:
     """Get all bib numbers with descriptions"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "SELECT bib_number, description FROM bib_numbers_info ORDER BY bib_number ASC"
@@ -2918,7 +3859,7 @@ def get_participant_by_team_invite_code(team_invite_code: str) -> tuple:
     """Get participant who created the team by invite code - searches both participants and waitlist
     Returns: (user_id, team_name, name, is_in_waitlist) or None"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
 
             # Сначала ищем в participants
@@ -2948,7 +3889,7 @@ def get_participant_by_team_invite_code(team_invite_code: str) -> tuple:
 def count_team_members(team_name: str) -> int:
     """Count participants in a team by team name"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "SELECT COUNT(*) FROM participants WHERE team_name = ? AND category = 'Команда'",
@@ -2965,7 +3906,7 @@ def count_complete_teams() -> int:
     """Count complete teams (teams with 2 members) in participants
     Returns: number of complete teams"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             # Подсчитываем команды с 2 участниками с категорией "Команда" и одинаковым названием
             cursor.execute(
@@ -2988,7 +3929,7 @@ def get_teams_from_participants() -> list:
     Returns: list of tuples (team_name, member1_user_id, member1_name, member1_username,
                              member2_user_id, member2_name, member2_username)"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _read_connection() as conn:
             cursor = conn.cursor()
             # Получаем команды с 2 участниками
             cursor.execute(
@@ -3024,11 +3965,13 @@ def get_teams_from_participants() -> list:
         return []
 
 
-def get_team_member_in_waitlist(team_name: str, exclude_user_id: int) -> tuple:
+def get_team_member_in_waitlist(
+    team_name: str, exclude_user_id: int, conn: sqlite3.Connection = None
+) -> tuple:
     """Get another team member from waitlist (excluding specified user_id)
     Returns: (user_id, username, name, target_time, role, gender, team_invite_code) or None"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _reading(conn) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """SELECT user_id, username, name, target_time, role, gender, team_invite_code
@@ -3045,3 +3988,666 @@ def get_team_member_in_waitlist(team_name: str, exclude_user_id: int) -> tuple:
     except sqlite3.Error as e:
         logger.error(f"Ошибка при поиске второго участника команды {team_name} в waitlist: {e}")
         return None
+
+
+# ============================================================================
+# PARTICIPANTS PAGINATION FUNCTIONS
+# ============================================================================
+
+
+def _build_participant_filters(filters: dict) -> tuple:
+    """Build WHERE conditions for participant list filters
+    filters keys: payment ('paid'/'unpaid'), category, cluster, name"""
+    conditions = []
+    params = []
+    filters = filters or {}
+
+    if filters.get("payment") == "paid":
+        conditions.append("payment_status = 'paid'")
+    elif filters.get("payment") == "unpaid":
+        conditions.append("payment_status != 'paid'")
+
+    if filters.get("category"):
+        conditions.append("category = ?")
+        params.append(filters["category"])
+
+    if filters.get("cluster"):
+        conditions.append("cluster = ?")
+        params.append(filters["cluster"])
+
+    tokens = _search_tokens(filters.get("name"))
+    if tokens and _people_fts_available:
+        # Префиксы слов по полнотекстовому индексу, в том же запросе и без ограничения числа строк
+        conditions.append(
+            "user_id IN (SELECT user_id FROM people_fts WHERE people_fts MATCH ? AND source = 'participants')"
+        )
+        params.append(_fts_query(tokens))
+    elif tokens:
+        # Без FTS5 LIKE без учета регистра работает только для латиницы
+        conditions.append("(name LIKE ? OR username LIKE ?)")
+        pattern = f"%{filters['name'].strip().lstrip('@')}%"
+        params.extend([pattern, pattern])
+
+    return conditions, params
+
+
+def get_participants_page(
+    after_user_id: int = None,
+    before_user_id: int = None,
+    limit: int = 10,
+    filters: dict = None,
+) -> dict:
+    """Get one page of participants using keyset pagination by user_id
+    Returns: {"participants": [...], "has_prev": bool, "has_next": bool, "offset": int, "total": int}"""
+    empty = {"participants": [], "has_prev": False, "has_next": False, "offset": 0, "total": 0}
+    conditions, params = _build_participant_filters(filters)
+    base_where = " AND ".join(conditions) if conditions else "1"
+
+    try:
+        with _read_connection() as conn:
+            cursor = conn.cursor()
+
+            if before_user_id is not None:
+                cursor.execute(
+                    f"SELECT * FROM participants WHERE {base_where} AND user_id < ? "
+                    f"ORDER BY user_id DESC LIMIT ?",
+                    params + [before_user_id, limit],
+                )
+                participants = cursor.fetchall()[::-1]
+            else:
+                cursor.execute(
+                    f"SELECT * FROM participants WHERE {base_where} AND user_id > ? "
+                    f"ORDER BY user_id ASC LIMIT ?",
+                    params + [after_user_id if after_user_id is not None else -1, limit],
+                )
+                participants = cursor.fetchall()
+
+            cursor.execute(f"SELECT COUNT(*) FROM participants WHERE {base_where}", params)
+            total = cursor.fetchone()[0]
+            if not participants:
+                empty["total"] = total
+                return empty
+
+            first_id, last_id = participants[0][0], participants[-1][0]
+            cursor.execute(
+                f"SELECT COUNT(*) FROM participants WHERE {base_where} AND user_id < ?",
+                params + [first_id],
+            )
+            offset = cursor.fetchone()[0]
+
+            return {
+                "participants": participants,
+                "has_prev": offset > 0,
+                "has_next": offset + len(participants) < total,
+                "offset": offset,
+                "total": total,
+            }
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при получении страницы участников: {e}")
+        return empty
+
+
+def _iter_rows(sql: str, params: list, description: str):
+    """Yield sqlite3.Row rows straight from the cursor; rows support both index and column name"""
+    try:
+        with _read_connection() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.execute(sql, params)
+            for row in cursor:
+                yield row
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при чтении {description}: {e}")
+
+
+def iter_participants(after_user_id: int = None, limit: int = None, filters: dict = None, offset: int = 0):
+    """Stream participants ordered by user_id (keyset pagination with after_user_id)
+    filters keys: role, payment ('paid'/'unpaid'), category, cluster, name"""
+    filters = filters or {}
+    conditions, params = _build_participant_filters(filters)
+    if filters.get("role"):
+        conditions.append("role = ?")
+        params.append(filters["role"])
+    if after_user_id is not None:
+        conditions.append("user_id > ?")
+        params.append(after_user_id)
+    where = " AND ".join(conditions) if conditions else "1"
+    return _iter_rows(
+        f"SELECT * FROM participants WHERE {where} ORDER BY user_id LIMIT ? OFFSET ?",
+        params + [limit if limit is not None else -1, offset],
+        "списка участников",
+    )
+
+
+def iter_waitlist(after_id: int = None, limit: int = None, role: str = None):
+    """Stream waiting users: runners first, then by join_date (keyset pagination with after_id)
+
+    Each row ends with position, the place in the queue of its role as in get_waitlist_position."""
+    conditions, params = [], []
+    if role:
+        conditions.append("role = ?")
+        params.append(role)
+    if after_id is not None:
+        conditions.append(
+            "(role != 'runner', join_date, id) > "
+            "(SELECT role != 'runner', join_date, id FROM waitlist WHERE id = ?)"
+        )
+        params.append(after_id)
+    where = " AND ".join(conditions) if conditions else "1"
+    return _iter_rows(
+        "SELECT * FROM ("
+        "SELECT id, user_id, username, name, target_time, role, gender, join_date, status, "
+        "ROW_NUMBER() OVER (PARTITION BY role ORDER BY join_date, id) AS position "
+        "FROM waitlist WHERE status = 'waiting'"
+        f") WHERE {where} ORDER BY role != 'runner', join_date, id LIMIT ?",
+        params + [limit if limit is not None else -1],
+        "очереди ожидания",
+    )
+
+
+def iter_teams(after_team_id: int = None, limit: int = None):
+    """Stream teams ordered by team_id (keyset pagination with after_team_id)"""
+    return _iter_rows(
+        "SELECT team_id, team_name, member1_id, member2_id, result, created_date "
+        "FROM teams WHERE team_id > ? ORDER BY team_id LIMIT ?",
+        [after_team_id if after_team_id is not None else -1, limit if limit is not None else -1],
+        "списка команд",
+    )
+
+
+# ============================================================================
+# EVENT STATISTICS FUNCTIONS
+# ============================================================================
+
+EVENT_STATS_CACHE_TTL = 5
+
+_event_stats_cache = {"value": None, "expires": 0.0}
+
+
+def get_event_stats(use_cache: bool = True) -> dict:
+    """Get all registration counters with a single aggregate query
+    Returns: dict with participant, payment, waitlist, pending and team counts,
+    max_runners and reg_end_date; empty dict on error"""
+    now = time.monotonic()
+    if use_cache and _event_stats_cache["value"] is not None and now < _event_stats_cache["expires"]:
+        return dict(_event_stats_cache["value"])
+
+    try:
+        with _read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT
+                    COUNT(*),
+                    COALESCE(SUM(role = 'runner'), 0),
+                    COALESCE(SUM(role = 'volunteer'), 0),
+                    COALESCE(SUM(payment_status = 'paid'), 0),
+                    COALESCE(SUM(role = 'runner' AND payment_status = 'paid'), 0),
+                    (SELECT COUNT(*) FROM pending_registrations),
+                    (SELECT COUNT(*) FROM waitlist WHERE status = 'waiting'),
+                    (SELECT COUNT(*) FROM waitlist WHERE status = 'waiting' AND role = 'runner'),
+                    (SELECT COUNT(*) FROM teams t
+                        JOIN participants p1 ON t.member1_id = p1.user_id
+                        JOIN participants p2 ON t.member2_id = p2.user_id),
+                    (SELECT COUNT(*) FROM (
+                        SELECT team_name FROM participants
+                        WHERE category = 'Команда' AND team_name IS NOT NULL
+                        GROUP BY team_name HAVING COUNT(*) = 2)),
+                    (SELECT value FROM settings WHERE key = 'max_runners'),
+                    (SELECT value FROM settings WHERE key = 'reg_end_date')
+                FROM participants
+                """
+            )
+            row = cursor.fetchone()
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при получении статистики мероприятия: {e}")
+        return {}
+
+    max_runners = row[10]
+    stats = {
+        "participants": row[0],
+        "runners": row[1],
+        "volunteers": row[2],
+        "paid": row[3],
+        "paid_runners": row[4],
+        "unpaid_runners": row[1] - row[4],
+        "pending_registrations": row[5],
+        "waitlist": row[6],
+        "waitlist_runners": row[7],
+        "teams": row[8],
+        "complete_teams": row[9],
+        "max_runners": int(max_runners) if max_runners and str(max_runners).isdigit() else 0,
+        "reg_end_date": row[11] or None,
+    }
+    _event_stats_cache["value"] = stats
+    _event_stats_cache["expires"] = now + EVENT_STATS_CACHE_TTL
+    return dict(stats)
+
+
+# ============================================================================
+# AUDIT EVENTS
+# ============================================================================
+
+EVENT_REGISTERED = "registered"
+EVENT_WAITLISTED = "waitlisted"
+EVENT_PAYMENT = "payment_status"
+EVENT_BIB = "bib_number"
+EVENT_RESULT = "result"
+EVENT_PROMOTED = "promoted"
+EVENT_DEMOTED = "demoted"
+EVENT_CONFIRMED = "waitlist_confirmed"
+EVENT_CANCELLED = "cancelled"
+EVENT_SLOT_TRANSFERRED = "slot_transferred"
+EVENT_SLOT_RECEIVED = "slot_received"
+EVENT_BLOCKED = "blocked_bot"
+
+# (db_path, ts, user_id, event_type, payload JSON) ожидающие записи в таблицу events
+_event_buffer = []
+_event_buffer_lock = threading.Lock()
+# Пачка, которую не удалось записать столько раз подряд, отбрасывается
+EVENT_FLUSH_MAX_ATTEMPTS = 5
+# Предел буфера: пока база недоступна, самые старые события вытесняются
+EVENT_BUFFER_LIMIT = 10000
+_event_flush_failures = 0
+# События, записанные внутри транзакции, ждут ее COMMIT в списке своего потока
+_pending_events = threading.local()
+
+
+def ensure_events_table():
+    """Create the append-only events table with its (user_id, ts) index"""
+    try:
+        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ts TEXT NOT NULL,
+                    user_id INTEGER,
+                    event_type TEXT NOT NULL,
+                    payload TEXT
+                )
+                """
+            )
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_user_ts ON events(user_id, ts)")
+            # История не переписывается: изменение и удаление событий запрещены
+            for operation in ("UPDATE", "DELETE"):
+                cursor.execute(
+                    f"""
+                    CREATE TRIGGER IF NOT EXISTS events_no_{operation.lower()}
+                    BEFORE {operation} ON events
+                    BEGIN
+                        SELECT RAISE(ABORT, 'events is append-only');
+                    END
+                    """
+                )
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при создании таблицы событий: {e}")
+        raise
+
+
+def record_event(event_type: str, user_id: int = None, **payload):
+    """
+    Queue an audit event. Only appends to an in-memory buffer; the rows are
+    written in batches by flush_events(), so callers never wait on the database.
+
+    Inside unit_of_work() the event is held until the transaction commits
+    and dropped if it rolls back.
+    """
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+    data = json.dumps(payload, ensure_ascii=False) if payload else None
+    _emit_events([(DB_PATH, ts, user_id, event_type, data)])
+
+
+def _emit_events(events: list):
+    """Hand events to the enclosing transaction, or to the write buffer outside one"""
+    if not events:
+        return
+    pending = getattr(_pending_events, "events", None)
+    if pending is not None:
+        pending.extend(events)
+        return
+    with _event_buffer_lock:
+        _event_buffer.extend(events)
+        overflow = len(_event_buffer) - EVENT_BUFFER_LIMIT
+        if overflow > 0:
+            del _event_buffer[:overflow]
+    if overflow > 0:
+        logger.warning(f"Буфер событий аудита переполнен, отброшено старых событий: {overflow}")
+
+
+@contextlib.contextmanager
+def _deferred_events():
+    """Collect events recorded in the block; the caller emits them after COMMIT"""
+    outer = getattr(_pending_events, "events", None)
+    events = []
+    _pending_events.events = events
+    try:
+        yield events
+    finally:
+        _pending_events.events = outer
+
+
+def pending_events_count() -> int:
+    with _event_buffer_lock:
+        return len(_event_buffer)
+
+
+def _write_events(db_path: str, rows: list):
+    with sqlite3.connect(db_path, timeout=10) as conn:
+        conn.executemany(
+            "INSERT INTO events (ts, user_id, event_type, payload) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+
+
+def flush_events() -> int:
+    """
+    Write all buffered events, one transaction per database; returns rows written or -1 on error.
+
+    Each event goes to the database it was recorded against. A failed batch
+    is kept for the next flush and dropped after EVENT_FLUSH_MAX_ATTEMPTS
+    failures in a row, so a missing table cannot grow the buffer forever.
+    """
+    global _event_buffer, _event_flush_failures
+    with _event_buffer_lock:
+        batch, _event_buffer = _event_buffer, []
+    if not batch:
+        return 0
+
+    by_path = {}
+    for db_path, *row in batch:
+        by_path.setdefault(db_path, []).append(tuple(row))
+
+    written = 0
+    failed = []
+    for db_path, rows in by_path.items():
+        if not os.path.exists(db_path):
+            logger.warning(f"База {db_path} не найдена, отброшено событий аудита: {len(rows)}")
+            continue
+        try:
+            _write_events(db_path, rows)
+            written += len(rows)
+        except sqlite3.Error as e:
+            failed.extend((db_path,) + row for row in rows)
+            error = e
+
+    if not failed:
+        _event_flush_failures = 0
+        return written
+
+    _event_flush_failures += 1
+    if _event_flush_failures >= EVENT_FLUSH_MAX_ATTEMPTS:
+        _event_flush_failures = 0
+        logger.error(
+            f"Не удалось записать {len(failed)} событий аудита за {EVENT_FLUSH_MAX_ATTEMPTS} попыток, "
+            f"события отброшены: {error}"
+        )
+    else:
+        # Возвращаем события в буфер, чтобы записать их следующей пачкой
+        with _event_buffer_lock:
+            _event_buffer = failed + _event_buffer
+        logger.warning(f"Ошибка при записи {len(failed)} событий аудита, повтор при следующей записи: {error}")
+    return -1
+
+
+# Процесс CLI или бот, завершившийся без остановки писателя, не теряет хвост буфера
+atexit.register(flush_events)
+
+
+def get_user_events(user_id: int, event_type: str = None, limit: int = None) -> list:
+    """User's events in chronological order: [(id, ts, event_type, payload dict)]"""
+    where = "user_id = ?" + (" AND event_type = ?" if event_type else "")
+    params = [user_id] + ([event_type] if event_type else [])
+    query = f"SELECT id, ts, event_type, payload FROM events WHERE {where}"
+    if limit:
+        # Последние limit событий, но в хронологическом порядке
+        query = f"SELECT * FROM ({query} ORDER BY ts DESC, id DESC LIMIT ?) ORDER BY ts, id"
+        params.append(limit)
+    else:
+        query += " ORDER BY ts, id"
+    try:
+        with _read_connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [
+            (event_id, ts, etype, json.loads(payload) if payload else {})
+            for event_id, ts, etype, payload in rows
+        ]
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при получении событий пользователя {user_id}: {e}")
+        return []
+
+
+# ============================================================================
+# PEOPLE SEARCH
+# ============================================================================
+
+# Источник -> (код в rowid, таблица, ключ строки, выражение имени, выражение username)
+# rowid записи индекса = ключ * 8 + код, поэтому триггеры находят ее без сканирования
+PEOPLE_SEARCH_SOURCES = {
+    "participants": (1, "participants", "user_id", "{row}.name", "{row}.username"),
+    "waitlist": (2, "waitlist", "id", "{row}.name", "{row}.username"),
+    "bot_users": (
+        3,
+        "bot_users",
+        "user_id",
+        "TRIM(COALESCE({row}.first_name, '') || ' ' || COALESCE({row}.last_name, ''))",
+        "{row}.username",
+    ),
+    # Архивы представлены сводкой user_race_summary: одно имя на пользователя
+    "archives": (4, "user_race_summary", "user_id", "{row}.latest_name", "NULL"),
+}
+
+# Колонки, изменение которых обновляет индекс (смена оплаты, номера и т.п. его не трогает)
+_PEOPLE_SEARCH_UPDATE_COLUMNS = {
+    "participants": "user_id, name, username",
+    "waitlist": "user_id, name, username",
+    "bot_users": "user_id, first_name, last_name, username",
+    "archives": "user_id, latest_name",
+}
+
+# Минимальное сходство для нечеткого совпадения (difflib ratio)
+PEOPLE_SEARCH_FUZZY_CUTOFF = 0.7
+
+# False, если SQLite собран без FTS5 — тогда поиск идет через LIKE
+_people_fts_available = True
+
+
+def _people_terms_sql(name: str, username: str) -> str:
+    """Indexed text: name and username with ё folded to е, so «Петр» finds «Пётр»"""
+    return (
+        f"REPLACE(REPLACE(COALESCE({name}, '') || ' ' || COALESCE({username}, ''), 'ё', 'е'), 'Ё', 'Е')"
+    )
+
+
+def _people_search_triggers(source: str) -> list:
+    code, table, key, name_expr, username_expr = PEOPLE_SEARCH_SOURCES[source]
+
+    def insert(row):
+        name, username = name_expr.format(row=row), username_expr.format(row=row)
+        return (
+            "INSERT OR REPLACE INTO people_fts (rowid, terms, name, username, source, user_id) "
+            f"VALUES ({row}.{key} * 8 + {code}, {_people_terms_sql(name, username)}, "
+            f"{name}, {username}, '{source}', {row}.user_id);"
+        )
+
+    delete = f"DELETE FROM people_fts WHERE rowid = old.{key} * 8 + {code};"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS people_fts_{source}_insert AFTER INSERT ON {table} "
+        f"BEGIN {insert('new')} END",
+        f"CREATE TRIGGER IF NOT EXISTS people_fts_{source}_delete AFTER DELETE ON {table} "
+        f"BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS people_fts_{source}_update "
+        f"AFTER UPDATE OF {_PEOPLE_SEARCH_UPDATE_COLUMNS[source]} ON {table} "
+        f"BEGIN {delete} {insert('new')} END",
+    ]
+
+
+def ensure_people_search_index():
+    """Create the FTS5 people index with sync triggers and fill it on first run"""
+    global _people_fts_available
+    try:
+        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+            cursor = conn.cursor()
+            exists = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='people_fts'"
+            ).fetchone()
+            cursor.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS people_fts USING fts5(
+                    terms, name UNINDEXED, username UNINDEXED, source UNINDEXED, user_id UNINDEXED,
+                    tokenize = "unicode61 remove_diacritics 2",
+                    prefix = '2 3'
+                )
+                """
+            )
+            for source in PEOPLE_SEARCH_SOURCES:
+                for statement in _people_search_triggers(source):
+                    cursor.execute(statement)
+            conn.commit()
+    except sqlite3.Error as e:
+        _people_fts_available = False
+        logger.error(f"Полнотекстовый поиск недоступен, используется LIKE: {e}")
+        return
+    if not exists:
+        rebuild_people_search_index()
+
+
+def rebuild_people_search_index() -> int:
+    """Refill people_fts from all sources; returns indexed rows count or -1"""
+    try:
+        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM people_fts")
+            for source, (code, table, key, name_expr, username_expr) in PEOPLE_SEARCH_SOURCES.items():
+                name, username = name_expr.format(row=table), username_expr.format(row=table)
+                cursor.execute(
+                    f"""
+                    INSERT INTO people_fts (rowid, terms, name, username, source, user_id)
+                    SELECT {key} * 8 + {code}, {_people_terms_sql(name, username)},
+                           {name}, {username}, '{source}', user_id
+                    FROM {table}
+                    """
+                )
+            count = cursor.execute("SELECT COUNT(*) FROM people_fts").fetchone()[0]
+            conn.commit()
+        logger.info(f"Поисковый индекс участников перестроен: {count} записей")
+        return count
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при перестроении поискового индекса: {e}")
+        return -1
+
+
+def _search_tokens(query: str) -> list:
+    import re
+
+    return [token.lower().replace("ё", "е") for token in re.findall(r"\w+", query or "")]
+
+
+def _fts_query(tokens: list, prefix_len: int = None) -> str:
+    """Every token as a quoted prefix term: "ива"* AND "пет"*"""
+    terms = [f'"{token[:prefix_len] if prefix_len else token}"*' for token in tokens]
+    return (" OR " if prefix_len else " AND ").join(terms)
+
+
+def _fuzzy_score(tokens: list, name, username) -> float:
+    """Average best difflib ratio of query tokens against name and username words"""
+    from difflib import SequenceMatcher
+
+    words = _search_tokens(f"{name or ''} {username or ''}")
+    if not words:
+        return 0.0
+    total = 0.0
+    for token in tokens:
+        total += max(SequenceMatcher(None, token, word).ratio() for word in words)
+    return total / len(tokens)
+
+
+def search_people(query: str, limit: int = 20, sources: tuple = None) -> list:
+    """
+    Find people by name or username across participants, waitlist, bot users and archives.
+
+    Words of the query match as prefixes (ива пет -> Иван Петров); when that finds
+    nothing, candidates sharing the first letters are ranked by similarity, so
+    small typos still match. Returns dicts: user_id, name, username, sources,
+    fuzzy — best matches first, one entry per user.
+    """
+    tokens = _search_tokens(query)
+    if not tokens:
+        return []
+    sources = tuple(sources or PEOPLE_SEARCH_SOURCES)
+    placeholders = ",".join("?" * len(sources))
+
+    if not _people_fts_available:
+        return _search_people_like(query, limit, sources)
+
+    sql = (
+        "SELECT user_id, name, username, source FROM people_fts "
+        f"WHERE people_fts MATCH ? AND source IN ({placeholders}) ORDER BY rank LIMIT ?"
+    )
+    try:
+        with _read_connection() as conn:
+            rows = conn.execute(sql, [_fts_query(tokens)] + list(sources) + [limit * 4]).fetchall()
+            fuzzy = not rows
+            if fuzzy:
+                candidates = conn.execute(
+                    sql, [_fts_query(tokens, prefix_len=2)] + list(sources) + [500]
+                ).fetchall()
+                scored = [
+                    (_fuzzy_score(tokens, row[1], row[2]), row) for row in candidates
+                ]
+                scored = [item for item in scored if item[0] >= PEOPLE_SEARCH_FUZZY_CUTOFF]
+                scored.sort(key=lambda item: item[0], reverse=True)
+                rows = [row for _, row in scored]
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при поиске людей по запросу '{query}': {e}")
+        return []
+    return _merge_people_rows(rows, limit, fuzzy)
+
+
+def _merge_people_rows(rows, limit: int, fuzzy: bool) -> list:
+    """One entry per user in rank order; name and username from the first source that has them"""
+    people = {}
+    for user_id, name, username, source in rows:
+        person = people.get(user_id)
+        if person is None:
+            if len(people) >= limit:
+                continue
+            person = people[user_id] = {
+                "user_id": user_id,
+                "name": None,
+                "username": None,
+                "sources": [],
+                "fuzzy": fuzzy,
+            }
+        person["name"] = person["name"] or name or None
+        person["username"] = person["username"] or username
+        if source not in person["sources"]:
+            person["sources"].append(source)
+    return list(people.values())
+
+
+def _search_people_like(query: str, limit: int, sources: tuple) -> list:
+    """LIKE fallback for SQLite builds without FTS5"""
+    pattern = f"%{query.strip().lstrip('@').lower()}%"
+    rows = []
+    try:
+        with _read_connection() as conn:
+            conn.create_function("py_lower", 1, lambda s: s.lower() if s else s, deterministic=True)
+            for source in sources:
+                _, table, _, name_expr, username_expr = PEOPLE_SEARCH_SOURCES[source]
+                name_sql = name_expr.format(row=table)
+                username_sql = username_expr.format(row=table)
+                rows.extend(
+                    (user_id, name, username, source)
+                    for user_id, name, username in conn.execute(
+                        f"SELECT user_id, {name_sql}, {username_sql} FROM {table} "
+                        f"WHERE py_lower({name_sql}) LIKE ? OR py_lower({username_sql}) LIKE ? LIMIT ?",
+                        (pattern, pattern, limit),
+                    )
+                )
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при поиске людей по запросу '{query}': {e}")
+        return []
+    return _merge_people_rows(rows, limit, False)
@@ -1,4 +1,5 @@
 import datetime
+import html
 import sqlite3
 import io
 import csv
@@ -28,6 +29,24 @@ from .utils import (
     create_bib_notification_confirmation_keyboard,
     create_back_keyboard,
     create_admin_commands_keyboard,
+    create_participants_category_keyboard,
+)
+from .plan_flow import handle_plan_flow, mark_selected, start_plan_flow
+from .bib_allocation import (
+    ORDER_CLUSTER,
+    ORDER_CATEGORY,
+    ORDER_TIME,
+    build_bib_plan,
+    format_bib_plan_preview,
+    parse_bib_ranges,
+    reserved_from_bib_info,
+)
+from .results_import import (
+    KEY_BIB,
+    decode_csv,
+    parse_results_csv,
+    plan_results_import,
+    format_import_report,
 )
 from .validation import (
     validate_user_id,
@@ -35,6 +54,7 @@ from .validation import (
     sanitize_input,
 )
 from database import (
+    DB_PATH,
     get_all_participants,
     get_pending_registrations,
     get_participant_count,
@@ -46,6 +66,7 @@ from database import (
     delete_pending_registration,
     add_pending_registration,
     cleanup_blocked_user,
+    BlockedUsersBatch,
     get_race_data,
     get_past_races,
     save_race_to_db,
@@ -57,6 +78,13 @@ from database import (
     demote_participant_to_waitlist,
     get_setting,
     set_setting,
+    get_participants_page,
+    get_event_stats,
+    is_current_event_active,
+    bulk_set_bib_numbers,
+    get_all_bib_numbers_info,
+    bulk_set_results,
+    memoize_by_table_versions,
 )
 
 
@@ -260,7 +288,129 @@ def register_admin_participant_handlers(dp: Dispatcher, bot: Bot, admin_id: int)
         )
         await callback.answer()
 
-    async def show_participants(event: [Message, CallbackQuery]):
+    PARTICIPANTS_PAGE_SIZE = 10
+    PARTICIPANT_CATEGORIES = ["СуперЭлита", "Элита", "Классика", "Женский", "Команда"]
+    PARTICIPANT_CLUSTERS = ["A", "B", "C", "D", "E", "F", "G"]
+    CATEGORY_EMOJI = {
+        "СуперЭлита": "💎",
+        "Элита": "🥇",
+        "Классика": "🏃",
+        "Женский": "👩",
+        "Команда": "👥",
+    }
+    CLUSTER_EMOJI = {"A": "🅰️", "B": "🅱️", "C": "🅲", "D": "🅳", "E": "🅴", "F": "🅵", "G": "🅶"}
+
+    def format_participant_entry(index: int, participant: tuple) -> str:
+        user_id_p, username, name, target_time, role, reg_date, payment_status, bib_number = participant[:8]
+        category, cluster = participant[10], participant[11]
+
+        payment_info = "✅ Оплачено" if payment_status == "paid" else "❌ Не оплачено"
+        lines = [
+            f"{index}. <b>{name}</b>",
+            f"🆔 ID: <code>{user_id_p}</code>",
+            f"📱 TG: {'@' + username if username else '—'}",
+            f"⏰ Время: {target_time or '—'}",
+            f"💰 Оплата: {payment_info}",
+            f"🏷 Номер: {'№' + str(bib_number) if bib_number else '—'}",
+        ]
+        if category:
+            lines.append(f"📂 Категория: {CATEGORY_EMOJI.get(category, '📂')} {category}")
+        if cluster:
+            lines.append(f"🎯 Кластер: {CLUSTER_EMOJI.get(cluster, '🎯')} {cluster}")
+        lines.append(f"/paid_{user_id_p}")
+        return "\n".join(lines)
+
+    def describe_filters(filters: dict) -> str:
+        parts = []
+        if filters.get("payment") == "paid":
+            parts.append("оплатившие")
+        elif filters.get("payment") == "unpaid":
+            parts.append("не оплатившие")
+        if filters.get("category"):
+            parts.append(f"категория {filters['category']}")
+        if filters.get("cluster"):
+            parts.append(f"кластер {filters['cluster']}")
+        if filters.get("name"):
+            parts.append(f"поиск «{html.escape(filters['name'])}»")
+        return ", ".join(parts)
+
+    def create_participants_page_keyboard(page: dict, filters: dict) -> InlineKeyboardMarkup:
+        participants = page["participants"]
+        nav_row = []
+        if page["has_prev"]:
+            nav_row.append(
+                InlineKeyboardButton(text="⬅️", callback_data=f"plist_prev_{participants[0][0]}")
+            )
+        if page["has_next"]:
+            nav_row.append(
+                InlineKeyboardButton(text="➡️", callback_data=f"plist_next_{participants[-1][0]}")
+            )
+
+        mark = mark_selected
+        payment = filters.get("payment")
+        rows = [nav_row] if nav_row else []
+        rows.append([
+            InlineKeyboardButton(text=mark(payment is None, "Все"), callback_data="plist_pay_all"),
+            InlineKeyboardButton(text=mark(payment == "paid", "✅ Оплатили"), callback_data="plist_pay_paid"),
+            InlineKeyboardButton(text=mark(payment == "unpaid", "❌ Не оплатили"), callback_data="plist_pay_unpaid"),
+        ])
+        rows.append([
+            InlineKeyboardButton(text=mark(bool(filters.get("category")), "📂 Категория"), callback_data="plist_catmenu"),
+            InlineKeyboardButton(text=mark(bool(filters.get("cluster")), "🎯 Кластер"), callback_data="plist_clmenu"),
+            InlineKeyboardButton(text=mark(bool(filters.get("name")), "🔍 Поиск"), callback_data="plist_search"),
+        ])
+        if filters:
+            rows.append([InlineKeyboardButton(text="🧹 Сбросить фильтры", callback_data="plist_reset")])
+        rows.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="category_participants")])
+        return InlineKeyboardMarkup(inline_keyboard=rows)
+
+    def render_participants_page(page: dict, filters: dict) -> str:
+        header = f"👥 <b>Список участников</b> ({page['total']})"
+        filter_text = describe_filters(filters)
+        if filter_text:
+            header += f"\n🔎 Фильтр: {filter_text}"
+
+        participants = page["participants"]
+        if not participants:
+            if filters:
+                return f"{header}\n\nНикто не найден по выбранным фильтрам."
+            return "👥 <b>Список участников пуст</b>\n\nНикто еще не зарегистрировался."
+
+        first = page["offset"] + 1
+        last = page["offset"] + len(participants)
+        entries = [
+            format_participant_entry(i, participant)
+            for i, participant in enumerate(participants, first)
+        ]
+        return f"{header}\n🏃 Показаны {first}–{last}\n\n" + "\n\n".join(entries)
+
+    async def send_participants_page(
+        message: Message,
+        state: FSMContext,
+        after_user_id: int = None,
+        before_user_id: int = None,
+        edit: bool = False,
+    ):
+        data = await state.get_data()
+        filters = data.get("participants_filters", {})
+        page = get_participants_page(
+            after_user_id=after_user_id,
+            before_user_id=before_user_id,
+            limit=PARTICIPANTS_PAGE_SIZE,
+            filters=filters,
+        )
+        text = render_participants_page(page, filters)
+        keyboard = create_participants_page_keyboard(page, filters)
+        if edit:
+            try:
+                await message.edit_text(text, reply_markup=keyboard)
+            except TelegramBadRequest as e:
+                if "message is not modified" not in str(e):
+                    raise
+        else:
+            await message.answer(text, reply_markup=keyboard)
+
+    async def show_participants(event: [Message, CallbackQuery], state: FSMContext):
         user_id = event.from_user.id
         if user_id != admin_id:
             await event.answer(messages["set_reg_end_date_access_denied"])
@@ -274,116 +424,110 @@ def register_admin_participant_handlers(dp: Dispatcher, bot: Bot, admin_id: int)
             await event.delete()
             message = event
 
-        participants = get_all_participants()
-        if not participants:
-            await message.answer(
-                "👥 <b>Список участников пуст</b>\n\nНикто еще не зарегистрировался."
-            )
-            return
-
-        # Build beautiful participant list
-        text = "👥 <b>Список участников</b>\n\n"
-        runners = []
+        await state.update_data(participants_filters={})
+        await send_participants_page(message, state)
 
-        for participant in participants:
-            (
-                user_id_p,
-                username,
-                name,
-                target_time,
-                role,
-                reg_date,
-                payment_status,
-                bib_number,
-                result,
-                gender,
-                category,
-                cluster,
-                team_name,
-                team_invite_code,
-            ) = participant
+        if isinstance(event, CallbackQuery):
+            await event.answer()
 
-            # Format payment status
-            payment_emoji = "✅" if payment_status == "paid" else "❌"
-            payment_text = "Оплачено" if payment_status == "paid" else "Не оплачено"
-            payment_info = f"{payment_emoji} {payment_text}"
+    @dp.message(Command("participants", "список", "участники"))
+    async def cmd_show_participants(message: Message, state: FSMContext):
+        await show_participants(message, state)
 
-            # Format bib number
-            bib_info = f"№{bib_number}" if bib_number else "—"
+    @dp.callback_query(F.data == "admin_participants")
+    async def callback_show_participants(callback_query: CallbackQuery, state: FSMContext):
+        await show_participants(callback_query, state)
 
-            # Format username
-            username_info = f"@{username}" if username else "—"
+    @dp.callback_query(F.data.startswith("plist_"))
+    async def callback_participants_page(callback_query: CallbackQuery, state: FSMContext):
+        if callback_query.from_user.id != admin_id:
+            await callback_query.answer("❌ Доступ запрещен")
+            return
 
-            # Format target time
-            time_info = target_time if target_time else "—"
+        action = callback_query.data[len("plist_"):]
+        data = await state.get_data()
+        filters = dict(data.get("participants_filters", {}))
 
-            # Format category and cluster
-            category_info = ""
-            if category:
-                category_emoji = {
-                    "СуперЭлита": "💎",
-                "Элита": "🥇",
-                    "Классика": "🏃",
-                    "Женский": "👩",
-                    "Команда": "👥",
-                }.get(category, "📂")
-                category_info += f"📂 Категория: {category_emoji} {category}\n"
+        if action.startswith("next_") or action.startswith("prev_"):
+            cursor = int(action.split("_", 1)[1])
+            if action.startswith("next_"):
+                await send_participants_page(callback_query.message, state, after_user_id=cursor, edit=True)
+            else:
+                await send_participants_page(callback_query.message, state, before_user_id=cursor, edit=True)
+            await callback_query.answer()
+            return
 
-            cluster_info = ""
-            if cluster:
-                cluster_emoji = {"A": "🅰️", "B": "🅱️", "C": "🅲", "D": "🅳", "E": "🅴", "F": "🅵", "G": "🅶"}.get(
-                    cluster, "🎯"
-                )
-                cluster_info += f"🎯 Кластер: {cluster_emoji} {cluster}\n"
+        if action == "catmenu" or action == "clmenu":
+            if action == "catmenu":
+                buttons = [
+                    InlineKeyboardButton(text=f"{CATEGORY_EMOJI[c]} {c}", callback_data=f"plist_cat_{i}")
+                    for i, c in enumerate(PARTICIPANT_CATEGORIES)
+                ]
+                title = "📂 <b>Фильтр по категории</b>"
+            else:
+                buttons = [
+                    InlineKeyboardButton(text=f"{CLUSTER_EMOJI[c]} {c}", callback_data=f"plist_cl_{c}")
+                    for c in PARTICIPANT_CLUSTERS
+                ]
+                title = "🎯 <b>Фильтр по кластеру</b>"
+            rows = [buttons[i:i + 3] for i in range(0, len(buttons), 3)]
+            rows.append([
+                InlineKeyboardButton(text="Любой", callback_data="plist_cat_any" if action == "catmenu" else "plist_cl_any"),
+                InlineKeyboardButton(text="⬅️ К списку", callback_data="plist_page"),
+            ])
+            await callback_query.message.edit_text(title, reply_markup=InlineKeyboardMarkup(inline_keyboard=rows))
+            await callback_query.answer()
+            return
 
-            participant_line = (
-                f"<b>{name}</b>\n"
-                f"🆔 ID: <code>{user_id_p}</code>\n"
-                f"📱 TG: {username_info}\n"
-                f"⏰ Время: {time_info}\n"
-                f"💰 Оплата: {payment_info}\n"
-                f"🏷 Номер: {bib_info}\n"
-                f"{category_info}"
-                f"{cluster_info}"
-                f"/paid_{user_id_p}\n"
+        if action == "search":
+            await state.set_state(RegistrationForm.waiting_for_participant_search)
+            await callback_query.message.answer(
+                "🔍 Введите часть имени или username участника:",
+                reply_markup=create_back_keyboard("plist_page"),
             )
+            await callback_query.answer()
+            return
 
-            runners.append(participant_line)
-
-        # Add runners section
-        if runners:
-            text += f"🏃 <b>Бегуны ({len(runners)}):</b>\n\n"
-            for i, runner in enumerate(runners, 1):
-                text += f"{i}. {runner}\n"
-
-        # Split long messages
-        if len(text) > 4000:
-            chunks = []
-            if runners:
-                chunk1 = f"👥 <b>Список участников</b>\n\n🏃 <b>Бегуны ({len(runners)}):</b>\n\n"
-                for i, runner in enumerate(runners, 1):
-                    if len(chunk1 + f"{i}. {runner}\n") > 4000:
-                        chunks.append(chunk1.rstrip())
-                        chunk1 = f"🏃 <b>Бегуны (продолжение):</b>\n\n{i}. {runner}\n"
-                    else:
-                        chunk1 += f"{i}. {runner}\n"
-                chunks.append(chunk1.rstrip())
-
-            for chunk in chunks:
-                await message.answer(chunk)
-        else:
-            await message.answer(text)
+        if action.startswith("pay_"):
+            value = action[len("pay_"):]
+            filters.pop("payment", None)
+            if value in ("paid", "unpaid"):
+                filters["payment"] = value
+        elif action.startswith("cat_"):
+            value = action[len("cat_"):]
+            filters.pop("category", None)
+            if value.isdigit() and int(value) < len(PARTICIPANT_CATEGORIES):
+                filters["category"] = PARTICIPANT_CATEGORIES[int(value)]
+        elif action.startswith("cl_"):
+            value = action[len("cl_"):]
+            filters.pop("cluster", None)
+            if value in PARTICIPANT_CLUSTERS:
+                filters["cluster"] = value
+        elif action == "reset":
+            filters = {}
+
+        await state.set_state(None)
+        await state.update_data(participants_filters=filters)
+        await send_participants_page(callback_query.message, state, edit=True)
+        await callback_query.answer()
 
-        if isinstance(event, CallbackQuery):
-            await event.answer()
+    @dp.message(RegistrationForm.waiting_for_participant_search)
+    async def process_participant_search(message: Message, state: FSMContext):
+        if message.from_user.id != admin_id:
+            await state.clear()
+            return
 
-    @dp.message(Command("participants", "список", "участники"))
-    async def cmd_show_participants(message: Message):
-        await show_participants(message)
+        query = sanitize_input(message.text or "", 50)
+        if not query:
+            await message.answer("❌ Введите текст для поиска:")
+            return
 
-    @dp.callback_query(F.data == "admin_participants")
-    async def callback_show_participants(callback_query: CallbackQuery):
-        await show_participants(callback_query)
+        data = await state.get_data()
+        filters = dict(data.get("participants_filters", {}))
+        filters["name"] = query
+        await state.set_state(None)
+        await state.update_data(participants_filters=filters)
+        await send_participants_page(message, state)
 
     async def show_pending_registrations(event: [Message, CallbackQuery]):
         user_id = event.from_user.id
@@ -495,37 +639,16 @@ def register_admin_participant_handlers(dp: Dispatcher, bot: Bot, admin_id: int)
             message = event
 
         try:
-            with sqlite3.connect("/app/data/race_participants.db", timeout=10) as conn:
-                cursor = conn.cursor()
+            stats = get_event_stats()
+            if not stats:
+                raise sqlite3.Error("get_event_stats returned no data")
 
-                # Get counts
-                cursor.execute(
-                    "SELECT COUNT(*) FROM participants WHERE payment_status = 'paid'"
-                )
-                paid_count = cursor.fetchone()[0]
-                cursor.execute(
-                    "SELECT COUNT(*) FROM participants WHERE role = 'runner'"
-                )
-                runner_count = cursor.fetchone()[0]
-                cursor.execute("SELECT COUNT(*) FROM pending_registrations")
-                pending_reg_count = cursor.fetchone()[0]
-
-                # Get settings
-                cursor.execute("SELECT value FROM settings WHERE key = 'max_runners'")
-                max_runners_result = cursor.fetchone()
-                max_runners = int(max_runners_result[0]) if max_runners_result else 0
-
-                cursor.execute("SELECT value FROM settings WHERE key = 'reg_end_date'")
-                reg_end_date_result = cursor.fetchone()
-                reg_end_date = (
-                    reg_end_date_result[0] if reg_end_date_result else "не установлена"
-                )
-
-                # Get waitlist count
-                from database import get_waitlist_by_role
-
-                waitlist_data = get_waitlist_by_role()
-                waitlist_count = len(waitlist_data)
+            paid_count = stats["paid"]
+            runner_count = stats["runners"]
+            pending_reg_count = stats["pending_registrations"]
+            max_runners = stats["max_runners"]
+            reg_end_date = stats["reg_end_date"] or "не установлена"
+            waitlist_count = stats["waitlist"]
 
             # Build beautiful statistics message
             text = "📊 <b>Статистика регистрации</b>\n\n"
@@ -559,20 +682,10 @@ def register_admin_participant_handlers(dp: Dispatcher, bot: Bot, admin_id: int)
             status_text = ""
             
             # Check if registration period has ended
-            registration_closed_by_date = False
-            if reg_end_date != "не установлена":
-                try:
-                    from datetime import datetime
-                    from pytz import timezone
-                    
-                    end_date = datetime.strptime(reg_end_date, "%H:%M %d.%m.%Y")
-                    moscow_tz = timezone("Europe/Moscow")
-                    end_date = moscow_tz.localize(end_date)
-                    current_time = datetime.now(moscow_tz)
-                    registration_closed_by_date = current_time > end_date
-                except Exception as e:
-                    logger.warning(f"Ошибка при проверке даты окончания регистрации: {e}")
-            
+            registration_closed_by_date = (
+                stats["reg_end_date"] is not None and not is_current_event_active()
+            )
+
             # Determine status based on date and limits
             if registration_closed_by_date:
                 status_emoji = "🔴"
@@ -2467,6 +2580,77 @@ def register_admin_participant_handlers(dp: Dispatcher, bot: Bot, admin_id: int)
     async def callback_record_results(callback: CallbackQuery, state: FSMContext):
         await record_results(callback, state)
 
+    @dp.callback_query(F.data == "admin_import_results")
+    async def start_results_import(callback_query: CallbackQuery, state: FSMContext):
+        """Start results CSV import"""
+        if callback_query.from_user.id != admin_id:
+            await callback_query.answer("❌ Доступ запрещен")
+            return
+
+        await callback_query.message.delete()
+        await callback_query.answer()
+
+        text = "📥 <b>Импорт результатов из CSV</b>\n\n"
+        text += "Отправьте файл .csv из системы хронометража:\n"
+        text += "• <b>Столбец 1:</b> беговой номер (или user_id)\n"
+        text += "• <b>Столбец 2:</b> результат в формате ММ:СС,МС\n\n"
+        text += "ℹ️ Если в первой строке есть заголовки (bib/номер, user_id, result/время), "
+        text += "столбцы определяются по ним. Все строки проверяются до записи, "
+        text += "результаты сохраняются одной операцией."
+
+        await callback_query.message.answer(
+            text, reply_markup=create_back_keyboard("category_participants")
+        )
+        await state.set_state(RegistrationForm.waiting_for_results_file)
+
+    @dp.message(RegistrationForm.waiting_for_results_file)
+    async def process_results_file(message: Message, state: FSMContext):
+        """Validate uploaded results CSV and write all valid rows at once"""
+        if message.from_user.id != admin_id:
+            return
+
+        if not message.document or not message.document.file_name.lower().endswith(".csv"):
+            await message.answer("❌ Пожалуйста, отправьте файл в формате .csv")
+            return
+
+        try:
+            file = await bot.get_file(message.document.file_id)
+            file_bytes = await bot.download_file(file.file_path)
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке файла результатов: {e}")
+            await message.answer("❌ Не удалось загрузить файл. Попробуйте ещё раз.")
+            return
+
+        content = decode_csv(file_bytes.read())
+        if content is None:
+            await message.answer("❌ Не удалось прочитать файл. Проверьте кодировку.")
+            return
+
+        rows, key_type = parse_results_csv(content, KEY_BIB)
+        if not rows:
+            await message.answer("❌ В файле нет строк с результатами.")
+            return
+
+        plan = plan_results_import(rows, get_all_participants(), key_type)
+        updated = bulk_set_results(plan["updates"])
+        await state.clear()
+
+        if updated < 0:
+            await message.answer(
+                "❌ <b>Ошибка при сохранении результатов</b>\n\nНи один результат не записан.",
+                reply_markup=create_back_keyboard("category_participants"),
+            )
+            return
+
+        logger.info(
+            f"Импорт результатов: строк={len(rows)}, записано={updated}, "
+            f"ошибок формата={len(plan['invalid'])}, не найдено={len(plan['unknown'])}"
+        )
+        report = format_import_report(plan, updated)
+        if len(report) > 4000:
+            report = report[:4000].rsplit("\n", 1)[0] + "\n…"
+        await message.answer(report, reply_markup=create_back_keyboard("category_participants"))
+
     async def save_race(event: [Message, CallbackQuery], state: FSMContext):
         user_id = event.from_user.id
         if user_id != admin_id:
@@ -2782,10 +2966,12 @@ def register_admin_participant_handlers(dp: Dispatcher, bot: Bot, admin_id: int)
             await show_category_protocol(callback_query)
         await callback_query.answer()
 
-    async def show_full_protocol(event: [Message, CallbackQuery]):
-        """Show full protocol of current event (from participants table)"""
+    @memoize_by_table_versions("participants", "teams")
+    def build_full_protocol_text():
+        """Build full protocol text of current event, None on database error"""
         try:
-            with sqlite3.connect("/app/data/race_participants.db", timeout=10) as conn:
+            # Тот же файл, по версиям таблиц которого проверяется кеш
+            with sqlite3.connect(DB_PATH, timeout=10) as conn:
                 cursor = conn.cursor()
                 # Get all runners from current participants table with all info
                 cursor.execute(
@@ -2803,14 +2989,10 @@ def register_admin_participant_handlers(dp: Dispatcher, bot: Bot, admin_id: int)
 
         except sqlite3.Error as e:
             logger.error(f"Ошибка при получении данных протокола: {e}")
-            await event.message.answer("❌ Ошибка при получении данных протокола.")
-            return
+            return None
 
         if not runners:
-            await event.message.answer(
-                "🏆 <b>Протокол актуальной гонки</b>\n\n📋 Пока нет участников с результатами."
-            )
-            return
+            return "🏆 <b>Протокол актуальной гонки</b>\n\n📋 Пока нет участников с результатами."
 
         def time_to_seconds(time_str):
             """Convert time string to seconds for sorting"""
@@ -2988,6 +3170,15 @@ def register_admin_participant_handlers(dp: Dispatcher, bot: Bot, admin_id: int)
             text += f"• Команд всего: {len(teams)}\n"
             text += f"• Команд финишировало: {teams_finished}\n"
 
+        return text
+
+    async def show_full_protocol(event: [Message, CallbackQuery]):
+        """Show full protocol of current event (from participants table)"""
+        text = build_full_protocol_text()
+        if text is None:
+            await event.message.answer("❌ Ошибка при получении данных протокола.")
+            return
+
         # Split long messages
         if len(text) > 4000:
             chunks = []
@@ -3018,7 +3209,7 @@ def register_admin_participant_handlers(dp: Dispatcher, bot: Bot, admin_id: int)
         await callback_query.message.delete()
 
         try:
-            with sqlite3.connect("/app/data/race_participants.db", timeout=10) as conn:
+            with sqlite3.connect(DB_PATH, timeout=10) as conn:
                 cursor = conn.cursor()
                 # Get all runners of specific gender from current participants table
                 cursor.execute(
@@ -3393,6 +3584,7 @@ def register_admin_participant_handlers(dp: Dispatcher, bot: Bot, admin_id: int)
         participants = get_all_participants()
         success_count = 0
         blocked_count = 0
+        blocked = BlockedUsersBatch(source="custom_notification")
 
         for participant in participants:
             user_id_p = participant[0]
@@ -3412,10 +3604,9 @@ def register_admin_participant_handlers(dp: Dispatcher, bot: Bot, admin_id: int)
                 logger.warning(f"Участник {name} (ID: {user_id_p}) заблокировал бота")
                 blocked_count += 1
 
-                # Optionally remove blocked users
+                # Blocked users are removed in one batch after the loop
                 try:
-                    cleanup_blocked_user(user_id_p)
-                    logger.info(f"Участник {name} (ID: {user_id_p}) удален из БД")
+                    blocked.add(user_id_p)
 
                     # Notify admin about blocked user
                     await bot.send_message(
@@ -3437,6 +3628,8 @@ def register_admin_participant_handlers(dp: Dispatcher, bot: Bot, admin_id: int)
                 )
                 blocked_count += 1
 
+        blocked.flush()
+
         # Send summary
         result_text = f"✅ <b>Рассылка завершена</b>\n\n"
         result_text += f"📊 <b>Статистика:</b>\n"
@@ -3706,6 +3899,124 @@ def register_admin_participant_handlers(dp: Dispatcher, bot: Bot, admin_id: int)
             "💡 Вы можете отправить уведомления позже через кнопку 'Уведомить о номерах' в меню участников."
         )
 
+    def create_auto_bib_settings_keyboard(settings: dict) -> InlineKeyboardMarkup:
+        mark = mark_selected
+        return InlineKeyboardMarkup(
+            inline_keyboard=[
+                [
+                    InlineKeyboardButton(
+                        text=mark(settings["order"] == ORDER_CLUSTER, "🎯 По кластерам"),
+                        callback_data=f"autobib_order_{ORDER_CLUSTER}",
+                    ),
+                    InlineKeyboardButton(
+                        text=mark(settings["order"] == ORDER_CATEGORY, "📂 По категориям"),
+                        callback_data=f"autobib_order_{ORDER_CATEGORY}",
+                    ),
+                    InlineKeyboardButton(
+                        text=mark(settings["order"] == ORDER_TIME, "⏱️ По времени"),
+                        callback_data=f"autobib_order_{ORDER_TIME}",
+                    ),
+                ],
+                [
+                    InlineKeyboardButton(
+                        text=mark(not settings["overwrite"], "Только без номеров"),
+                        callback_data="autobib_overwrite_0",
+                    ),
+                    InlineKeyboardButton(
+                        text=mark(settings["overwrite"], "Перенумеровать всех"),
+                        callback_data="autobib_overwrite_1",
+                    ),
+                ],
+                [InlineKeyboardButton(text="👁 Предпросмотр", callback_data="autobib_preview")],
+                [InlineKeyboardButton(text="⬅️ Назад", callback_data="category_participants")],
+            ]
+        )
+
+    def get_reserved_bib_numbers() -> set:
+        """Reserved numbers from config ranges and marked bib_numbers_info rows"""
+        reserved = parse_bib_ranges(config.get("bib_allocation", {}).get("reserved_ranges", []))
+        return reserved | reserved_from_bib_info(get_all_bib_numbers_info())
+
+    def auto_bib_settings_view(settings: dict):
+        bib_config = config.get("bib_allocation", {})
+        reserved = get_reserved_bib_numbers()
+        text = "🔢 <b>Автоприсвоение беговых номеров</b>\n\n"
+        text += "Номера выдаются подряд всем бегунам за один проход в выбранном порядке.\n\n"
+        text += f"▶️ Первый номер: <b>{bib_config.get('start', 1)}</b>\n"
+        text += f"🔒 Зарезервировано номеров: {len(reserved)}\n\n"
+        text += "Выберите параметры и нажмите «Предпросмотр». Ничего не будет сохранено до подтверждения.\n"
+        text += "💡 Для ручной правки отдельных номеров используйте «Присвоить номер»."
+        return text, create_auto_bib_settings_keyboard(settings)
+
+    def update_auto_bib_settings(settings: dict, action: str):
+        if action.startswith("order_") and action[6:] in (ORDER_CLUSTER, ORDER_CATEGORY, ORDER_TIME):
+            settings["order"] = action[6:]
+        elif action in ("overwrite_0", "overwrite_1"):
+            settings["overwrite"] = action == "overwrite_1"
+
+    def preview_auto_bibs(settings: dict):
+        bib_config = config.get("bib_allocation", {})
+        plan = build_bib_plan(
+            get_all_participants(),
+            order_by=settings["order"],
+            start=int(bib_config.get("start", 1)),
+            reserved=get_reserved_bib_numbers(),
+            overwrite=settings["overwrite"],
+            pad_width=int(bib_config.get("pad_width", 0)),
+        )
+        if not plan["assignments"]:
+            return None, "❌ Нет бегунов без номеров"
+        return plan["assignments"], format_bib_plan_preview(plan, settings["order"])
+
+    async def apply_auto_bibs(assignments: dict, callback_query: CallbackQuery):
+        updated = bulk_set_bib_numbers(assignments)
+        if updated < 0:
+            await callback_query.message.edit_text(
+                "❌ <b>Номера не сохранены</b>\n\n"
+                "Обнаружен дубликат номера или ошибка базы данных. Ни один номер не изменён, "
+                "повторите предпросмотр.",
+                reply_markup=create_participants_category_keyboard(),
+            )
+        else:
+            logger.info(f"Автоприсвоение номеров применено для {updated} участников")
+            await callback_query.message.edit_text(
+                f"✅ <b>Номера присвоены: {updated} участникам</b>\n\n"
+                f"📢 <b>Уведомить участников о присвоенных номерах?</b>",
+                reply_markup=create_bib_notification_confirmation_keyboard(),
+            )
+
+    @dp.callback_query(F.data == "admin_auto_bibs")
+    async def start_auto_bib_assignment(callback_query: CallbackQuery, state: FSMContext):
+        """Show bulk bib allocation settings"""
+        if callback_query.from_user.id != admin_id:
+            await callback_query.answer("❌ Доступ запрещен")
+            return
+
+        await start_plan_flow(
+            callback_query, state, {"order": ORDER_CLUSTER, "overwrite": False},
+            "auto_bib_settings", "auto_bib_assignments", auto_bib_settings_view,
+        )
+
+    @dp.callback_query(F.data.startswith("autobib_"))
+    async def handle_auto_bib_assignment(callback_query: CallbackQuery, state: FSMContext):
+        """Handle bulk bib allocation settings, preview and apply"""
+        if callback_query.from_user.id != admin_id:
+            await callback_query.answer("❌ Доступ запрещен")
+            return
+
+        await handle_plan_flow(
+            callback_query,
+            state,
+            prefix="autobib",
+            settings_key="auto_bib_settings",
+            plan_key="auto_bib_assignments",
+            stale_text="Сессия устарела, откройте автоприсвоение заново",
+            render_settings=auto_bib_settings_view,
+            update_settings=update_auto_bib_settings,
+            build_preview=preview_auto_bibs,
+            apply=apply_auto_bibs,
+        )
+
     @dp.callback_query(F.data == "admin_notify_bibs")
     async def manual_bib_notification(callback_query: CallbackQuery):
         """Manually trigger bib number notifications"""
@@ -4297,7 +4608,6 @@ def register_admin_participant_handlers(dp: Dispatcher, bot: Bot, admin_id: int)
 
             elif filename.endswith('.csv'):
                 # Parse CSV file
-                import csv
                 from io import StringIO
 
                 # Try different encodings
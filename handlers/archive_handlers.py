@@ -18,7 +18,8 @@ from .utils import messages, RegistrationForm
 from database import (
     archive_race_data,
     get_user_race_history,
-    get_latest_user_result,
+    get_user_race_summary,
+    is_historical_participant,
     list_race_archives,
     is_current_event_active,
     get_participant_count_by_role,
@@ -253,15 +254,12 @@ def create_historical_participant_keyboard():
 
 async def handle_historical_participant(user_id: int, message: Message):
     """Handle start command for users with historical participation"""
-    # Check if user is historical participant (exists in any archived race table)
-    from database import get_historical_participants
-    historical_user_ids = get_historical_participants()
-    
-    if user_id not in historical_user_ids:
+    # Check if user is historical participant (in-memory set built from user_race_summary)
+    if not is_historical_participant(user_id):
         return False  # Not a historical participant, proceed with normal flow
     
-    # Get latest race data for this user
-    latest_result = get_latest_user_result(user_id)
+    # Get latest race data for this user (one indexed lookup)
+    latest_result = get_user_race_summary(user_id)
     
     if not latest_result:
         return False  # No data found, proceed with normal flow
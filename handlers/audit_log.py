@@ -0,0 +1,54 @@
+"""
+Background writer for the audit events table.
+
+database.record_event() only appends to an in-memory buffer; this task
+flushes the buffer in batches from a worker thread, so handlers never wait
+for the events INSERT.
+"""
+
+import asyncio
+from typing import Optional
+
+from database import flush_events, pending_events_count
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 2.0
+
+audit_writer_task: Optional[asyncio.Task] = None
+
+
+async def audit_writer(interval: float):
+    """Flush buffered events every `interval` seconds; an error never stops the loop"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if pending_events_count():
+                await loop.run_in_executor(None, flush_events)
+        except Exception:
+            logger.exception("Ошибка при записи журнала событий, повтор на следующем шаге")
+
+
+async def start_audit_writer(settings: Optional[dict] = None):
+    """Start the audit writer on bot startup"""
+    global audit_writer_task
+    settings = settings or {}
+    interval = float(settings.get("flush_interval_seconds", DEFAULT_FLUSH_INTERVAL))
+    if audit_writer_task is None or audit_writer_task.done():
+        audit_writer_task = asyncio.create_task(audit_writer(interval))
+        logger.info(f"Запись журнала событий запущена, интервал {interval} с")
+
+
+async def stop_audit_writer():
+    """Stop the writer and flush what is left in the buffer"""
+    global audit_writer_task
+    if audit_writer_task and not audit_writer_task.done():
+        audit_writer_task.cancel()
+        try:
+            await audit_writer_task
+        except asyncio.CancelledError:
+            pass
+    written = flush_events()
+    logger.info(f"Журнал событий остановлен, дописано событий: {max(written, 0)}")
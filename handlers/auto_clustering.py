@@ -0,0 +1,197 @@
+"""
+Automatic start cluster (wave) assignment based on runners' target time.
+
+Pure planning logic: build_cluster_plan() takes participant rows and returns
+a plan that can be previewed and then written with one bulk update.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from .validation import time_to_seconds
+
+CLUSTER_LETTERS = ["A", "B", "C", "D", "E", "F", "G"]
+
+MODE_BALANCED = "balanced"
+MODE_QUANTILE = "quantile"
+
+GROUP_NONE = "none"
+GROUP_GENDER = "gender"
+GROUP_CATEGORY = "category"
+
+# Позиции gender и category в строках get_participants_by_role()
+GROUP_KEY_INDEX = {GROUP_GENDER: 5, GROUP_CATEGORY: 6}
+
+
+def _split_balanced(runners: List[tuple], parts: int) -> List[List[tuple]]:
+    """Split sorted runners into parts of near-equal size (faster waves first)"""
+    size, extra = divmod(len(runners), parts)
+    chunks, start = [], 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        chunks.append(runners[start:end])
+        start = end
+    return chunks
+
+
+def _split_quantile(runners: List[tuple], times: Dict[int, float], parts: int) -> List[List[tuple]]:
+    """Split sorted runners at target-time quantiles, never separating equal times"""
+    chunks: List[List[tuple]] = [[] for _ in range(parts)]
+    total = len(runners)
+    if not total:
+        return chunks
+
+    chunk = 0
+    for i, runner in enumerate(runners):
+        # Переходим к следующей волне на границе квантиля, но не внутри группы одинаковых времен
+        boundary = (chunk + 1) * total / parts
+        if (
+            chunk < parts - 1
+            and i >= boundary
+            and times[runner[0]] != times[runners[i - 1][0]]
+        ):
+            chunk += 1
+        chunks[chunk].append(runner)
+    return chunks
+
+
+def _apply_capacities(
+    chunks: List[List[tuple]], letters: List[str], capacities: Dict[str, int]
+) -> Tuple[Dict[str, List[tuple]], List[tuple]]:
+    """Move overflow of full clusters into the next (slower) cluster"""
+    clusters: Dict[str, List[tuple]] = {}
+    carry: List[tuple] = []
+    for letter, chunk in zip(letters, chunks):
+        pool = carry + chunk
+        limit = capacities.get(letter) or 0
+        if limit and len(pool) > limit:
+            clusters[letter], carry = pool[:limit], pool[limit:]
+        else:
+            clusters[letter], carry = pool, []
+    return clusters, carry
+
+
+def _allocate_letters(groups: Dict[str, List[tuple]], letters: List[str]) -> Dict[str, List[str]]:
+    """Distribute cluster letters between groups proportionally to their size"""
+    keys = list(groups)
+    shares = {k: 1 for k in keys}
+    for _ in range(len(letters) - len(keys)):
+        # Следующая буква — группе с наибольшим числом бегунов на одну волну
+        key = max(keys, key=lambda k: len(groups[k]) / shares[k])
+        shares[key] += 1
+
+    allocation, start = {}, 0
+    for key in keys:
+        allocation[key] = letters[start:start + shares[key]]
+        start += shares[key]
+    return allocation
+
+
+def build_cluster_plan(
+    participants: List[tuple],
+    cluster_count: int,
+    mode: str = MODE_BALANCED,
+    group_by: str = GROUP_NONE,
+    capacities: Optional[Dict[str, int]] = None,
+) -> dict:
+    """
+    Plan cluster assignment for runners sorted by target time.
+
+    Args:
+        participants: rows from get_participants_by_role("runner")
+        cluster_count: number of waves (1-7), letters A.. are used in order
+        mode: "balanced" (equal sizes) or "quantile" (time quantiles, ties kept together)
+        group_by: "none", "gender" or "category" - waves never mix groups
+        capacities: optional max runners per cluster letter
+
+    Returns:
+        dict with "assignments" {user_id: letter}, "clusters" {letter: [rows]},
+        "unassigned" (over capacity), "no_time" (unparseable target time) and "error"
+    """
+    plan = {"assignments": {}, "clusters": {}, "unassigned": [], "no_time": [], "error": None}
+    cluster_count = max(1, min(cluster_count, len(CLUSTER_LETTERS)))
+    letters = CLUSTER_LETTERS[:cluster_count]
+    capacities = capacities or {}
+
+    times: Dict[int, float] = {}
+    timed: List[tuple] = []
+    for participant in participants:
+        seconds = time_to_seconds(participant[3] or "")
+        if seconds is None:
+            plan["no_time"].append(participant)
+        else:
+            times[participant[0]] = seconds
+            timed.append(participant)
+    timed.sort(key=lambda p: (times[p[0]], p[2] or ""))
+    # Бегуны без целевого времени идут в самую медленную волну
+    runners = timed + plan["no_time"]
+    for participant in plan["no_time"]:
+        times[participant[0]] = float("inf")
+
+    if group_by in GROUP_KEY_INDEX:
+        index = GROUP_KEY_INDEX[group_by]
+        groups: Dict[str, List[tuple]] = {}
+        for runner in runners:
+            groups.setdefault(runner[index] or "—", []).append(runner)
+        if len(groups) > cluster_count:
+            plan["error"] = (
+                f"Групп ({len(groups)}) больше, чем кластеров ({cluster_count}). "
+                f"Увеличьте число кластеров или отключите ограничение."
+            )
+            return plan
+        # Группа с самым быстрым бегуном получает первые буквы
+        groups = dict(sorted(groups.items(), key=lambda item: times[item[1][0][0]]))
+        allocation = _allocate_letters(groups, letters)
+    else:
+        groups = {"all": runners}
+        allocation = {"all": letters}
+
+    for key, group in groups.items():
+        group_letters = allocation[key]
+        if mode == MODE_QUANTILE:
+            chunks = _split_quantile(group, times, len(group_letters))
+        else:
+            chunks = _split_balanced(group, len(group_letters))
+        clusters, overflow = _apply_capacities(chunks, group_letters, capacities)
+        plan["clusters"].update(clusters)
+        plan["unassigned"].extend(overflow)
+
+    plan["clusters"] = {letter: plan["clusters"].get(letter, []) for letter in letters}
+    for letter, members in plan["clusters"].items():
+        for member in members:
+            plan["assignments"][member[0]] = letter
+    return plan
+
+
+def format_cluster_plan_preview(plan: dict, mode: str, group_by: str) -> str:
+    """Build a compact preview message for the admin"""
+    mode_text = "равные по размеру" if mode == MODE_BALANCED else "по квантилям времени"
+    group_text = {
+        GROUP_NONE: "без ограничений",
+        GROUP_GENDER: "раздельно по полу",
+        GROUP_CATEGORY: "раздельно по категориям",
+    }.get(group_by, group_by)
+
+    lines = [
+        "🤖 <b>Предпросмотр автораспределения</b>",
+        f"⚙️ Режим: {mode_text}, {group_text}",
+        "",
+    ]
+    for letter, members in plan["clusters"].items():
+        if not members:
+            lines.append(f"🎯 <b>{letter}</b>: —")
+            continue
+        first_time = members[0][3] or "—"
+        last_time = members[-1][3] or "—"
+        lines.append(f"🎯 <b>{letter}</b>: {len(members)} чел., {first_time} – {last_time}")
+
+    if plan["no_time"]:
+        lines.append(f"\n⚠️ Без корректного целевого времени: {len(plan['no_time'])} (в последней волне)")
+    if plan["unassigned"]:
+        names = ", ".join(p[2] for p in plan["unassigned"][:10])
+        more = "…" if len(plan["unassigned"]) > 10 else ""
+        lines.append(
+            f"\n❗ Не поместились из-за лимита кластеров, кластер будет снят: "
+            f"{len(plan['unassigned'])} ({names}{more})"
+        )
+    lines.append(f"\n✅ Будет назначено: {len(plan['assignments'])}")
+    return "\n".join(lines)
@@ -9,8 +9,9 @@ import pytz
 import zipfile
 import asyncio
 
+from app_config import reload_config
 from .utils import RegistrationForm, config
-from database import DB_PATH
+from database import DB_PATH, init_db, restore_database, snapshot_database
 from logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -379,9 +380,14 @@ async def create_backup():
         backup_path = os.path.join(backup_dir, backup_filename)
 
         with zipfile.ZipFile(backup_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-            # Add database file
+            # Add database file: в режиме WAL часть данных еще в -wal, поэтому
+            # в архив идет согласованный снимок, а не сам файл базы
             if os.path.exists(DB_PATH):
-                zipf.write(DB_PATH, "race_participants.db")
+                snapshot_path = snapshot_database(os.path.join(backup_dir, f".snapshot_{timestamp}.db"))
+                try:
+                    zipf.write(snapshot_path, "race_participants.db")
+                finally:
+                    os.remove(snapshot_path)
                 logger.info("База данных добавлена в бекап")
 
             # Add configuration files
@@ -601,12 +607,13 @@ async def restore_from_backup(backup_file_path: str) -> bool:
             # Create backup of current database before restore
             if os.path.exists(DB_PATH):
                 current_db_backup = f"{DB_PATH}.backup_before_restore"
-                shutil.copy2(DB_PATH, current_db_backup)
+                snapshot_database(current_db_backup)
                 logger.info(f"Текущая база данных сохранена в: {current_db_backup}")
 
             # Restore database
-            shutil.copy2(db_backup_path, DB_PATH)
-            logger.info("База данных восстановлена")
+            restore_database(db_backup_path)
+            # В старой копии может не быть новых таблиц, индексов и триггеров
+            init_db()
         else:
             logger.warning("База данных не найдена в резервной копии")
 
@@ -625,6 +632,8 @@ async def restore_from_backup(backup_file_path: str) -> bool:
                 # Restore config
                 shutil.copy2(config_backup_path, config_file)
                 logger.info(f"Восстановлен файл конфигурации: {config_file}")
+                if config_file == "config.json":
+                    reload_config()
             else:
                 logger.warning(
                     f"Файл конфигурации {config_file} не найден в резервной копии"
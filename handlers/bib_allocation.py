@@ -0,0 +1,154 @@
+"""
+Bulk bib number allocation.
+
+Pure planning logic: build_bib_plan() orders runners and hands out free
+numbers in one pass; the result is written with bulk_set_bib_numbers().
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from database import (
+    PARTICIPANT_BIB,
+    PARTICIPANT_CATEGORY,
+    PARTICIPANT_CLUSTER,
+    PARTICIPANT_NAME,
+    PARTICIPANT_ROLE,
+    PARTICIPANT_TARGET_TIME,
+    PARTICIPANT_USER_ID,
+)
+from .validation import time_to_seconds
+
+ORDER_CLUSTER = "cluster"
+ORDER_CATEGORY = "category"
+ORDER_TIME = "time"
+
+CATEGORY_ORDER = ["СуперЭлита", "Элита", "Классика", "Женский", "Команда"]
+
+# Номера из bib_numbers_info с таким описанием не выдаются автоматически
+RESERVED_MARKERS = ("резерв", "reserved", "исключ", "excluded")
+
+
+def _bib_value(bib) -> Optional[int]:
+    """Numeric value of a stored bib ("007" -> 7), None if it is not a number"""
+    text = str(bib).strip() if bib is not None else ""
+    return int(text) if text.isdigit() else None
+
+
+def parse_bib_ranges(values: Iterable) -> Set[int]:
+    """Parse ["13", "1-10", 42] into a set of numbers, ignoring malformed items"""
+    numbers: Set[int] = set()
+    for value in values or []:
+        text = str(value).strip()
+        if "-" in text:
+            low, _, high = text.partition("-")
+            if low.strip().isdigit() and high.strip().isdigit():
+                low_value, high_value = int(low), int(high)
+                numbers.update(range(min(low_value, high_value), max(low_value, high_value) + 1))
+        elif text.isdigit():
+            numbers.add(int(text))
+    return numbers
+
+
+def reserved_from_bib_info(rows: List[Tuple[str, str]]) -> Set[int]:
+    """Numbers marked as reserved/excluded in bib_numbers_info descriptions"""
+    reserved = set()
+    for bib_number, description in rows:
+        value = _bib_value(bib_number)
+        if value is not None and (description or "").strip().lower().startswith(RESERVED_MARKERS):
+            reserved.add(value)
+    return reserved
+
+
+def _sort_key(order_by: str):
+    def key(participant: tuple):
+        seconds = time_to_seconds(participant[PARTICIPANT_TARGET_TIME] or "")
+        time_key = seconds if seconds is not None else float("inf")
+        if order_by == ORDER_CLUSTER:
+            # Участники без кластера получают номера после всех волн
+            return (participant[PARTICIPANT_CLUSTER] or "~", time_key, participant[PARTICIPANT_NAME] or "")
+        if order_by == ORDER_CATEGORY:
+            category = participant[PARTICIPANT_CATEGORY]
+            rank = CATEGORY_ORDER.index(category) if category in CATEGORY_ORDER else len(CATEGORY_ORDER)
+            return (rank, time_key, participant[PARTICIPANT_NAME] or "")
+        return (time_key, participant[PARTICIPANT_NAME] or "")
+
+    return key
+
+
+def build_bib_plan(
+    participants: List[tuple],
+    order_by: str = ORDER_TIME,
+    start: int = 1,
+    reserved: Optional[Set[int]] = None,
+    overwrite: bool = False,
+    pad_width: int = 0,
+) -> dict:
+    """
+    Plan bib numbers for runners in one pass.
+
+    Args:
+        participants: rows from get_all_participants()
+        order_by: "cluster", "category" or "time" (target time)
+        start: first number to hand out
+        reserved: numbers never assigned automatically
+        overwrite: renumber runners who already have a bib
+        pad_width: zero-pad numbers to this width ("007")
+
+    Returns:
+        dict with "assignments" {user_id: bib}, "ordered" [(row, bib)],
+        "kept" (runners keeping their bib) and "reserved" (skipped numbers count)
+    """
+    reserved = reserved or set()
+    runners = [p for p in participants if p[PARTICIPANT_ROLE] == "runner"]
+    targets = runners if overwrite else [p for p in runners if not p[PARTICIPANT_BIB]]
+    target_ids = {p[PARTICIPANT_USER_ID] for p in targets}
+
+    # Номера, которые остаются за другими участниками, не выдаются повторно
+    used = {
+        _bib_value(p[PARTICIPANT_BIB])
+        for p in participants
+        if p[PARTICIPANT_BIB] and p[PARTICIPANT_USER_ID] not in target_ids
+    }
+    used.discard(None)
+
+    plan = {"assignments": {}, "ordered": [], "kept": len(runners) - len(targets), "reserved": 0}
+    number = max(start, 1)
+    for participant in sorted(targets, key=_sort_key(order_by)):
+        while number in used or number in reserved:
+            if number in reserved:
+                plan["reserved"] += 1
+            number += 1
+        bib = str(number).zfill(pad_width)
+        plan["assignments"][participant[PARTICIPANT_USER_ID]] = bib
+        plan["ordered"].append((participant, bib))
+        number += 1
+    return plan
+
+
+def format_bib_plan_preview(plan: dict, order_by: str) -> str:
+    """Build a compact preview message for the admin"""
+    order_text = {
+        ORDER_CLUSTER: "по кластерам",
+        ORDER_CATEGORY: "по категориям",
+        ORDER_TIME: "по целевому времени",
+    }.get(order_by, order_by)
+
+    lines = ["🔢 <b>Предпросмотр присвоения номеров</b>", f"⚙️ Порядок: {order_text}", ""]
+    ordered = plan["ordered"]
+    for participant, bib in ordered[:15]:
+        details = " ".join(filter(None, [
+            participant[PARTICIPANT_CLUSTER],
+            participant[PARTICIPANT_CATEGORY],
+            participant[PARTICIPANT_TARGET_TIME],
+        ]))
+        lines.append(f"<b>{bib}</b> — {participant[PARTICIPANT_NAME]}" + (f" ({details})" if details else ""))
+    if len(ordered) > 15:
+        lines.append(f"… и ещё {len(ordered) - 15}")
+    if ordered:
+        lines.append(f"\n📏 Диапазон: {ordered[0][1]} – {ordered[-1][1]}")
+    if plan["reserved"]:
+        lines.append(f"🔒 Пропущено зарезервированных номеров: {plan['reserved']}")
+    if plan["kept"]:
+        lines.append(f"📌 Сохраняют текущий номер: {plan['kept']}")
+    lines.append(f"\n✅ Будет присвоено: {len(plan['assignments'])}")
+    return "\n".join(lines)
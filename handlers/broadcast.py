@@ -0,0 +1,55 @@
+"""
+Concurrent delivery of broadcast messages.
+
+Recipients are served by a bounded pool instead of one by one; the payload
+(text or a prebuilt media group of file_ids) is built once by the caller.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+BROADCAST_CONCURRENCY = 8
+BROADCAST_RETRIES = 2
+
+
+async def fan_out(
+    recipients: Iterable[Any],
+    send: Callable[[Any], Awaitable[Any]],
+    concurrency: int = BROADCAST_CONCURRENCY,
+    retries: int = BROADCAST_RETRIES,
+) -> List[Tuple[Any, Optional[Exception]]]:
+    """
+    Call send(recipient) for every recipient, at most concurrency at once.
+
+    TelegramRetryAfter is waited out while holding the slot, so the whole
+    pool slows down to the rate Telegram allows. Returns (recipient, error)
+    pairs in input order; error is None for delivered messages.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def deliver(recipient):
+        async with semaphore:
+            for attempt in range(retries + 1):
+                try:
+                    await send(recipient)
+                    return recipient, None
+                except TelegramRetryAfter as e:
+                    if attempt == retries:
+                        return recipient, e
+                    logger.warning(f"Превышен лимит Telegram, пауза {e.retry_after} с")
+                    await asyncio.sleep(e.retry_after)
+                except Exception as e:
+                    return recipient, e
+
+    return await asyncio.gather(*(deliver(recipient) for recipient in recipients))
+
+
+def broadcast_concurrency(config: dict) -> int:
+    """Concurrency from the "broadcast" section of config.json"""
+    return config.get("broadcast", {}).get("concurrency", BROADCAST_CONCURRENCY)
@@ -1,6 +1,13 @@
+import pytz
 from aiogram import Dispatcher, Bot, F
 from aiogram.fsm.context import FSMContext
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import (
+    Message,
+    CallbackQuery,
+    InlineKeyboardMarkup,
+    InlineKeyboardButton,
+    BufferedInputFile,
+)
 
 from .utils import (
     RegistrationForm,
@@ -10,14 +17,39 @@ from .utils import (
     create_category_selection_keyboard,
     create_cluster_selection_keyboard,
     create_back_keyboard,
+    create_print_documents_keyboard,
+    config,
+)
+from .documents import (
+    KIND_START_LIST,
+    KIND_PROTOCOL,
+    FORMAT_PDF,
+    FORMAT_XLSX,
+    GROUP_CLUSTER,
+    DOCUMENT_GROUPS,
+    TITLES,
+    generate_document,
+)
+from .plan_flow import handle_plan_flow, mark_selected, start_plan_flow
+from .auto_clustering import (
+    CLUSTER_LETTERS,
+    MODE_BALANCED,
+    MODE_QUANTILE,
+    GROUP_NONE,
+    GROUP_GENDER,
+    GROUP_CATEGORY,
+    build_cluster_plan,
+    format_cluster_plan_preview,
 )
 from database import (
     get_participants_by_role,
     set_participant_category,
     set_participant_cluster,
+    bulk_set_participant_clusters,
     get_participants_with_categories,
     clear_all_categories,
     clear_all_clusters,
+    memoize_by_table_versions,
 )
 
 
@@ -379,21 +411,13 @@ def register_cluster_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
         await message.answer(text, reply_markup=create_clusters_category_keyboard())
         await state.clear()
 
-    @dp.callback_query(F.data == "admin_view_distribution")
-    async def view_distribution(callback_query: CallbackQuery):
-        """View final distribution of participants"""
-        user_id = callback_query.from_user.id
-        if user_id != admin_id:
-            await callback_query.answer("❌ Доступ запрещен")
-            return
-
-        await callback_query.answer()
-
+    @memoize_by_table_versions("participants")
+    def build_distribution_text() -> str:
+        """Build full distribution text, empty string if there are no participants"""
         participants = get_participants_with_categories()
 
         if not participants:
-            await callback_query.message.answer("❌ Нет зарегистрированных участников")
-            return
+            return ""
 
         # Build distribution message
         text = "📋 <b>Полное распределение участников</b>\n\n"
@@ -453,6 +477,23 @@ def register_cluster_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
 
             text += participant_text
 
+        return text
+
+    @dp.callback_query(F.data == "admin_view_distribution")
+    async def view_distribution(callback_query: CallbackQuery):
+        """View final distribution of participants"""
+        user_id = callback_query.from_user.id
+        if user_id != admin_id:
+            await callback_query.answer("❌ Доступ запрещен")
+            return
+
+        await callback_query.answer()
+
+        text = build_distribution_text()
+        if not text:
+            await callback_query.message.answer("❌ Нет зарегистрированных участников")
+            return
+
         # Split long messages
         if len(text) > 4000:
             # Send in chunks
@@ -536,6 +577,144 @@ def register_cluster_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
             text, reply_markup=create_clusters_category_keyboard()
         )
 
+    def get_auto_cluster_capacities(cluster_count: int) -> dict:
+        """Capacities from config: auto_clustering.max_per_cluster and per-letter overrides"""
+        auto_config = config.get("auto_clustering", {})
+        default_capacity = auto_config.get("max_per_cluster", 0)
+        capacities = {letter: default_capacity for letter in CLUSTER_LETTERS[:cluster_count]}
+        capacities.update(auto_config.get("capacities", {}))
+        return capacities
+
+    def create_auto_cluster_settings_keyboard(settings: dict) -> InlineKeyboardMarkup:
+        mark = mark_selected
+        count_row = [
+            InlineKeyboardButton(text=mark(settings["count"] == n, str(n)), callback_data=f"autocl_n_{n}")
+            for n in range(2, len(CLUSTER_LETTERS) + 1)
+        ]
+        return InlineKeyboardMarkup(
+            inline_keyboard=[
+                count_row,
+                [
+                    InlineKeyboardButton(
+                        text=mark(settings["mode"] == MODE_BALANCED, "⚖️ Равные волны"),
+                        callback_data=f"autocl_mode_{MODE_BALANCED}",
+                    ),
+                    InlineKeyboardButton(
+                        text=mark(settings["mode"] == MODE_QUANTILE, "📈 Квантили времени"),
+                        callback_data=f"autocl_mode_{MODE_QUANTILE}",
+                    ),
+                ],
+                [
+                    InlineKeyboardButton(
+                        text=mark(settings["group_by"] == GROUP_NONE, "Без ограничений"),
+                        callback_data=f"autocl_by_{GROUP_NONE}",
+                    ),
+                    InlineKeyboardButton(
+                        text=mark(settings["group_by"] == GROUP_GENDER, "👫 По полу"),
+                        callback_data=f"autocl_by_{GROUP_GENDER}",
+                    ),
+                    InlineKeyboardButton(
+                        text=mark(settings["group_by"] == GROUP_CATEGORY, "📂 По категориям"),
+                        callback_data=f"autocl_by_{GROUP_CATEGORY}",
+                    ),
+                ],
+                [InlineKeyboardButton(text="👁 Предпросмотр", callback_data="autocl_preview")],
+                [InlineKeyboardButton(text="⬅️ Назад", callback_data="admin_clusters")],
+            ]
+        )
+
+    def auto_cluster_settings_view(settings: dict):
+        capacities = get_auto_cluster_capacities(settings["count"])
+        limits = ", ".join(f"{k}≤{v}" for k, v in capacities.items() if v)
+        text = "🤖 <b>Автораспределение по целевому времени</b>\n\n"
+        text += "Бегуны сортируются по целевому времени и делятся на волны: A — самые быстрые.\n\n"
+        text += f"🎯 Кластеров: <b>{settings['count']}</b>\n"
+        text += "📏 Лимиты кластеров: " + (limits or "нет") + "\n\n"
+        text += "Выберите параметры и нажмите «Предпросмотр». Ничего не будет сохранено до подтверждения."
+        return text, create_auto_cluster_settings_keyboard(settings)
+
+    def update_auto_cluster_settings(settings: dict, action: str):
+        if action.startswith("n_") and action[2:].isdigit():
+            settings["count"] = max(2, min(int(action[2:]), len(CLUSTER_LETTERS)))
+        elif action.startswith("mode_") and action[5:] in (MODE_BALANCED, MODE_QUANTILE):
+            settings["mode"] = action[5:]
+        elif action.startswith("by_") and action[3:] in (GROUP_NONE, GROUP_GENDER, GROUP_CATEGORY):
+            settings["group_by"] = action[3:]
+
+    def preview_auto_clusters(settings: dict):
+        participants = get_participants_by_role("runner")
+        if not participants:
+            return None, "❌ Нет бегунов для распределения"
+
+        plan = build_cluster_plan(
+            participants,
+            settings["count"],
+            mode=settings["mode"],
+            group_by=settings["group_by"],
+            capacities=get_auto_cluster_capacities(settings["count"]),
+        )
+        if plan["error"]:
+            return None, plan["error"]
+
+        # Не поместившиеся в лимиты теряют старый кластер, который сейчас может быть заполнен
+        changes = dict(plan["assignments"])
+        changes.update({participant[0]: None for participant in plan["unassigned"]})
+        return changes, format_cluster_plan_preview(plan, settings["mode"], settings["group_by"])
+
+    async def apply_auto_clusters(changes: dict, callback_query: CallbackQuery):
+        updated = bulk_set_participant_clusters(changes)
+        if updated < 0:
+            text = "❌ <b>Ошибка при сохранении кластеров</b>\n\nПопробуйте повторить операцию позже."
+        else:
+            counts = {}
+            for cluster in changes.values():
+                if cluster:
+                    counts[cluster] = counts.get(cluster, 0) + 1
+            cleared = len(changes) - sum(counts.values())
+            text = f"✅ <b>Кластеры назначены: {updated - cleared} участникам</b>\n\n"
+            text += "\n".join(f"• Кластер {k}: {v} чел." for k, v in sorted(counts.items()))
+            if cleared:
+                text += f"\n\n❗ Кластер снят у не поместившихся в лимиты: {cleared}"
+            logger.info(f"Автораспределение по кластерам применено: {counts}, снято: {cleared}")
+        await callback_query.message.edit_text(text, reply_markup=create_clusters_category_keyboard())
+
+    @dp.callback_query(F.data == "admin_auto_clusters")
+    async def start_auto_clustering(callback_query: CallbackQuery, state: FSMContext):
+        """Show auto clustering settings"""
+        if callback_query.from_user.id != admin_id:
+            await callback_query.answer("❌ Доступ запрещен")
+            return
+
+        settings = {
+            "count": config.get("auto_clustering", {}).get("default_clusters", 4),
+            "mode": MODE_BALANCED,
+            "group_by": GROUP_NONE,
+        }
+        await start_plan_flow(
+            callback_query, state, settings,
+            "auto_cluster_settings", "auto_cluster_assignments", auto_cluster_settings_view,
+        )
+
+    @dp.callback_query(F.data.startswith("autocl_"))
+    async def handle_auto_clustering(callback_query: CallbackQuery, state: FSMContext):
+        """Handle auto clustering settings, preview and apply"""
+        if callback_query.from_user.id != admin_id:
+            await callback_query.answer("❌ Доступ запрещен")
+            return
+
+        await handle_plan_flow(
+            callback_query,
+            state,
+            prefix="autocl",
+            settings_key="auto_cluster_settings",
+            plan_key="auto_cluster_assignments",
+            stale_text="Сессия устарела, откройте автораспределение заново",
+            render_settings=auto_cluster_settings_view,
+            update_settings=update_auto_cluster_settings,
+            build_preview=preview_auto_clusters,
+            apply=apply_auto_clusters,
+        )
+
     @dp.callback_query(F.data == "admin_notify_distribution")
     async def notify_distribution(callback_query: CallbackQuery):
         """Notify all participants about their category/cluster assignment"""
@@ -637,6 +816,61 @@ def register_cluster_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
             reply_markup=create_clusters_category_keyboard(),
         )
 
+    @dp.callback_query(F.data == "admin_print_documents")
+    async def show_print_documents_menu(callback_query: CallbackQuery):
+        """Show printable start list and protocol options"""
+        if callback_query.from_user.id != admin_id:
+            await callback_query.answer("❌ Доступ запрещен")
+            return
+
+        await callback_query.message.delete()
+        await callback_query.answer()
+
+        text = "🖨 <b>Печатные документы</b>\n\n"
+        text += "📋 <b>Старт-лист</b> — бегуны по номерам, каждая группа на отдельной странице (PDF) или листе (XLSX)\n"
+        text += "🏆 <b>Протокол</b> — места по результатам внутри каждой категории\n\n"
+        text += "💡 Повторное скачивание без изменений в списке участников выполняется мгновенно."
+        await callback_query.message.answer(text, reply_markup=create_print_documents_keyboard())
+
+    @dp.callback_query(F.data.startswith("printdoc_"))
+    async def send_print_document(callback_query: CallbackQuery):
+        """Render (or take from cache) and send a printable document"""
+        if callback_query.from_user.id != admin_id:
+            await callback_query.answer("❌ Доступ запрещен")
+            return
+
+        parts = callback_query.data.split("_")
+        if (
+            len(parts) != 4
+            or parts[1] not in (KIND_START_LIST, KIND_PROTOCOL)
+            or parts[2] not in (FORMAT_PDF, FORMAT_XLSX)
+            or parts[3] not in DOCUMENT_GROUPS
+        ):
+            await callback_query.answer("❌ Неизвестный документ")
+            return
+        _, kind, fmt, group_by = parts
+
+        await callback_query.answer("⏳ Формируем документ...")
+        try:
+            document = await generate_document(kind, fmt, group_by, config.get("documents", {}))
+        except Exception as e:
+            logger.error(f"Ошибка при формировании документа {kind}/{fmt}/{group_by}: {e}")
+            await callback_query.message.answer(
+                "❌ Не удалось сформировать документ. Подробности в логах."
+            )
+            return
+
+        if document is None:
+            await callback_query.message.answer("❌ Нет бегунов для формирования документа")
+            return
+
+        content, filename = document
+        group_text = "по кластерам" if group_by == GROUP_CLUSTER else "по категориям"
+        await callback_query.message.answer_document(
+            BufferedInputFile(content, filename=filename),
+            caption=f"🖨 <b>{TITLES[kind]}</b> ({fmt.upper()}, {group_text})",
+        )
+
     @dp.callback_query(F.data == "admin_create_document")
     async def create_document(callback_query: CallbackQuery):
         """Create printable document with participant distribution"""
@@ -661,8 +895,6 @@ def register_cluster_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
 
         # Generate document content
         from datetime import datetime
-        import pytz
-
         moscow_tz = pytz.timezone("Europe/Moscow")
         current_time = datetime.now(moscow_tz)
 
@@ -904,8 +1136,6 @@ def register_cluster_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
             import csv
             import io
             from datetime import datetime
-            import pytz
-
             moscow_tz = pytz.timezone("Europe/Moscow")
             current_time = datetime.now(moscow_tz)
 
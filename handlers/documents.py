@@ -0,0 +1,259 @@
+"""
+Printable start lists and protocols (PDF, XLSX).
+
+Documents are rendered in a process pool so large files do not block the
+event loop, and cached by the participants table version: repeated downloads
+of an unchanged list are served from memory.
+"""
+
+import asyncio
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pytz
+
+from database import get_cache_generation, get_participants_with_categories, get_table_versions
+from logging_config import get_logger
+from .validation import time_to_seconds
+
+logger = get_logger(__name__)
+
+KIND_START_LIST = "start"
+KIND_PROTOCOL = "protocol"
+
+FORMAT_PDF = "pdf"
+FORMAT_XLSX = "xlsx"
+
+GROUP_CLUSTER = "cluster"
+GROUP_CATEGORY = "category"
+DOCUMENT_GROUPS = (GROUP_CLUSTER, GROUP_CATEGORY)
+
+DEFAULT_FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+
+CATEGORY_ORDER = ["СуперЭлита", "Элита", "Классика", "Женский", "Команда"]
+CLUSTER_ORDER = ["A", "B", "C", "D", "E", "F", "G"]
+
+TITLES = {
+    KIND_START_LIST: "Стартовый лист",
+    KIND_PROTOCOL: "Протокол",
+}
+
+# Row tuple from get_participants_with_categories:
+# (user_id, username, name, target_time, gender, category, cluster, role, result, bib_number, team_name, team_invite_code)
+
+_executor: Optional[ProcessPoolExecutor] = None
+# (kind, fmt, group_by) -> ((cache generation, participants version), file bytes)
+_cache: Dict[Tuple[str, str, str], Tuple[Tuple[int, int], bytes]] = {}
+
+
+# ============================================================================
+# RENDERING (runs in worker processes)
+# ============================================================================
+
+
+def _group_rows(rows: List[tuple], group_by: str) -> List[Tuple[str, List[tuple]]]:
+    """Split runners into ordered groups by cluster or category"""
+    index, order, empty = (
+        (6, CLUSTER_ORDER, "Без кластера")
+        if group_by == GROUP_CLUSTER
+        else (5, CATEGORY_ORDER, "Без категории")
+    )
+    groups: Dict[str, List[tuple]] = {}
+    for row in rows:
+        groups.setdefault(row[index] or empty, []).append(row)
+
+    def rank(name: str):
+        return (order.index(name), name) if name in order else (len(order), name)
+
+    return [(name, groups[name]) for name in sorted(groups, key=rank)]
+
+
+def _result_key(row: tuple):
+    result = (row[8] or "").strip()
+    seconds = time_to_seconds(result)
+    # Сначала финишировавшие по времени, затем DNF, затем без результата
+    if seconds is not None:
+        return (0, seconds, row[2] or "")
+    return (1 if result.upper() == "DNF" else 2, 0, row[2] or "")
+
+
+def _bib_key(row: tuple):
+    bib = str(row[9] or "").strip()
+    return (0, int(bib), row[2] or "") if bib.isdigit() else (1, 0, row[2] or "")
+
+
+def _table_rows(kind: str, rows: List[tuple]) -> Tuple[List[str], List[List[str]]]:
+    """Header and cell values of one group"""
+    if kind == KIND_PROTOCOL:
+        header = ["Место", "Номер", "Имя", "Результат", "Цель", "Пол"]
+        body, place = [], 0
+        for row in sorted(rows, key=_result_key):
+            finished = time_to_seconds(row[8] or "") is not None
+            if finished:
+                place += 1
+            body.append([
+                str(place) if finished else "—",
+                str(row[9] or ""),
+                row[2] or "",
+                row[8] or "",
+                row[3] or "",
+                row[4] or "",
+            ])
+        return header, body
+
+    header = ["№", "Номер", "Имя", "Целевое время", "Категория", "Кластер"]
+    body = [
+        [str(i), str(row[9] or ""), row[2] or "", row[3] or "", row[5] or "", row[6] or ""]
+        for i, row in enumerate(sorted(rows, key=_bib_key), 1)
+    ]
+    return header, body
+
+
+def _render_pdf(kind: str, groups: List[Tuple[str, List[tuple]]], title: str, font_path: str) -> bytes:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import mm
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    font = "Helvetica"
+    if font_path and os.path.exists(font_path):
+        # Встроенные шрифты PDF не содержат кириллицы
+        pdfmetrics.registerFont(TTFont("DocumentFont", font_path))
+        font = "DocumentFont"
+
+    styles = getSampleStyleSheet()
+    heading = styles["Heading2"].clone("DocHeading", fontName=font)
+    subtitle = styles["Normal"].clone("DocSubtitle", fontName=font, textColor=colors.grey)
+
+    buffer = io.BytesIO()
+    document = SimpleDocTemplate(
+        buffer, pagesize=A4, title=title,
+        leftMargin=15 * mm, rightMargin=15 * mm, topMargin=15 * mm, bottomMargin=15 * mm,
+    )
+    story = []
+    for i, (name, rows) in enumerate(groups):
+        if i:
+            story.append(PageBreak())
+        header, body = _table_rows(kind, rows)
+        story.append(Paragraph(f"{title} — {name}", heading))
+        story.append(Paragraph(f"Участников: {len(rows)}", subtitle))
+        story.append(Spacer(1, 4 * mm))
+        table = Table([header] + body, repeatRows=1)
+        table.setStyle(TableStyle([
+            ("FONTNAME", (0, 0), (-1, -1), font),
+            ("FONTSIZE", (0, 0), (-1, -1), 10),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.whitesmoke]),
+        ]))
+        story.append(table)
+    document.build(story)
+    return buffer.getvalue()
+
+
+def _render_xlsx(kind: str, groups: List[Tuple[str, List[tuple]]], title: str) -> bytes:
+    import xlsxwriter
+
+    buffer = io.BytesIO()
+    workbook = xlsxwriter.Workbook(buffer, {"in_memory": True})
+    bold = workbook.add_format({"bold": True, "bg_color": "#D9D9D9", "border": 1})
+    cell = workbook.add_format({"border": 1})
+    used_names = set()
+    for name, rows in groups:
+        # Имя листа Excel: до 31 символа, без []:*?/\
+        sheet_name = "".join(c for c in name if c not in "[]:*?/\\")[:31] or "Лист"
+        while sheet_name in used_names:
+            sheet_name = sheet_name[:28] + f"_{len(used_names)}"
+        used_names.add(sheet_name)
+
+        sheet = workbook.add_worksheet(sheet_name)
+        header, body = _table_rows(kind, rows)
+        sheet.write_row(0, 0, header, bold)
+        for row_index, values in enumerate(body, 1):
+            sheet.write_row(row_index, 0, values, cell)
+        for col, label in enumerate(header):
+            width = max([len(label)] + [len(values[col]) for values in body])
+            sheet.set_column(col, col, min(width + 2, 50))
+        sheet.freeze_panes(1, 0)
+    workbook.close()
+    return buffer.getvalue()
+
+
+def build_document(kind: str, fmt: str, group_by: str, rows: List[tuple], font_path: str) -> bytes:
+    """Render a start list or protocol; top-level so it can run in a worker process"""
+    groups = _group_rows(rows, group_by)
+    title = TITLES.get(kind, kind)
+    if fmt == FORMAT_PDF:
+        return _render_pdf(kind, groups, title, font_path)
+    return _render_xlsx(kind, groups, title)
+
+
+# ============================================================================
+# ASYNC API
+# ============================================================================
+
+
+def _get_executor(max_workers: int) -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: fork из процесса с потоками asyncio и сброса аудита может унаследовать захваченные блокировки
+        _executor = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def shutdown_document_executor():
+    """Stop worker processes on bot shutdown"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+async def generate_document(
+    kind: str, fmt: str, group_by: str, settings: Optional[dict] = None
+) -> Optional[Tuple[bytes, str]]:
+    """
+    Return (file bytes, filename) for runners grouped by cluster or category.
+
+    The rendered file is reused while the participants table version is unchanged.
+    Returns None if there are no runners.
+    """
+    settings = settings or {}
+    version = get_table_versions().get("participants")
+    stamp = (get_cache_generation(), version)
+    key = (kind, fmt, group_by)
+    timestamp = datetime.now(pytz.timezone("Europe/Moscow")).strftime("%Y%m%d_%H%M")
+    filename = f"{kind}_{group_by}_{timestamp}.{fmt}"
+
+    cached = _cache.get(key)
+    if cached and version is not None and cached[0] == stamp:
+        logger.info(f"Документ {kind}/{fmt}/{group_by} отдан из кеша (версия {version})")
+        return cached[1], filename
+
+    rows = [row for row in get_participants_with_categories() if row[7] == "runner"]
+    if not rows:
+        return None
+
+    loop = asyncio.get_running_loop()
+    content = await loop.run_in_executor(
+        _get_executor(settings.get("workers", 2)),
+        build_document,
+        kind,
+        fmt,
+        group_by,
+        rows,
+        settings.get("pdf_font_path", DEFAULT_FONT_PATH),
+    )
+    if version is not None:
+        _cache[key] = (stamp, content)
+    logger.info(f"Документ {kind}/{fmt}/{group_by} сформирован: {len(content)} байт, версия {version}")
+    return content, filename
@@ -3,6 +3,7 @@ Event management handlers for creating and managing racing events.
 Handles event creation flow with location, date, and pricing setup.
 """
 
+import asyncio
 import re
 from datetime import datetime
 from pytz import timezone
@@ -20,10 +21,18 @@ from database import (
     get_setting,
     get_participant_count,
     clear_participants,
+    get_event_state,
+    get_event_deadline,
 )
 
 logger = get_logger(__name__)
 
+# Максимальный интервал сна таймера: изменения дедлайна подхватываются не позже
+EVENT_TIMER_MAX_SLEEP = 60
+
+# Global variable to store event deadline timer task
+event_timer_task = None
+
 
 def create_event_confirmation_keyboard():
     """Create keyboard for event creation confirmation"""
@@ -321,6 +330,47 @@ async def handle_cancel_create_event(callback: CallbackQuery, state: FSMContext)
     await callback.answer("Отменено")
 
 
+async def event_deadline_timer():
+    """Flip event state to finished exactly at reg_end_date"""
+    logger.info("Запущен таймер окончания регистрации")
+    moscow_tz = timezone("Europe/Moscow")
+
+    while True:
+        try:
+            # get_event_state() сам переводит active -> finished после дедлайна
+            state = get_event_state()
+            deadline = get_event_deadline()
+            delay = EVENT_TIMER_MAX_SLEEP
+            if state == "active_event" and deadline is not None:
+                remaining = (deadline - datetime.now(moscow_tz)).total_seconds()
+                delay = min(max(remaining, 0) + 0.5, EVENT_TIMER_MAX_SLEEP)
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка в таймере окончания регистрации: {e}")
+            await asyncio.sleep(EVENT_TIMER_MAX_SLEEP)
+
+
+async def start_event_timer():
+    """Start event deadline timer on bot startup"""
+    global event_timer_task
+    if event_timer_task is None or event_timer_task.done():
+        event_timer_task = asyncio.create_task(event_deadline_timer())
+
+
+async def stop_event_timer():
+    """Stop event deadline timer on bot shutdown"""
+    global event_timer_task
+    if event_timer_task and not event_timer_task.done():
+        event_timer_task.cancel()
+        try:
+            await event_timer_task
+        except asyncio.CancelledError:
+            pass
+        logger.info("Таймер окончания регистрации остановлен")
+
+
 def register_event_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
     """Register event management handlers"""
 
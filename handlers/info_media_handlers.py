@@ -1,9 +1,8 @@
 import os
-import json
 from aiogram import Dispatcher, Bot, F
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
-from aiogram.types import Message, FSInputFile, CallbackQuery
+from aiogram.types import Message, CallbackQuery
 from aiogram.exceptions import TelegramBadRequest
 from .utils import (
     messages,
@@ -12,11 +11,10 @@ from .utils import (
     messages,
     config,
     RegistrationForm,
-    get_participation_fee_text,
-    get_event_date_text,
-    get_event_location_text,
-    get_event_time_text,
+    render_event_message,
 )
+from .media_cache import send_cached_photo, invalidate_media
+from .templates import TemplateError
 
 
 def register_info_media_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
@@ -30,28 +28,17 @@ def register_info_media_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
         afisha_path = "/app/images/afisha.jpeg"
         try:
             if os.path.exists(afisha_path):
-                await bot.send_photo(
+                await send_cached_photo(
+                    bot,
                     chat_id=message.from_user.id,
-                    photo=FSInputFile(afisha_path),
-                    caption=messages["info_message"].format(
-                        fee=get_participation_fee_text(),
-                        event_date=get_event_date_text(),
-                        event_time=get_event_time_text(),
-                        event_location=get_event_location_text()
-                    ),
+                    path=afisha_path,
+                    caption=render_event_message("info_message"),
                 )
                 logger.info(
                     f"Афиша отправлена с текстом info_message пользователю user_id={message.from_user.id}"
                 )
             else:
-                await message.answer(
-                    messages["info_message"].format(
-                        fee=get_participation_fee_text(),
-                        event_date=get_event_date_text(),
-                        event_time=get_event_time_text(),
-                        event_location=get_event_location_text()
-                    )
-                )
+                await message.answer(render_event_message("info_message"))
                 logger.info(
                     f"Афиша не найдена, отправлен только текст info_message пользователю user_id={message.from_user.id}"
                 )
@@ -59,14 +46,7 @@ def register_info_media_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
             logger.error(
                 f"Ошибка при отправке сообщения /info пользователю user_id={message.from_user.id}: {e}"
             )
-            await message.answer(
-                messages["info_message"].format(
-                    fee=get_participation_fee_text(),
-                    event_date=get_event_date_text(),
-                    event_time=get_event_time_text(),
-                    event_location=get_event_location_text()
-                )
-            )
+            await message.answer(render_event_message("info_message"))
 
     @dp.message(Command("create_afisha"))
     @dp.callback_query(F.data == "admin_create_afisha")
@@ -150,6 +130,8 @@ def register_info_media_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
             # Download and save the file
             await bot.download_file(file.file_path, afisha_path)
             os.chmod(afisha_path, 0o644)
+            # Фото админа уже на серверах Telegram — переиспользуем его file_id
+            invalidate_media(afisha_path, file_id=photo.file_id)
 
             # Get file info for confirmation
             file_stat = os.stat(afisha_path)
@@ -271,6 +253,7 @@ def register_info_media_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
             # Download and save the file
             await bot.download_file(file.file_path, sponsor_path)
             os.chmod(sponsor_path, 0o644)
+            invalidate_media(sponsor_path, file_id=photo.file_id)
 
             # Get file info for confirmation
             file_stat = os.stat(sponsor_path)
@@ -366,32 +349,18 @@ def register_info_media_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
             return
 
         try:
-            # Update the messages.json file
-            messages_path = "/app/messages.json"
-
-            # Read current messages
-            if os.path.exists(messages_path):
-                with open(messages_path, "r", encoding="utf-8") as f:
-                    current_messages = json.load(f)
-            else:
-                current_messages = {}
-
-            # Update welcome message
-            old_welcome = current_messages.get("start_message", "не установлено")
-            current_messages["start_message"] = new_welcome
-
-            # Save updated messages
-            with open(messages_path, "w", encoding="utf-8") as f:
-                json.dump(current_messages, f, ensure_ascii=False, indent=2)
-
-            # Update the global messages dict
-            messages["start_message"] = new_welcome
+            # Валидирует плейсхолдеры и перезаписывает messages.json на месте
+            messages.update_message("start_message", new_welcome)
 
             text = "✅ <b>Приветственное сообщение обновлено</b>"
 
             await message.answer(text)
             logger.info(f"Приветственное сообщение обновлено")
 
+        except TemplateError as e:
+            logger.warning(f"Отклонено приветственное сообщение: {e}")
+            await message.answer(f"❌ {e}\n\nИсправьте текст и отправьте снова:")
+            return
         except Exception as e:
             logger.error(f"Ошибка при обновлении приветственного сообщения: {e}")
             await message.answer(
@@ -457,26 +426,8 @@ def register_info_media_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
             return
 
         try:
-            # Update the messages.json file
-            messages_path = "/app/messages.json"
-
-            # Read current messages
-            if os.path.exists(messages_path):
-                with open(messages_path, "r", encoding="utf-8") as f:
-                    current_messages = json.load(f)
-            else:
-                current_messages = {}
-
-            # Update info message
-            old_info = current_messages.get("info_message", "не установлено")
-            current_messages["info_message"] = new_info
-
-            # Save updated messages
-            with open(messages_path, "w", encoding="utf-8") as f:
-                json.dump(current_messages, f, ensure_ascii=False, indent=2)
-
-            # Update the global messages dict
-            messages["info_message"] = new_info
+            # Валидирует плейсхолдеры и перезаписывает messages.json на месте
+            messages.update_message("info_message", new_info)
 
             text = "✅ <b>Информационное сообщение обновлено</b>\n\n"
             text += "📝 <b>Новое сообщение:</b>\n"
@@ -487,6 +438,10 @@ def register_info_media_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
             await message.answer(text)
             logger.info(f"Информационное сообщение обновлено")
 
+        except TemplateError as e:
+            logger.warning(f"Отклонено информационное сообщение: {e}")
+            await message.answer(f"❌ {e}\n\nИсправьте текст и отправьте снова:")
+            return
         except Exception as e:
             logger.error(f"Ошибка при обновлении информационного сообщения: {e}")
             await message.answer(
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, InputMediaPhoto, Message
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+MEDIA_CACHE_PATH = "/app/data/media_cache.json"
+
+# path -> {"mtime_ns": int, "size": int, "sha1": str, "file_id": str}
+_file_ids: Dict[str, dict] = {}
+# path -> ((mtime_ns, size), sha1) — хеш пересчитывается только при изменении файла
+_hashes: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_loaded = False
+
+
+def _load():
+    global _loaded
+    _loaded = True
+    try:
+        with open(MEDIA_CACHE_PATH, "r", encoding="utf-8") as f:
+            _file_ids.update(json.load(f))
+    except FileNotFoundError:
+        pass
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Не удалось загрузить кеш file_id медиа: {e}")
+
+
+def _save():
+    try:
+        os.makedirs(os.path.dirname(MEDIA_CACHE_PATH), exist_ok=True)
+        tmp_path = MEDIA_CACHE_PATH + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(_file_ids, f)
+        os.replace(tmp_path, MEDIA_CACHE_PATH)
+    except OSError as e:
+        logger.warning(f"Не удалось сохранить кеш file_id медиа: {e}")
+
+
+def _fingerprint(path: str) -> Optional[dict]:
+    """Return mtime, size and content hash of the file, or None if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _hashes.get(path)
+    if cached is None or cached[0] != stamp:
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                digest.update(chunk)
+        cached = (stamp, digest.hexdigest())
+        _hashes[path] = cached
+    return {"mtime_ns": stamp[0], "size": stamp[1], "sha1": cached[1]}
+
+
+def get_cached_file_id(path: str) -> Optional[str]:
+    """Return the Telegram file_id for the current version of the file, if known."""
+    if not _loaded:
+        _load()
+    entry = _file_ids.get(path)
+    if entry is None:
+        return None
+    fingerprint = _fingerprint(path)
+    if fingerprint is None or any(entry.get(k) != v for k, v in fingerprint.items()):
+        _file_ids.pop(path, None)
+        return None
+    return entry["file_id"]
+
+
+def remember_file_id(path: str, file_id: str):
+    """Bind a Telegram file_id to the current version of the file."""
+    if not _loaded:
+        _load()
+    fingerprint = _fingerprint(path)
+    if fingerprint is None:
+        return
+    fingerprint["file_id"] = file_id
+    _file_ids[path] = fingerprint
+    _save()
+
+
+def invalidate_media(path: str, file_id: Optional[str] = None):
+    """
+    Drop the cached file_id after the file was replaced.
+
+    If file_id of the new content is already known (e.g. the admin's uploaded
+    photo), it is stored right away so the next send does not upload again.
+    """
+    _hashes.pop(path, None)
+    if not _loaded:
+        _load()
+    _file_ids.pop(path, None)
+    if file_id:
+        remember_file_id(path, file_id)
+    else:
+        _save()
+    logger.info(f"Кеш file_id сброшен для {path}")
+
+
+def get_photo_input(path: str) -> Union[str, FSInputFile]:
+    """Return cached file_id or FSInputFile for upload."""
+    return get_cached_file_id(path) or FSInputFile(path)
+
+
+async def send_cached_photo(bot: Bot, chat_id: int, path: str, **kwargs) -> Message:
+    """
+    Send a local photo, reusing the Telegram file_id after the first upload.
+
+    Falls back to a fresh upload if Telegram rejects a stale file_id.
+    """
+    file_id = get_cached_file_id(path)
+    if file_id:
+        try:
+            return await bot.send_photo(chat_id=chat_id, photo=file_id, **kwargs)
+        except TelegramBadRequest as e:
+            logger.warning(f"file_id для {path} отклонен Telegram, загружаем файл заново: {e}")
+            _file_ids.pop(path, None)
+
+    sent = await bot.send_photo(chat_id=chat_id, photo=FSInputFile(path), **kwargs)
+    if sent.photo:
+        remember_file_id(path, sent.photo[-1].file_id)
+    return sent
+
+
+def build_media_group(file_ids: Sequence[str], caption: Optional[str] = None, parse_mode: Optional[str] = None) -> List[InputMediaPhoto]:
+    """Media group of already uploaded photos, caption on the first one."""
+    media = [InputMediaPhoto(media=file_id) for file_id in file_ids]
+    if media and caption:
+        # Без явного parse_mode остается parse_mode бота по умолчанию
+        extra = {"parse_mode": parse_mode} if parse_mode else {}
+        media[0] = InputMediaPhoto(media=file_ids[0], caption=caption, **extra)
+    return media
+
+
+async def prepare_media_group(
+    bot: Bot,
+    upload_chat_id: int,
+    photos: Sequence[str],
+    caption: Optional[str] = None,
+    parse_mode: Optional[str] = None,
+) -> List[InputMediaPhoto]:
+    """
+    Build a broadcast media group that every recipient can reuse.
+
+    photos are Telegram file_ids or local paths. Paths without a cached
+    file_id are uploaded once to upload_chat_id (the admin chat) and their
+    file_ids are taken from the sent messages, so recipients never get a
+    fresh upload.
+    """
+    file_ids = [get_cached_file_id(p) if os.path.isfile(p) else p for p in photos]
+    missing = [i for i, file_id in enumerate(file_ids) if file_id is None]
+    if len(missing) == 1:
+        sent = [await bot.send_photo(chat_id=upload_chat_id, photo=FSInputFile(photos[missing[0]]))]
+    elif missing:
+        sent = await bot.send_media_group(
+            chat_id=upload_chat_id,
+            media=[InputMediaPhoto(media=FSInputFile(photos[i])) for i in missing],
+        )
+    else:
+        sent = []
+    for i, message in zip(missing, sent):
+        file_ids[i] = message.photo[-1].file_id
+        remember_file_id(photos[i], file_ids[i])
+    if missing:
+        logger.info(f"Загружено фото для рассылки: {len(missing)}")
+    return build_media_group(file_ids, caption, parse_mode)
+
+
+async def send_media(bot: Bot, chat_id: int, media: List[InputMediaPhoto]):
+    """Send a prebuilt media group; a single photo goes as a plain photo message."""
+    if len(media) == 1:
+        photo = media[0]
+        return await bot.send_photo(chat_id=chat_id, photo=photo.media, caption=photo.caption, parse_mode=photo.parse_mode)
+    return await bot.send_media_group(chat_id=chat_id, media=media)
@@ -4,7 +4,7 @@ import os
 from aiogram import Dispatcher, Bot, F
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
-from aiogram.types import Message, FSInputFile, CallbackQuery, InputMediaPhoto, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
 from .utils import (
     messages,
@@ -15,16 +15,18 @@ from .utils import (
     RegistrationForm,
     create_confirmation_keyboard,
     get_participation_fee_text,
-    get_event_date_text,
-    get_event_location_text,
+    render_event_message,
 )
+from .broadcast import broadcast_concurrency, fan_out
+from .media_cache import build_media_group, prepare_media_group, send_cached_photo, send_media
 from database import (
     get_all_participants,
     get_pending_registrations,
     get_all_bot_users,
+    get_blocked_user_ids,
     cleanup_blocked_user,
+    BlockedUsersBatch,
     delete_participant,
-    delete_pending_registration,
     set_result,
     get_participant_by_user_id,
 )
@@ -96,7 +98,13 @@ async def get_users_by_audience(audience_type):
             user_lists["bot_users"] = unique_bot_users
         except Exception as e:
             logger.error(f"Ошибка получения пользователей из bot_users: {e}")
-    
+
+    # Заблокировавшим бота не отправляем вовсе
+    blocked_ids = get_blocked_user_ids()
+    if blocked_ids:
+        for category, users in user_lists.items():
+            user_lists[category] = [user for user in users if user[0] not in blocked_ids]
+
     return user_lists
 
 
@@ -147,32 +155,28 @@ def register_notification_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
             await message.answer(messages["notify_all_no_participants"])
             return
         afisha_path = "/app/images/afisha.jpeg"
+        # Текст одинаков для всех получателей — рендерим один раз до рассылки
+        notify_text = render_event_message("notify_all_message")
         success_count = 0
+        blocked = BlockedUsersBatch(source="notify_all")
         for participant in participants:
             user_id = participant[0]
             name = participant[2]
             username = participant[1] or "не указан"
             try:
                 if os.path.exists(afisha_path):
-                    await bot.send_photo(
+                    await send_cached_photo(
+                        bot,
                         chat_id=user_id,
-                        photo=FSInputFile(afisha_path),
-                        caption=messages["notify_all_message"].format(
-                            fee=get_participation_fee_text(),
-                            event_date=get_event_date_text(),
-                            event_location=get_event_location_text()
-                        ),
+                        path=afisha_path,
+                        caption=notify_text,
                         reply_markup=create_confirmation_keyboard(),
                         parse_mode="HTML",
                     )
                 else:
                     await bot.send_message(
                         chat_id=user_id,
-                        text=messages["notify_all_message"].format(
-                            fee=get_participation_fee_text(),
-                            event_date=get_event_date_text(),
-                            event_location=get_event_location_text()
-                        ),
+                        text=notify_text,
                         reply_markup=create_confirmation_keyboard(),
                         parse_mode="HTML",
                     )
@@ -180,7 +184,7 @@ def register_notification_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
                 success_count += 1
             except TelegramForbiddenError:
                 logger.warning(f"Пользователь user_id={user_id} заблокировал бот")
-                cleanup_blocked_user(user_id)
+                blocked.add(user_id)
                 try:
                     await bot.send_message(
                         chat_id=admin_id,
@@ -204,6 +208,7 @@ def register_notification_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
                     logger.error(
                         f"Ошибка при отправке уведомления пользователю user_id={user_id}: {e}"
                     )
+        blocked.flush()
         await message.answer(messages["notify_all_success"].format(count=success_count))
         logger.info(f"Уведомления отправлены {success_count} участникам")
 
@@ -464,48 +469,41 @@ def register_notification_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
         success_count = 0
         blocked_count = 0
         total_sent = 0
+        blocked = BlockedUsersBatch(source="notify_advanced")
         
-        # Send to all user categories
-        for category, users in user_lists.items():
-            if not users:
-                continue
-                
-            for user_id, username, name in users:
-                try:
-                    if with_photos and photos:
-                        # Prepare media group
-                        from aiogram.types import InputMediaPhoto
-                        media = []
-                        
-                        # First photo with caption
-                        media.append(InputMediaPhoto(
-                            media=photos[0]['file_id'],
-                            caption=notify_text,
-                            parse_mode="HTML"
-                        ))
-                        
-                        # Other photos without caption
-                        for photo in photos[1:]:
-                            media.append(InputMediaPhoto(media=photo['file_id']))
-                        
-                        await bot.send_media_group(chat_id=user_id, media=media)
-                    else:
-                        # Send text only
-                        await bot.send_message(
-                            chat_id=user_id,
-                            text=notify_text,
-                            parse_mode="HTML"
-                        )
-                    
-                    success_count += 1
-                    logger.info(f"Расширенное уведомление отправлено пользователю {name or 'Unknown'} (ID: {user_id}) из категории {category}")
-                    
-                except Exception as e:
-                    logger.warning(f"Ошибка отправки пользователю {name or 'Unknown'} (ID: {user_id}): {e}")
-                    blocked_count += 1
-                
-                total_sent += 1
-        
+        if with_photos and photos:
+            media = build_media_group(
+                [photo['file_id'] for photo in photos], caption=notify_text, parse_mode="HTML"
+            )
+
+            async def send(recipient):
+                await send_media(bot, recipient[1], media)
+        else:
+            async def send(recipient):
+                await bot.send_message(chat_id=recipient[1], text=notify_text, parse_mode="HTML")
+
+        recipients = [
+            (category, user_id, name)
+            for category, users in user_lists.items()
+            for user_id, username, name in users
+        ]
+        results = await fan_out(recipients, send, concurrency=broadcast_concurrency(config))
+
+        for (category, user_id, name), error in results:
+            if error is None:
+                success_count += 1
+                logger.info(f"Расширенное уведомление отправлено пользователю {name or 'Unknown'} (ID: {user_id}) из категории {category}")
+            elif isinstance(error, TelegramForbiddenError):
+                logger.warning(f"Пользователь {name or 'Unknown'} (ID: {user_id}) заблокировал бот")
+                blocked.add(user_id)
+                blocked_count += 1
+            else:
+                logger.warning(f"Ошибка отправки пользователю {name or 'Unknown'} (ID: {user_id}): {error}")
+                blocked_count += 1
+            total_sent += 1
+
+        blocked.flush()
+
         # Send final statistics
         result_text = f"✅ <b>Рассылка завершена</b>\n\n"
         result_text += f"📊 <b>Статистика:</b>\n"
@@ -592,6 +590,7 @@ def register_notification_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
             await state.clear()
             return
         success_count = 0
+        blocked = BlockedUsersBatch(source="notify_unpaid")
         afisha_path = "/app/images/afisha.jpeg"
         for participant in unpaid_participants:
             user_id = participant[0]
@@ -599,9 +598,10 @@ def register_notification_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
             username = participant[1] or "не указан"
             try:
                 if os.path.exists(afisha_path):
-                    await bot.send_photo(
+                    await send_cached_photo(
+                        bot,
                         chat_id=user_id,
-                        photo=FSInputFile(afisha_path),
+                        path=afisha_path,
                         caption=notify_text,
                         parse_mode="HTML",
                     )
@@ -615,7 +615,7 @@ def register_notification_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
                 success_count += 1
             except TelegramForbiddenError:
                 logger.warning(f"Пользователь user_id={user_id} заблокировал бот")
-                cleanup_blocked_user(user_id)
+                blocked.add(user_id)
                 try:
                     await bot.send_message(
                         chat_id=admin_id,
@@ -639,6 +639,7 @@ def register_notification_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
                     logger.error(
                         f"Ошибка при отправке уведомления пользователю user_id={user_id}: {e}"
                     )
+        blocked.flush()
         await message.answer(
             messages["notify_unpaid_success"].format(count=success_count)
         )
@@ -749,14 +750,8 @@ def register_notification_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
         if len(photos) >= 10:
             await message.answer(messages["notify_all_interacted_photo_limit"])
             return
-        photo = message.photo[-1]
-        file = await bot.get_file(photo.file_id)
-        file_path = file.file_path
-        temp_photo_path = (
-            f"/app/images/temp_notify_all_interacted_photo_{len(photos)}.jpeg"
-        )
-        await bot.download_file(file_path, temp_photo_path)
-        photos.append(temp_photo_path)
+        # file_id присланного админом фото переиспользуется для всех получателей
+        photos.append(message.photo[-1].file_id)
         await state.update_data(photos=photos)
         await message.answer(
             messages["notify_all_interacted_photo_added"].format(count=len(photos))
@@ -793,43 +788,39 @@ def register_notification_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
             await state.clear()
             return
         success_count = 0
-        for user_id, username, name in all_users:
+        blocked = BlockedUsersBatch(source="notify_all_interacted")
+        if photos:
+            media = await prepare_media_group(bot, message.chat.id, photos, caption=notify_text, parse_mode="HTML")
+
+            async def send(recipient):
+                await send_media(bot, recipient[0], media)
+        else:
+            async def send(recipient):
+                await bot.send_message(chat_id=recipient[0], text=notify_text)
+
+        results = await fan_out(all_users, send, concurrency=broadcast_concurrency(config))
+        for (user_id, username, name), e in results:
             username = username or "не указан"
             name = name or "неизвестно"
-            try:
-                if photos:
-                    media = [
-                        InputMediaPhoto(
-                            media=FSInputFile(photos[0]), caption=notify_text
-                        )
-                    ]
-                    for photo_path in photos[1:]:
-                        media.append(InputMediaPhoto(media=FSInputFile(photo_path)))
-                    await bot.send_media_group(chat_id=user_id, media=media)
-                else:
-                    await bot.send_message(chat_id=user_id, text=notify_text)
+            if e is None:
                 success_count += 1
                 logger.info(f"Уведомление отправлено user_id={user_id}")
-            except Exception as e:
-                if "blocked" in str(e).lower():
-                    delete_participant(user_id)
-                    delete_pending_registration(user_id)
-                    await message.answer(
-                        messages["admin_blocked_notification"].format(
-                            name=name, username=username, user_id=user_id
-                        )
-                    )
-                    logger.info(
-                        f"Пользователь user_id={user_id} удалён из баз данных, так как заблокировал бота"
-                    )
-                else:
-                    logger.error(f"Ошибка отправки уведомления user_id={user_id}: {e}")
-                    await message.answer(
-                        f"🚫 Не удалось отправить уведомление пользователю {name} (ID: <code>{user_id}</code>, @{username})"
+            elif "blocked" in str(e).lower():
+                blocked.add(user_id)
+                await message.answer(
+                    messages["admin_blocked_notification"].format(
+                        name=name, username=username, user_id=user_id
                     )
-        for photo_path in photos:
-            if os.path.exists(photo_path):
-                os.remove(photo_path)
+                )
+                logger.info(
+                    f"Пользователь user_id={user_id} будет удалён из баз данных, так как заблокировал бота"
+                )
+            else:
+                logger.error(f"Ошибка отправки уведомления user_id={user_id}: {e}")
+                await message.answer(
+                    f"🚫 Не удалось отправить уведомление пользователю {name} (ID: <code>{user_id}</code>, @{username})"
+                )
+        blocked.flush()
         await message.answer(
             messages["notify_all_interacted_success"].format(count=success_count)
         )
@@ -926,7 +917,8 @@ def register_notification_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
         )
         
         from .utils import create_participation_confirmation_keyboard
-        
+
+        blocked = BlockedUsersBatch(source="confirmation_request")
         for user_id_p, username, name in unpaid_participants:
             try:
                 confirmation_text = (
@@ -952,10 +944,11 @@ def register_notification_handlers(dp: Dispatcher, bot: Bot, admin_id: int):
             except TelegramForbiddenError:
                 logger.warning(f"Пользователь {name} (ID: {user_id_p}) заблокировал бот")
                 failed_count += 1
-                cleanup_blocked_user(user_id_p)
+                blocked.add(user_id_p)
             except Exception as e:
                 logger.error(f"Ошибка отправки запроса участнику {name} (ID: {user_id_p}): {e}")
                 failed_count += 1
+        blocked.flush()
         
         # Send result summary
         result_text = (
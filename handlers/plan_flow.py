@@ -0,0 +1,103 @@
+"""
+Settings -> preview -> apply flow for bulk admin operations.
+
+Auto clustering and bulk bib allocation share one inline flow: the admin
+toggles settings, previews a plan and confirms it. Nothing is written before
+"apply"; the planned changes wait in the FSM state between the steps.
+"""
+
+from typing import Awaitable, Callable, Optional, Tuple
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
+
+# (text, keyboard) экрана настроек
+SettingsView = Tuple[str, InlineKeyboardMarkup]
+
+
+def mark_selected(active: bool, text: str) -> str:
+    """Bullet in front of the selected option of a settings keyboard"""
+    return f"• {text}" if active else text
+
+
+def create_plan_preview_keyboard(prefix: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="✅ Применить", callback_data=f"{prefix}_apply")],
+            [InlineKeyboardButton(text="⚙️ Изменить параметры", callback_data=f"{prefix}_settings")],
+        ]
+    )
+
+
+async def start_plan_flow(
+    callback_query: CallbackQuery,
+    state: FSMContext,
+    settings: dict,
+    settings_key: str,
+    plan_key: str,
+    render_settings: Callable[[dict], SettingsView],
+):
+    """Store fresh settings and replace the menu message with the settings screen"""
+    await state.update_data(**{settings_key: settings, plan_key: None})
+    text, keyboard = render_settings(settings)
+    await callback_query.message.delete()
+    await callback_query.message.answer(text, reply_markup=keyboard)
+    await callback_query.answer()
+
+
+async def handle_plan_flow(
+    callback_query: CallbackQuery,
+    state: FSMContext,
+    prefix: str,
+    settings_key: str,
+    plan_key: str,
+    stale_text: str,
+    render_settings: Callable[[dict], SettingsView],
+    update_settings: Callable[[dict, str], None],
+    build_preview: Callable[[dict], Tuple[Optional[dict], str]],
+    apply: Callable[[dict, CallbackQuery], Awaitable[None]],
+):
+    """
+    Handle one "<prefix>_<action>" callback of the flow.
+
+    build_preview(settings) returns (changes, preview text) or (None, alert text);
+    apply(changes, callback_query) writes the changes and edits the message;
+    update_settings(settings, action) changes settings in place for any other action.
+    """
+    data = await state.get_data()
+    settings = data.get(settings_key)
+    if not settings:
+        await callback_query.answer(stale_text, show_alert=True)
+        return
+
+    action = callback_query.data[len(prefix) + 1:]
+
+    if action == "preview":
+        changes, text = build_preview(settings)
+        if changes is None:
+            await callback_query.answer(text, show_alert=True)
+            return
+        await state.update_data(**{plan_key: changes})
+        await callback_query.message.edit_text(text, reply_markup=create_plan_preview_keyboard(prefix))
+        await callback_query.answer()
+        return
+
+    if action == "apply":
+        changes = data.get(plan_key)
+        if not changes:
+            await callback_query.answer("Сначала сделайте предпросмотр", show_alert=True)
+            return
+        await state.update_data(**{settings_key: None, plan_key: None})
+        await apply(changes, callback_query)
+        await callback_query.answer()
+        return
+
+    update_settings(settings, action)
+    await state.update_data(**{settings_key: settings, plan_key: None})
+    text, keyboard = render_settings(settings)
+    try:
+        await callback_query.message.edit_text(text, reply_markup=keyboard)
+    except TelegramBadRequest:
+        pass
+    await callback_query.answer()
@@ -0,0 +1,188 @@
+"""
+Bulk race results import from a timing-system CSV.
+
+Pure parsing/validation: plan_results_import() matches rows to participants
+by bib number or user_id and validates every result before anything is
+written with bulk_set_results().
+"""
+
+import csv
+import html
+import re
+from io import StringIO
+from typing import Dict, List, Optional, Tuple
+
+from database import (
+    PARTICIPANT_BIB,
+    PARTICIPANT_CATEGORY,
+    PARTICIPANT_NAME,
+    PARTICIPANT_RESULT,
+    PARTICIPANT_ROLE,
+    PARTICIPANT_USER_ID,
+)
+from .validation import validate_result_format
+
+KEY_BIB = "bib"
+KEY_USER_ID = "user_id"
+
+CSV_ENCODINGS = ["utf-8-sig", "utf-8", "cp1251"]
+
+# Названия столбцов, которые встречаются в выгрузках систем хронометража
+BIB_HEADERS = {"bib", "bib_number", "номер", "стартовый номер", "беговой номер", "no", "№"}
+USER_ID_HEADERS = {"user_id", "id", "telegram_id", "tg_id"}
+RESULT_HEADERS = {"result", "time", "finish", "результат", "время", "финиш"}
+
+
+def decode_csv(data: bytes) -> Optional[str]:
+    """Decode an uploaded CSV trying the encodings used by Excel and timing systems"""
+    for encoding in CSV_ENCODINGS:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return None
+
+
+def normalize_result(value: str) -> str:
+    """Bring timing-system output (00:07:45.12, 7:45.1) to the MM:SS,MS format"""
+    value = value.strip().replace(".", ",")
+    # Часы в выгрузке хронометража: 0:07:45,12 -> 07:45,12
+    match = re.match(r"^0{1,2}:(\d{1,2}:\d{2}(?:,\d+)?)$", value)
+    if match:
+        value = match.group(1)
+    if "," in value:
+        main, fraction = value.split(",", 1)
+        # Сотые доли: 7:45,1 -> 7:45,10, 7:45,123 -> 7:45,12
+        value = f"{main},{fraction[:2].ljust(2, '0')}"
+    return value
+
+
+def _detect_columns(header: List[str]) -> Optional[Tuple[int, str, int]]:
+    """Find (key column, key type, result column) in a header row"""
+    names = [cell.strip().lower() for cell in header]
+    key_index = key_type = result_index = None
+    for index, name in enumerate(names):
+        if name in BIB_HEADERS and key_index is None:
+            key_index, key_type = index, KEY_BIB
+        elif name in USER_ID_HEADERS and key_index is None:
+            key_index, key_type = index, KEY_USER_ID
+        elif name in RESULT_HEADERS and result_index is None:
+            result_index = index
+    if key_index is None or result_index is None:
+        return None
+    return key_index, key_type, result_index
+
+
+def parse_results_csv(content: str, key_type: str = KEY_BIB) -> Tuple[List[Tuple[int, str, str]], str]:
+    """
+    Parse CSV content into (line, key, result) rows.
+
+    A header row with known column names selects the key and result columns;
+    without a header the first column is the key (key_type) and the second the result.
+
+    Returns:
+        (rows, key_type actually used)
+    """
+    try:
+        dialect = csv.Sniffer().sniff(content[:4096], delimiters=";,\t")
+        delimiter = dialect.delimiter
+    except csv.Error:
+        delimiter = ";"
+
+    reader = csv.reader(StringIO(content), delimiter=delimiter)
+    rows: List[Tuple[int, str, str]] = []
+    key_index, result_index = 0, 1
+    for line, row in enumerate(reader, start=1):
+        if not any(cell.strip() for cell in row):
+            continue
+        if line == 1:
+            columns = _detect_columns(row)
+            if columns:
+                key_index, key_type, result_index = columns
+                continue
+        if len(row) <= max(key_index, result_index):
+            rows.append((line, row[0].strip() if row else "", ""))
+            continue
+        rows.append((line, row[key_index].strip(), row[result_index].strip()))
+    return rows, key_type
+
+
+def plan_results_import(
+    rows: List[Tuple[int, str, str]], participants: List[tuple], key_type: str = KEY_BIB
+) -> dict:
+    """
+    Validate all rows and match them to runners.
+
+    Returns:
+        dict with "updates" [(result, user_id)] ready for executemany,
+        "invalid" [(line, key, value, error)], "unknown" [(line, key)],
+        "duplicates" [(line, key)] and "missing" [names of runners without a result]
+    """
+    runners = [p for p in participants if p[PARTICIPANT_ROLE] == "runner"]
+    if key_type == KEY_USER_ID:
+        index = {str(p[PARTICIPANT_USER_ID]): p for p in runners}
+    else:
+        # Номера сравниваются как числа: "7" в протоколе совпадает с "007" в базе
+        index = {}
+        for participant in runners:
+            bib = str(participant[PARTICIPANT_BIB] or "").strip()
+            if bib:
+                index[bib.lstrip("0") or "0"] = participant
+
+    plan = {"updates": [], "invalid": [], "unknown": [], "duplicates": [], "missing": []}
+    seen: Dict[int, int] = {}
+    for line, key, value in rows:
+        lookup = key if key_type == KEY_USER_ID else (key.lstrip("0") or "0")
+        participant = index.get(lookup)
+        if participant is None:
+            plan["unknown"].append((line, key))
+            continue
+        if participant[PARTICIPANT_USER_ID] in seen:
+            plan["duplicates"].append((line, key))
+            continue
+
+        result = normalize_result(value)
+        is_valid, error = validate_result_format(result)
+        if not is_valid:
+            plan["invalid"].append((line, key, value, error))
+            continue
+        seen[participant[PARTICIPANT_USER_ID]] = line
+        plan["updates"].append((result, participant[PARTICIPANT_USER_ID]))
+
+    plan["missing"] = [
+        p[PARTICIPANT_NAME]
+        for p in runners
+        if p[PARTICIPANT_USER_ID] not in seen and not p[PARTICIPANT_RESULT] and p[PARTICIPANT_CATEGORY] != "Команда"
+    ]
+    return plan
+
+
+def format_import_report(plan: dict, updated: int) -> str:
+    """Build the import summary with all mismatches for the admin"""
+    lines = [
+        "📥 <b>Импорт результатов</b>",
+        "",
+        f"✅ Записано результатов: {updated}",
+    ]
+
+    def section(title: str, items: List[str]):
+        if not items:
+            return
+        lines.append(f"\n{title} ({len(items)}):")
+        lines.extend(f"• {item}" for item in items[:15])
+        if len(items) > 15:
+            lines.append(f"• ... и ещё {len(items) - 15}")
+
+    # Ключи, значения и имена приходят из файла и базы, а отчет отправляется как HTML
+    esc = html.escape
+    section(
+        "❌ Неверный формат времени",
+        [
+            f"строка {line}: {esc(str(key))} — «{esc(str(value))}» ({esc(str(error))})"
+            for line, key, value, error in plan["invalid"]
+        ],
+    )
+    section("❓ Не найдены среди бегунов", [f"строка {line}: {esc(str(key))}" for line, key in plan["unknown"]])
+    section("🔁 Повторные строки (пропущены)", [f"строка {line}: {esc(str(key))}" for line, key in plan["duplicates"]])
+    section("⏳ Бегуны без результата", [esc(str(name)) for name in plan["missing"]])
+    return "\n".join(lines)
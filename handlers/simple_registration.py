@@ -19,7 +19,6 @@ from aiogram.types import (
     CallbackQuery,
     InlineKeyboardMarkup,
     InlineKeyboardButton,
-    FSInputFile,
 )
 from aiogram.fsm.context import FSMContext
 from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
@@ -32,15 +31,15 @@ from .utils import (
     config,
     create_gender_keyboard,
     get_participation_fee_text,
-    get_event_date_text,
-    get_event_location_text,
-    get_event_time_text,
+    render_event_message,
 )
 
 logger = get_logger(__name__)
 from .validation import validate_name, validate_time_format, sanitize_input
+from .media_cache import send_cached_photo
 from database import (
     get_participant_by_user_id,
+    clear_blocked_user,
     add_pending_registration,
     add_participant,
     get_participant_count_by_role,
@@ -106,6 +105,8 @@ async def handle_start_command(
 
     user_id = message.from_user.id
     log.command_received("/start", user_id, message.from_user.username)
+    # Пользователь снова пишет боту — он больше не заблокировал его
+    clear_blocked_user(user_id)
 
     # Проверяем наличие реферального кода в команде /start
     if message.text and len(message.text.split()) > 1:
@@ -159,9 +160,10 @@ async def handle_start_command(
                 afisha_path = "/app/images/afisha.jpeg"
                 try:
                     if os.path.exists(afisha_path):
-                        await bot.send_photo(
+                        await send_cached_photo(
+                            bot,
                             chat_id=message.from_user.id,
-                            photo=FSInputFile(afisha_path),
+                            path=afisha_path,
                             caption=messages["registration_closed"],
                             parse_mode="HTML",
                         )
@@ -430,18 +432,14 @@ async def handle_start_command(
 
     # Отправляем стартовое сообщение с афишей если есть
     try:
-        start_message = messages["start_message"].format(
-            fee=get_participation_fee_text(),
-            event_date=get_event_date_text(),
-            event_time=get_event_time_text(),
-            event_location=get_event_location_text(),
-        )
+        start_message = render_event_message("start_message")
 
         afisha_path = "/app/images/afisha.jpeg"
         if os.path.exists(afisha_path):
-            await bot.send_photo(
+            await send_cached_photo(
+                bot,
                 chat_id=user_id,
-                photo=FSInputFile(path=afisha_path),
+                path=afisha_path,
                 caption=start_message,
                 reply_markup=create_start_registration_keyboard(),
             )
@@ -452,12 +450,7 @@ async def handle_start_command(
     except Exception as e:
         logger.error(f"Ошибка при отправке стартового сообщения: {e}")
         await message.answer(
-            messages["start_message"].format(
-                fee=get_participation_fee_text(),
-                event_date=get_event_date_text(),
-                event_time=get_event_time_text(),
-                event_location=get_event_location_text(),
-            ),
+            render_event_message("start_message"),
             reply_markup=create_start_registration_keyboard(),
         )
 
@@ -687,9 +680,10 @@ async def handle_gender_selection(
                     "sponsor_image_path", "/app/images/sponsor_image.jpeg"
                 )
                 if os.path.exists(sponsor_image_path):
-                    await bot.send_photo(
+                    await send_cached_photo(
+                        bot,
                         chat_id=user_id,
-                        photo=FSInputFile(path=sponsor_image_path),
+                        path=sponsor_image_path,
                         caption="🤝 Наши спонсоры",
                     )
             except Exception as e:
@@ -1243,9 +1237,10 @@ async def handle_team_gender_selection(
                         "sponsor_image_path", "/app/images/sponsor_image.jpeg"
                     )
                     if os.path.exists(sponsor_image_path):
-                        await bot.send_photo(
+                        await send_cached_photo(
+                            bot,
                             chat_id=user_id,
-                            photo=FSInputFile(path=sponsor_image_path),
+                            path=sponsor_image_path,
                             caption="🤝 Наши спонсоры",
                         )
                 except Exception as e:
@@ -1532,9 +1527,10 @@ async def handle_team_gender_selection(
                     "sponsor_image_path", "/app/images/sponsor_image.jpeg"
                 )
                 if os.path.exists(sponsor_image_path):
-                    await bot.send_photo(
+                    await send_cached_photo(
+                        bot,
                         chat_id=user_id,
-                        photo=FSInputFile(path=sponsor_image_path),
+                        path=sponsor_image_path,
                         caption="🤝 Наши спонсоры",
                     )
             except Exception as e:
@@ -1910,12 +1906,7 @@ def register_simple_registration_handlers(dp: Dispatcher, bot: Bot, admin_id: in
             return
 
         # Отправляем стартовое сообщение
-        start_message = messages["start_message"].format(
-            fee=get_participation_fee_text(),
-            event_date=get_event_date_text(),
-            event_time=get_event_time_text(),
-            event_location=get_event_location_text(),
-        )
+        start_message = render_event_message("start_message")
 
         await callback.message.edit_text(
             start_message, reply_markup=create_start_registration_keyboard()
@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+import time
+from collections.abc import Mapping
+from string import Formatter
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+MESSAGES_PATH = "messages.json"
+
+# Плейсхолдеры, которые подставляет код бота. Шаблоны с другими полями
+# отклоняются при загрузке, чтобы не получить KeyError в момент отправки.
+EVENT_PLACEHOLDERS = frozenset({"fee", "event_date", "event_time", "event_location"})
+ALLOWED_PLACEHOLDERS: Dict[str, FrozenSet[str]] = {
+    "start_message": EVENT_PLACEHOLDERS,
+    "info_message": EVENT_PLACEHOLDERS,
+    "notify_all_message": EVENT_PLACEHOLDERS,
+}
+
+_formatter = Formatter()
+
+
+class TemplateError(ValueError):
+    pass
+
+
+class Template:
+    """A message template compiled once into literal/field segments."""
+
+    __slots__ = ("key", "text", "fields", "_segments")
+
+    def __init__(self, key: str, text: str, segments: Optional[List[Tuple[bool, str]]] = None):
+        self.key = key
+        self.text = text
+        # (is_field, value): literal text or field name
+        self._segments = segments if segments is not None else self._compile(key, text)
+        self.fields = frozenset(value for is_field, value in self._segments if is_field)
+
+    @staticmethod
+    def _compile(key: str, text: str) -> List[Tuple[bool, str]]:
+        segments: List[Tuple[bool, str]] = []
+        try:
+            for literal, field, spec, conversion in _formatter.parse(text):
+                if literal:
+                    segments.append((False, literal))
+                if field is None:
+                    continue
+                if not field.isidentifier() or spec or conversion:
+                    raise TemplateError(
+                        f"Шаблон '{key}': неподдерживаемый плейсхолдер {{{field}}}"
+                    )
+                segments.append((True, field))
+        except ValueError as e:
+            if isinstance(e, TemplateError):
+                raise
+            raise TemplateError(f"Шаблон '{key}': ошибка разметки плейсхолдеров: {e}")
+        return segments
+
+    def render(self, **values) -> str:
+        parts = []
+        for is_field, value in self._segments:
+            if is_field:
+                try:
+                    value = str(values[value])
+                except KeyError:
+                    raise TemplateError(f"Шаблон '{self.key}': не передано значение для {value}")
+            parts.append(value)
+        return "".join(parts)
+
+
+class MessageRegistry(Mapping):
+    """
+    Shared registry of messages.json templates.
+
+    Behaves like the old messages dict (messages["key"] returns raw text), but
+    compiles and validates every template on load and reloads the file
+    atomically when its mtime changes. All modules import the same instance,
+    so an update from one handler is immediately visible everywhere.
+    """
+
+    def __init__(self, path: str = MESSAGES_PATH, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._templates: Dict[str, Template] = {}
+        self._mtime_ns = 0
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.reload(strict=True)
+
+    # --- loading -------------------------------------------------------------
+
+    def _compile_all(self, raw: dict) -> Dict[str, Template]:
+        compiled = {}
+        for key, text in raw.items():
+            if not isinstance(text, str):
+                raise TemplateError(f"Шаблон '{key}' должен быть строкой")
+            template = Template(key, text)
+            self._validate(template)
+            compiled[key] = template
+        return compiled
+
+    @staticmethod
+    def _validate(template: Template):
+        allowed = ALLOWED_PLACEHOLDERS.get(template.key)
+        if allowed is not None and not template.fields <= allowed:
+            unknown = ", ".join(sorted(template.fields - allowed))
+            raise TemplateError(
+                f"Шаблон '{template.key}': неизвестные плейсхолдеры {unknown}. "
+                f"Допустимые: {', '.join(sorted(allowed))}"
+            )
+
+    def reload(self, strict: bool = False) -> bool:
+        """
+        Re-read and recompile messages.json.
+
+        On error the previous templates stay active unless strict is set
+        (used on startup, where there is nothing to fall back to).
+        """
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+            with open(self.path, "r", encoding="utf-8") as f:
+                compiled = self._compile_all(json.load(f))
+        except FileNotFoundError:
+            logger.error("Файл messages.json не найден")
+            if strict:
+                raise
+            return False
+        except (json.JSONDecodeError, TemplateError) as e:
+            logger.error(f"Ошибка при разборе messages.json: {e}")
+            if strict:
+                raise
+            return False
+
+        with self._lock:
+            self._templates = compiled
+            self._mtime_ns = mtime_ns
+        if not strict:
+            logger.info(f"messages.json перезагружен, шаблонов: {len(compiled)}")
+        return True
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime_ns != self._mtime_ns:
+            self.reload()
+
+    # --- access --------------------------------------------------------------
+
+    def template(self, key: str) -> Template:
+        self._maybe_reload()
+        return self._templates[key]
+
+    def __getitem__(self, key: str) -> str:
+        return self.template(key).text
+
+    def __iter__(self) -> Iterator[str]:
+        self._maybe_reload()
+        return iter(self._templates)
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    # --- updates -------------------------------------------------------------
+
+    def update_message(self, key: str, text: str):
+        """
+        Validate a new text and persist it to messages.json.
+
+        Raises TemplateError if the text has unknown or malformed placeholders.
+        """
+        template = Template(key, text)
+        self._validate(template)
+
+        with self._lock:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                raw = {k: t.text for k, t in self._templates.items()}
+            raw[key] = text
+
+            # Файл пишется на месте: в docker-compose messages.json смонтирован
+            # отдельным файлом, и os.replace() на него не работает. Текст
+            # сериализуется заранее, чтобы ошибка не оставила файл обрезанным.
+            data = json.dumps(raw, ensure_ascii=False, indent=2)
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write(data)
+
+            templates = dict(self._templates)
+            templates[key] = template
+            self._templates = templates
+            self._mtime_ns = os.stat(self.path).st_mtime_ns
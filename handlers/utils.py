@@ -3,25 +3,18 @@ from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 # Импортируем централизованную систему логирования
+from app_config import get_config
 from logging_config import get_logger, log_level, log, LogHelper
+from .templates import MessageRegistry
 
 logger = get_logger(__name__)
 
-try:
-    with open("messages.json", "r", encoding="utf-8") as f:
-        messages = json.load(f)
-    # logger.info("Файл messages.json успешно загружен")
-except FileNotFoundError:
-    logger.error("Файл messages.json не найден")
-    raise
-except json.JSONDecodeError as e:
-    logger.error(f"Ошибка при разборе messages.json: {e}")
-    raise
+# Общий реестр шаблонов: messages["key"] возвращает текст, messages.template("key") —
+# скомпилированный шаблон. Файл перечитывается автоматически при изменении mtime.
+messages = MessageRegistry()
 
 try:
-    with open("config.json", "r", encoding="utf-8") as f:
-        config = json.load(f)
-    # logger.info("Файл config.json успешно загружен")
+    config = get_config()
 except FileNotFoundError:
     logger.error("Файл config.json не найден")
     raise
@@ -110,9 +103,15 @@ class RegistrationForm(StatesGroup):
     # Bib number info upload state
     waiting_for_bib_info_file = State()
 
+    # Results CSV import state
+    waiting_for_results_file = State()
+
     # Team registration states
     waiting_for_team_name = State()
 
+    # Participant list search state
+    waiting_for_participant_search = State()
+
     processed = State()
 
 
@@ -266,7 +265,7 @@ def create_admin_commands_keyboard():
     commands = []
 
     # Show "Создать событие" as FIRST button if no active event
-    if event_state == "no_event":
+    if event_state in ["no_event", "archived"]:
         commands.append(
             InlineKeyboardButton(
                 text="➕ Создать событие", callback_data="admin_create_event"
@@ -310,10 +309,16 @@ def create_participants_category_keyboard():
         ),
         InlineKeyboardButton(text="📊 Статистика", callback_data="admin_stats"),
         InlineKeyboardButton(text="🔢 Присвоить номер", callback_data="admin_set_bib"),
+        InlineKeyboardButton(
+            text="🔢 Автоприсвоение номеров", callback_data="admin_auto_bibs"
+        ),
         InlineKeyboardButton(text="🎯 Кластеры", callback_data="admin_clusters"),
         InlineKeyboardButton(
             text="🏃 Записать результаты", callback_data="admin_results"
         ),
+        InlineKeyboardButton(
+            text="📥 Импорт результатов (CSV)", callback_data="admin_import_results"
+        ),
         InlineKeyboardButton(
             text="🏁 Уведомить о результатах", callback_data="admin_notify_results"
         ),
@@ -335,10 +340,13 @@ def create_race_category_keyboard():
         InlineKeyboardButton(
             text="📊 Экспорт в Excel", callback_data="admin_export_excel"
         ),
+        InlineKeyboardButton(
+            text="🖨 Печать PDF/XLSX", callback_data="admin_print_documents"
+        ),
     ]
 
     # Show "Закончить мероприятие" only if there are participants and no archive
-    if event_state in ["active_event", "finished_not_archived", "has_participants_no_archive"]:
+    if event_state in ["active_event", "finished_not_archived"]:
         commands.append(
             InlineKeyboardButton(
                 text="🏁 Закончить актуальное мероприятие",
@@ -546,6 +554,23 @@ def get_event_time_text():
         return "14:00"  # Default placeholder
 
 
+EVENT_TEXT_GETTERS = {
+    "fee": get_participation_fee_text,
+    "event_date": get_event_date_text,
+    "event_time": get_event_time_text,
+    "event_location": get_event_location_text,
+}
+
+
+def render_event_message(key: str, **values) -> str:
+    """Render a template with event placeholders, querying only the fields it uses"""
+    template = messages.template(key)
+    for field in template.fields:
+        if field not in values and field in EVENT_TEXT_GETTERS:
+            values[field] = EVENT_TEXT_GETTERS[field]()
+    return template.render(**values)
+
+
 def create_clusters_category_keyboard():
     """Create clusters category keyboard"""
     keyboard = InlineKeyboardMarkup(
@@ -559,6 +584,12 @@ def create_clusters_category_keyboard():
                     callback_data="admin_assign_clusters",
                 ),
             ],
+            [
+                InlineKeyboardButton(
+                    text="🤖 Автораспределение по времени",
+                    callback_data="admin_auto_clusters",
+                ),
+            ],
             [
                 InlineKeyboardButton(
                     text="📋 Посмотреть распределение",
@@ -579,6 +610,11 @@ def create_clusters_category_keyboard():
                     text="💾 Скачать CSV", callback_data="admin_download_csv"
                 ),
             ],
+            [
+                InlineKeyboardButton(
+                    text="🖨 Печать PDF/XLSX", callback_data="admin_print_documents"
+                ),
+            ],
             [
                 InlineKeyboardButton(
                     text="🔄 Сбросить категории", callback_data="admin_clear_categories"
@@ -595,6 +631,46 @@ def create_clusters_category_keyboard():
     return keyboard
 
 
+def create_print_documents_keyboard():
+    """Create keyboard for printable start lists and protocols"""
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text="📋 Старт-лист PDF по кластерам",
+                    callback_data="printdoc_start_pdf_cluster",
+                ),
+            ],
+            [
+                InlineKeyboardButton(
+                    text="📋 Старт-лист PDF по категориям",
+                    callback_data="printdoc_start_pdf_category",
+                ),
+            ],
+            [
+                InlineKeyboardButton(
+                    text="📊 Старт-лист XLSX", callback_data="printdoc_start_xlsx_cluster"
+                ),
+            ],
+            [
+                InlineKeyboardButton(
+                    text="🏆 Протокол PDF по категориям",
+                    callback_data="printdoc_protocol_pdf_category",
+                ),
+            ],
+            [
+                InlineKeyboardButton(
+                    text="🏆 Протокол XLSX", callback_data="printdoc_protocol_xlsx_category"
+                ),
+            ],
+            [
+                InlineKeyboardButton(text="⬅️ Назад", callback_data="category_race"),
+            ],
+        ]
+    )
+    return keyboard
+
+
 def create_category_selection_keyboard(current_index: int = 0, total_count: int = 1):
     """Create keyboard for category selection with navigation"""
     # Category selection buttons
@@ -250,4 +250,32 @@ def validate_result_format(result: str) -> Tuple[bool, Optional[str]]:
 
         return True, None
     else:
-        return False, "Неверный формат времени. Используйте формат ММ:СС,МС (например, 08:45,50) или ММ:СС (например, 7:30)."
\ No newline at end of file
+        return False, "Неверный формат времени. Используйте формат ММ:СС,МС (например, 08:45,50) или ММ:СС (например, 7:30)."
+
+
+def time_to_seconds(time_str: str) -> Optional[float]:
+    """
+    Convert MM:SS, H:MM:SS or MM:SS,MS string to seconds.
+
+    Returns:
+        Optional[float]: seconds, or None if the string cannot be parsed
+    """
+    if not time_str:
+        return None
+
+    time_str = time_str.strip().replace(".", ",")
+    fraction = 0.0
+    if "," in time_str:
+        time_str, ms = time_str.split(",", 1)
+        if not ms.isdigit():
+            return None
+        fraction = int(ms) / (10 ** len(ms))
+
+    parts = time_str.split(":")
+    if not 2 <= len(parts) <= 3 or not all(p.isdigit() for p in parts):
+        return None
+
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + int(part)
+    return seconds + fraction
@@ -8,10 +8,13 @@ import logging.handlers
 import os
 import sys
 import asyncio
+import pytz
 from typing import Dict, Any, Optional
 import traceback
 import threading
 
+from app_config import get_config
+
 
 class ColorCodes:
     """ANSI цветовые коды для терминала."""
@@ -300,8 +303,6 @@ class TelegramHandler(logging.Handler):
     def format_telegram_message(self, record) -> str:
         """Форматирование сообщения для Telegram."""
         from datetime import datetime
-        import pytz
-        
         level_emoji = {
             'ERROR': '❌',
             'CRITICAL': '🔥'
@@ -476,9 +477,7 @@ class LoggingConfig:
     def _load_config(self) -> Dict[str, Any]:
         """Загрузка конфигурации из config.json."""
         try:
-            with open(self.config_path, "r", encoding="utf-8") as f:
-                config = json.load(f)
-            return config
+            return get_config(self.config_path)
         except FileNotFoundError:
             print(f"Файл {self.config_path} не найден, используем настройки по умолчанию")
             return {"log_level": "INFO"}
@@ -1,17 +1,25 @@
 import asyncio
+import json
 import os
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import BotCommand
 from aiogram.enums import ParseMode
 
+from app_config import get_config
 # Импортируем централизованную систему логирования
 from logging_config import get_logger, log, setup_telegram_logging
 
 from database import init_db
 from handlers.backup_handlers import start_automatic_backups, stop_automatic_backups
+from handlers.event_handlers import start_event_timer, stop_event_timer
+from handlers.audit_log import start_audit_writer, stop_audit_writer
+from handlers.documents import shutdown_document_executor
 from handler_register import register_all_handlers
+from middlewares import ThrottlingMiddleware, UpdateSchedulerMiddleware
 
 # Получаем логгер для main модуля
 logger = get_logger(__name__)
@@ -26,10 +34,56 @@ except KeyError as e:
     log.system_event("Environment variable missing", f"Missing: {e}")
     raise
 
-bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+# Адрес Bot API можно переопределить (локальный Bot API сервер или нагрузочный тест)
+TELEGRAM_API_URL = os.environ.get("TELEGRAM_API_URL")
+session = (
+    AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL))
+    if TELEGRAM_API_URL
+    else None
+)
+
+bot = Bot(
+    token=BOT_TOKEN,
+    session=session,
+    default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+)
 dp = Dispatcher(storage=MemoryStorage())
 
 
+def load_middleware_config() -> dict:
+    try:
+        return get_config()
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logger.error(f"Не удалось загрузить настройки middleware из config.json: {e}")
+        return {}
+
+
+def setup_middlewares():
+    config = load_middleware_config()
+    scheduler_config = config.get("scheduler", {})
+    throttling_config = config.get("throttling", {})
+
+    # Троттлинг регистрируется первым: дубликаты отбрасываются до постановки в очередь пользователя
+    throttling = ThrottlingMiddleware(
+        admin_id=ADMIN_ID,
+        rate=throttling_config.get("rate_per_second", 1.0),
+        burst=throttling_config.get("burst", 5),
+    )
+    dp.update.outer_middleware(throttling)
+
+    scheduler = UpdateSchedulerMiddleware(
+        admin_id=ADMIN_ID,
+        max_concurrent=scheduler_config.get("max_concurrent_updates", 50),
+        admin_concurrent=scheduler_config.get("admin_concurrent_updates", 4),
+    )
+    dp.update.outer_middleware(scheduler)
+    log.system_event(
+        "Update middlewares configured",
+        f"throttling rate={throttling.rate}/s burst={throttling.burst}, "
+        f"scheduler max_concurrent={scheduler.max_concurrent}, admin_concurrent={scheduler.admin_concurrent}",
+    )
+
+
 async def main():
     log.bot_startup("Initializing beermile registration bot")
     
@@ -37,10 +91,17 @@ async def main():
     setup_telegram_logging(bot)
     
     init_db()
+    setup_middlewares()
     register_all_handlers(dp, bot, ADMIN_ID)
     
     # Start automatic backups
     await start_automatic_backups(bot, ADMIN_ID)
+
+    # Start event deadline timer (active -> finished at reg_end_date)
+    await start_event_timer()
+
+    # Start batched audit log writer
+    await start_audit_writer(load_middleware_config().get("audit_log", {}))
     
     await bot.set_my_commands(
         [
@@ -60,6 +121,7 @@ async def main():
             allowed_updates=None,    # Получаем все типы обновлений
             relax=0.1,              # Пауза между запросами при ошибках (0.1 сек)
             fast=True,              # Быстрый режим (меньше задержек)
+            handle_as_tasks=True,   # Апдейты обрабатываются конкурентно, лимиты задает UpdateSchedulerMiddleware
         )
     except KeyboardInterrupt:
         log.system_event("Bot shutdown", "Received keyboard interrupt")
@@ -68,6 +130,9 @@ async def main():
     finally:
         # Stop automatic backups on shutdown
         await stop_automatic_backups()
+        await stop_event_timer()
+        await stop_audit_writer()
+        shutdown_document_executor()
         log.system_event("Bot shutdown", "Cleanup completed")
 
 
@@ -0,0 +1,4 @@
+from middlewares.scheduler import UpdateSchedulerMiddleware
+from middlewares.throttling import ThrottlingMiddleware
+
+__all__ = ["UpdateSchedulerMiddleware", "ThrottlingMiddleware"]
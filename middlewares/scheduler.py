@@ -0,0 +1,86 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import Chat, TelegramObject, User
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class _KeyLock:
+    """asyncio.Lock with a reference counter so idle keys can be dropped."""
+
+    __slots__ = ("lock", "refs")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.refs = 0
+
+
+class UpdateSchedulerMiddleware(BaseMiddleware):
+    """
+    Outer update middleware that bounds concurrent update processing.
+
+    - updates of one (user_id, chat_id) pair are processed strictly in order,
+      so FSM flows of a single user never race;
+    - updates of different users run concurrently, at most max_concurrent at once;
+    - admin updates use a separate lane and never wait behind user traffic.
+    """
+
+    def __init__(
+        self,
+        admin_id: int,
+        max_concurrent: int = 50,
+        admin_concurrent: int = 4,
+    ):
+        self.admin_id = admin_id
+        self.max_concurrent = max_concurrent
+        self.admin_concurrent = admin_concurrent
+        self._user_lane = asyncio.Semaphore(max_concurrent)
+        self._admin_lane = asyncio.Semaphore(admin_concurrent)
+        self._locks: Dict[Tuple[Optional[int], Optional[int]], _KeyLock] = {}
+
+    def _acquire_key(self, key: Tuple[Optional[int], Optional[int]]) -> _KeyLock:
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = _KeyLock()
+            self._locks[key] = entry
+        entry.refs += 1
+        return entry
+
+    def _release_key(self, key: Tuple[Optional[int], Optional[int]], entry: _KeyLock):
+        entry.refs -= 1
+        if entry.refs == 0 and self._locks.get(key) is entry:
+            del self._locks[key]
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user: Optional[User] = data.get("event_from_user")
+        chat: Optional[Chat] = data.get("event_chat")
+        if user is None and chat is None:
+            return await handler(event, data)
+
+        key = (user.id if user else None, chat.id if chat else None)
+        is_admin = user is not None and user.id == self.admin_id
+        lane = self._admin_lane if is_admin else self._user_lane
+
+        # Порядок захвата: сначала ключ пользователя (сохраняет порядок апдейтов),
+        # затем слот в полосе, чтобы ожидающие апдейты не занимали общие слоты
+        entry = self._acquire_key(key)
+        try:
+            async with entry.lock:
+                async with lane:
+                    return await handler(event, data)
+        finally:
+            self._release_key(key, entry)
+
+    @property
+    def active_keys(self) -> int:
+        """Number of (user, chat) pairs with in-flight or queued updates."""
+        return len(self._locks)
@@ -0,0 +1,107 @@
+import time
+from typing import Any, Awaitable, Callable, Dict, Set, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from logging_config import get_logger
+from handlers.utils import messages
+
+logger = get_logger(__name__)
+
+
+class _TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated = now
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Outer update middleware with a per-user token bucket and in-flight
+    deduplication of identical callbacks.
+
+    Must be registered before UpdateSchedulerMiddleware so that duplicates
+    are dropped while the original update is still queued or running.
+    """
+
+    def __init__(
+        self,
+        admin_id: int,
+        rate: float = 1.0,
+        burst: int = 5,
+        max_buckets: int = 10000,
+    ):
+        self.admin_id = admin_id
+        self.rate = rate
+        self.burst = burst
+        self.max_buckets = max_buckets
+        self._buckets: Dict[int, _TokenBucket] = {}
+        self._in_flight: Set[Tuple[int, str]] = set()
+
+    def _consume(self, user_id: int) -> bool:
+        now = time.monotonic()
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            if len(self._buckets) >= self.max_buckets:
+                self._prune(now)
+            bucket = _TokenBucket(self.burst, now)
+            self._buckets[user_id] = bucket
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+
+        if bucket.tokens < 1:
+            return False
+        bucket.tokens -= 1
+        return True
+
+    def _prune(self, now: float):
+        """Drop buckets that have fully refilled - they carry no state."""
+        refill_time = self.burst / self.rate if self.rate > 0 else 0
+        stale = [uid for uid, b in self._buckets.items() if now - b.updated >= refill_time]
+        for uid in stale:
+            del self._buckets[uid]
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None or user.id == self.admin_id or not isinstance(event, Update):
+            return await handler(event, data)
+
+        callback = event.callback_query
+        dedup_key = None
+        if callback is not None:
+            dedup_key = (user.id, callback.data or "")
+            if dedup_key in self._in_flight:
+                logger.debug(f"Повторный callback {callback.data} от user_id={user.id} пропущен")
+                await self._answer_silently(callback, messages["duplicate_callback"])
+                return None
+
+        if not self._consume(user.id):
+            logger.warning(f"Превышен лимит запросов для user_id={user.id}")
+            if callback is not None:
+                await self._answer_silently(callback, messages["throttle_warning"])
+            return None
+
+        if dedup_key is None:
+            return await handler(event, data)
+
+        self._in_flight.add(dedup_key)
+        try:
+            return await handler(event, data)
+        finally:
+            self._in_flight.discard(dedup_key)
+
+    @staticmethod
+    async def _answer_silently(callback, text: str):
+        try:
+            await callback.answer(text)
+        except Exception as e:
+            logger.debug(f"Не удалось ответить на callback {callback.id}: {e}")
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Fresh database in a temp directory, used by every database function"""
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "race_participants.db"))
+    monkeypatch.setattr(database, "DB_READ_URI", None)
+    database.init_db()
+    yield database
+    database.flush_events()
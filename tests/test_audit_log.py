@@ -0,0 +1,74 @@
+"""Audit events: buffered writes, append-only table and the background writer."""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from handlers import audit_log
+
+
+def _event_rows(db):
+    with sqlite3.connect(db.DB_PATH) as conn:
+        return conn.execute("SELECT user_id, event_type, payload FROM events ORDER BY id").fetchall()
+
+
+def test_events_are_buffered_until_flush(db):
+    db.flush_events()
+    db.record_event(db.EVENT_PAYMENT, 1, status="paid")
+    db.record_event(db.EVENT_BIB, 1, bib_number="7")
+
+    assert _event_rows(db) == []
+    assert db.pending_events_count() == 2
+    assert db.flush_events() == 2
+    assert [row[1] for row in _event_rows(db)] == [db.EVENT_PAYMENT, db.EVENT_BIB]
+    assert db.pending_events_count() == 0
+
+
+@pytest.mark.parametrize("statement", ["UPDATE events SET event_type = 'x'", "DELETE FROM events"])
+def test_events_table_is_append_only(db, statement):
+    db.record_event(db.EVENT_PAYMENT, 1, status="paid")
+    db.flush_events()
+
+    with sqlite3.connect(db.DB_PATH) as conn:
+        with pytest.raises(sqlite3.IntegrityError, match="append-only"):
+            conn.execute(statement)
+    assert len(_event_rows(db)) == 1
+
+
+def test_failed_batch_is_retried_then_dropped(db, monkeypatch):
+    db.flush_events()
+    monkeypatch.setattr(db, "_event_flush_failures", 0)
+    def locked(path, rows):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(db, "_write_events", locked)
+    db.record_event(db.EVENT_PAYMENT, 1, status="paid")
+
+    for _ in range(db.EVENT_FLUSH_MAX_ATTEMPTS - 1):
+        assert db.flush_events() == -1
+        assert db.pending_events_count() == 1
+    db.flush_events()
+    assert db.pending_events_count() == 0
+
+
+def test_writer_keeps_running_after_an_error(monkeypatch):
+    calls = []
+
+    def flaky_flush():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ValueError("bad payload")
+        return 1
+
+    monkeypatch.setattr(audit_log, "flush_events", flaky_flush)
+    monkeypatch.setattr(audit_log, "pending_events_count", lambda: 1)
+
+    async def run():
+        task = asyncio.create_task(audit_log.audit_writer(0.01))
+        while len(calls) < 3:
+            await asyncio.sleep(0.01)
+        assert not task.done()
+        task.cancel()
+
+    asyncio.run(asyncio.wait_for(run(), timeout=5))
@@ -0,0 +1,77 @@
+"""Bib number planning (handlers.bib_allocation) and the bulk write with the unique bib index."""
+
+from handlers.bib_allocation import (
+    ORDER_CLUSTER,
+    ORDER_TIME,
+    build_bib_plan,
+    parse_bib_ranges,
+    reserved_from_bib_info,
+)
+
+
+def _row(user_id, target_time="7:00", bib=None, cluster=None, category=None, role="runner"):
+    """Row shaped like get_all_participants()"""
+    return (user_id, f"user{user_id}", f"Бегун {user_id}", target_time, role, "2025-01-01",
+            "pending", bib, None, "male", category, cluster, None, None)
+
+
+def test_parse_bib_ranges_skips_malformed_items():
+    assert parse_bib_ranges(["13", "1-3", " 20 - 18 ", 42, "x", "5-", "", None]) == {1, 2, 3, 13, 18, 19, 20, 42}
+    assert parse_bib_ranges(None) == set()
+
+
+def test_reserved_markers_and_leading_zeros():
+    rows = [("007", "Резерв для гостей"), ("8", "excluded"), ("9", "обычный"), ("A1", "резерв"), ("10", None)]
+    assert reserved_from_bib_info(rows) == {7, 8}
+
+
+def test_existing_bib_with_leading_zeros_is_not_handed_out_again():
+    participants = [_row(1, bib="007"), _row(2, "6:00"), _row(3, "8:00")]
+    plan = build_bib_plan(participants, order_by=ORDER_TIME, start=6)
+    assert plan["assignments"] == {2: "6", 3: "8"}
+    assert plan["kept"] == 1
+
+
+def test_reserved_and_used_numbers_are_skipped_past_the_range():
+    participants = [_row(1, bib="4"), _row(2, "6:00"), _row(3, "7:00"), _row(4, role="volunteer")]
+    plan = build_bib_plan(participants, start=1, reserved=parse_bib_ranges(["1-3"]), pad_width=3)
+    assert plan["assignments"] == {2: "005", 3: "006"}
+    assert plan["reserved"] == 3
+
+
+def test_overwrite_renumbers_everyone_in_cluster_order():
+    participants = [_row(1, "6:00", bib="3", cluster="B"), _row(2, "7:00", bib="1", cluster="A"), _row(3, "5:00")]
+    plan = build_bib_plan(participants, order_by=ORDER_CLUSTER, overwrite=True)
+    assert [row[0] for row, _ in plan["ordered"]] == [2, 1, 3]
+    assert plan["assignments"] == {2: "1", 1: "2", 3: "3"}
+
+
+def _seed(db, count=3):
+    for user_id in range(1, count + 1):
+        assert db.add_participant(user_id, f"user{user_id}", f"Бегун {user_id}", "7:00", "runner", "male")
+
+
+def _bibs(db):
+    return {row[0]: row[db.PARTICIPANT_BIB] for row in db.get_all_participants()}
+
+
+def test_bib_seven_and_zero_zero_seven_are_the_same_number(db):
+    _seed(db)
+    assert db.set_bib_number(1, "7")
+    assert not db.set_bib_number(2, "007")
+    assert db.set_bib_number(2, "A7")
+    assert _bibs(db) == {1: "7", 2: "A7", 3: None}
+
+
+def test_bulk_swap_clears_old_numbers_first(db):
+    _seed(db)
+    assert db.bulk_set_bib_numbers({1: "1", 2: "2", 3: "3"}) == 3
+    assert db.bulk_set_bib_numbers({1: "2", 2: "001"}) == 2
+    assert _bibs(db) == {1: "2", 2: "001", 3: "3"}
+
+
+def test_bulk_duplicate_changes_nothing(db):
+    _seed(db)
+    assert db.bulk_set_bib_numbers({1: "1", 2: "2"}) == 2
+    assert db.bulk_set_bib_numbers({1: "5", 3: "002"}) == -1
+    assert _bibs(db) == {1: "1", 2: "2", 3: None}
@@ -0,0 +1,63 @@
+"""fan_out: bounded concurrent delivery with TelegramRetryAfter handling."""
+
+import asyncio
+from collections import Counter
+
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from handlers.broadcast import fan_out
+
+
+class StubBot:
+    """Records delivered messages; chats in flood_chats get one RetryAfter, blocked raise Forbidden"""
+
+    def __init__(self, flood_chats=(), blocked_chats=(), retry_after=0):
+        self.flood_chats = set(flood_chats)
+        self.blocked_chats = set(blocked_chats)
+        self.retry_after = retry_after
+        self.delivered = Counter()
+        self.active = 0
+        self.peak = 0
+
+    async def send_message(self, chat_id, text):
+        method = SendMessage(chat_id=chat_id, text=text)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0)
+            if chat_id in self.flood_chats:
+                self.flood_chats.discard(chat_id)
+                raise TelegramRetryAfter(method, "Too Many Requests", self.retry_after)
+            if chat_id in self.blocked_chats:
+                raise TelegramForbiddenError(method, "bot was blocked by the user")
+            self.delivered[chat_id] += 1
+        finally:
+            self.active -= 1
+
+
+def test_every_recipient_is_delivered_once_after_retry_after():
+    bot = StubBot(flood_chats={3, 7})
+    recipients = list(range(1, 21))
+
+    async def send(chat_id):
+        await bot.send_message(chat_id=chat_id, text="Старт в 12:00")
+
+    results = asyncio.run(fan_out(recipients, send, concurrency=4))
+    assert [recipient for recipient, _ in results] == recipients
+    assert all(error is None for _, error in results)
+    assert bot.delivered == Counter({chat_id: 1 for chat_id in recipients})
+    assert bot.peak <= 4
+
+
+def test_errors_are_returned_per_recipient():
+    bot = StubBot(flood_chats={2}, blocked_chats={3})
+
+    async def send(chat_id):
+        await bot.send_message(chat_id=chat_id, text="Старт в 12:00")
+
+    results = dict(asyncio.run(fan_out([1, 2, 3], send, retries=0)))
+    assert results[1] is None
+    assert isinstance(results[2], TelegramRetryAfter)
+    assert isinstance(results[3], TelegramForbiddenError)
+    assert bot.delivered == Counter({1: 1})
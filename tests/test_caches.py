@@ -0,0 +1,20 @@
+"""In-process caches keyed by table versions."""
+
+
+def test_restore_drops_memoized_views(db, tmp_path):
+    calls = []
+
+    @db.memoize_by_table_versions("participants")
+    def view():
+        calls.append(1)
+        return len(db.get_all_participants())
+
+    assert db.add_participant(1, "user1", "Бегун 1", "7:00", "runner", "male")
+    backup = db.snapshot_database(str(tmp_path / "backup.db"))
+    assert view() == 1 and view() == 1
+    assert len(calls) == 1
+
+    # the restored file carries the same table versions, only the generation changes
+    db.restore_database(backup)
+    assert view() == 1
+    assert len(calls) == 2
@@ -0,0 +1,55 @@
+"""Start list / protocol rendering in the worker pool and the document cache."""
+
+import asyncio
+
+import pytest
+
+from handlers import documents
+
+
+@pytest.fixture
+def runners(db):
+    for user_id, cluster in [(1, "A"), (2, "A"), (3, "B")]:
+        assert db.add_participant(user_id, f"user{user_id}", f"Бегун {user_id}", "7:00", "runner", "male")
+        assert db.set_participant_cluster(user_id, cluster)
+    documents._cache.clear()
+    yield db
+    documents.shutdown_document_executor()
+    documents._cache.clear()
+
+
+def _generate(fmt):
+    return asyncio.run(
+        documents.generate_document(documents.KIND_START_LIST, fmt, documents.GROUP_CLUSTER, {"workers": 1})
+    )
+
+
+@pytest.mark.parametrize("fmt, magic", [(documents.FORMAT_PDF, b"%PDF"), (documents.FORMAT_XLSX, b"PK")])
+def test_renders_document_in_worker_and_caches_by_stamp(runners, fmt, magic):
+    content, filename = _generate(fmt)
+    assert content.startswith(magic)
+    assert filename.endswith(f".{fmt}")
+
+    stamp, cached = documents._cache[(documents.KIND_START_LIST, fmt, documents.GROUP_CLUSTER)]
+    assert stamp == (runners.get_cache_generation(), runners.get_table_versions()["participants"])
+    assert cached == content
+
+
+def test_cache_is_dropped_by_participant_change_and_generation(runners, monkeypatch):
+    key = (documents.KIND_START_LIST, documents.FORMAT_XLSX, documents.GROUP_CLUSTER)
+    _generate(documents.FORMAT_XLSX)
+    first_stamp = documents._cache[key][0]
+
+    # Пока версия не изменилась, файл отдается из кеша без пула
+    with monkeypatch.context() as patch:
+        patch.setattr(documents, "_get_executor", lambda workers: pytest.fail("rendered again"))
+        _generate(documents.FORMAT_XLSX)
+    assert documents._cache[key][0] == first_stamp
+
+    runners.set_participant_cluster(3, "A")
+    _generate(documents.FORMAT_XLSX)
+    assert documents._cache[key][0][1] > first_stamp[1]
+
+    runners.invalidate_caches()
+    _generate(documents.FORMAT_XLSX)
+    assert documents._cache[key][0][0] == first_stamp[0] + 1
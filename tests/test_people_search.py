@@ -0,0 +1,12 @@
+"""Participant name filter backed by the people_fts index."""
+
+
+def test_name_filter_is_not_capped(db):
+    for user_id in range(1, 251):
+        assert db.add_participant(user_id, f"user{user_id}", f"Иван Петров {user_id}", "7:00", "runner", "male")
+    assert db.add_participant(999, "other", "Мария Сидорова", "7:00", "runner", "male")
+
+    page = db.get_participants_page(limit=10, filters={"name": "ива пет"})
+    assert page["total"] == 250
+    assert len(list(db.iter_participants(filters={"name": "иван"}))) == 250
+    assert [row["user_id"] for row in db.iter_participants(filters={"name": "мария"})] == [999]
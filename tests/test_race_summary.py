@@ -0,0 +1,24 @@
+"""Archived race summary and the historical-runner cache."""
+
+import sqlite3
+
+
+def test_historical_participant_sees_rows_added_after_cache_load(db):
+    assert not db.is_historical_participant(1)
+
+    # another process (CLI, restore) writes the summary after the cache is loaded
+    with sqlite3.connect(db.DB_PATH) as conn:
+        conn.execute(
+            "INSERT INTO user_race_summary (user_id, races_count, runner_races) VALUES (1, 1, 1)"
+        )
+
+    assert db.is_historical_participant(1)
+    assert 1 in db.get_historical_participants()
+
+
+def test_result_seconds_match_validation_parser(db):
+    summary = db._merge_race_summary(None, "race_01_05_2024", "2024-05-01", "Бегун", "runner", "7:05,5")
+    summary = db._merge_race_summary(summary, "race_01_05_2025", "2025-05-01", "Бегун", "runner", "DNF")
+    assert summary["best_seconds"] == 425.5
+    assert summary["best_result"] == "7:05,5"
+
@@ -0,0 +1,35 @@
+"""Read paths used by the CLI must not write to the live database."""
+
+import sqlite3
+
+
+def _settings(db):
+    with sqlite3.connect(db.DB_PATH) as conn:
+        return dict(conn.execute("SELECT key, value FROM settings"))
+
+
+def _reset_event_state_cache(db, monkeypatch):
+    monkeypatch.setitem(db._event_state_cache, "state", None)
+    monkeypatch.setitem(db._event_state_cache, "expires", 0)
+
+
+def test_read_only_event_state_never_writes(db, monkeypatch):
+    db.set_setting("reg_end_date", "10:00 01.01.2020")
+    with sqlite3.connect(db.DB_PATH) as conn:
+        conn.execute("UPDATE settings SET value = 'active_event' WHERE key = 'event_state'")
+    before = _settings(db)
+
+    monkeypatch.setattr(db, "DB_READ_URI", db.read_only_uri(db.DB_PATH))
+    _reset_event_state_cache(db, monkeypatch)
+    assert db.get_event_state() == db.EVENT_STATE_FINISHED
+    assert _settings(db) == before
+
+
+def test_read_only_does_not_seed_missing_state(db, monkeypatch):
+    with sqlite3.connect(db.DB_PATH) as conn:
+        conn.execute("DELETE FROM settings WHERE key = 'event_state'")
+
+    monkeypatch.setattr(db, "DB_READ_URI", db.read_only_uri(db.DB_PATH))
+    _reset_event_state_cache(db, monkeypatch)
+    assert db.get_event_state() == db.EVENT_STATE_NO_EVENT
+    assert "event_state" not in _settings(db)
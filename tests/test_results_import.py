@@ -0,0 +1,94 @@
+"""Results CSV import: decoding, header matching, normalization and the bulk write."""
+
+import sqlite3
+
+import pytest
+
+from handlers.results_import import (
+    KEY_BIB,
+    KEY_USER_ID,
+    decode_csv,
+    normalize_result,
+    parse_results_csv,
+    plan_results_import,
+)
+
+
+def _row(user_id, bib=None, result=None, role="runner", category=None):
+    """Row shaped like get_all_participants()"""
+    return (user_id, f"user{user_id}", f"Бегун {user_id}", "7:00", role, "2025-01-01",
+            "paid", bib, result, "male", category, None, None, None)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "№;Время\n7;7:45,10\n".encode("utf-8-sig"),
+        "№;Время\n7;7:45,10\n".encode("utf-8"),
+        "№;Время\n7;7:45,10\n".encode("cp1251"),
+    ],
+)
+def test_decode_csv_known_encodings(data):
+    assert decode_csv(data) == "№;Время\n7;7:45,10\n"
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("7:45,10", "7:45,10"),
+        ("7:45.1", "7:45,10"),
+        ("00:07:45.123", "07:45,12"),
+        ("0:12:03", "12:03"),
+        (" 1:07:45,10 ", "1:07:45,10"),
+    ],
+)
+def test_normalize_result(raw, expected):
+    assert normalize_result(raw) == expected
+
+
+def test_header_selects_columns_and_key_type():
+    rows, key_type = parse_results_csv("Финиш,Name,TG_ID\n7:45.1,Ann,101\n,,\n8:00.5,Bob,102\n")
+    assert key_type == KEY_USER_ID
+    assert rows == [(2, "101", "7:45.1"), (4, "102", "8:00.5")]
+
+
+def test_without_header_first_columns_are_key_and_result():
+    rows, key_type = parse_results_csv("007;7:45,10\n8\n", key_type=KEY_BIB)
+    assert key_type == KEY_BIB
+    assert rows == [(1, "007", "7:45,10"), (2, "8", "")]
+
+
+def test_plan_matches_bibs_numerically_and_reports_problems():
+    participants = [
+        _row(1, bib="007"),
+        _row(2, bib="8"),
+        _row(3, bib="9", result="8:00,00"),
+        _row(4, bib="10"),
+        _row(5, bib="11", role="volunteer"),
+    ]
+    rows = [(1, "7", "00:07:45.1"), (2, "0007", "7:50,00"), (3, "8", "abc"), (4, "11", "9:00,00"), (5, "42", "9:00,00")]
+    plan = plan_results_import(rows, participants, KEY_BIB)
+    assert plan["updates"] == [("07:45,10", 1)]
+    assert plan["duplicates"] == [(2, "0007")]
+    assert [item[:3] for item in plan["invalid"]] == [(3, "8", "abc")]
+    assert plan["unknown"] == [(4, "11"), (5, "42")]
+    assert plan["missing"] == ["Бегун 2", "Бегун 4"]
+
+
+def test_plan_by_user_id():
+    plan = plan_results_import([(1, "2", "7:45,10"), (2, "99", "7:45,10")], [_row(2)], KEY_USER_ID)
+    assert plan["updates"] == [("7:45,10", 2)]
+    assert plan["unknown"] == [(2, "99")]
+
+
+def test_bulk_set_results_skips_unknown_user_ids(db):
+    for user_id in (1, 2):
+        assert db.add_participant(user_id, f"user{user_id}", f"Бегун {user_id}", "7:00", "runner", "male")
+    assert db.bulk_set_results([("7:45,10", 1), ("8:00,00", 99)]) == 1
+    results = {row[0]: row[db.PARTICIPANT_RESULT] for row in db.get_all_participants()}
+    assert results == {1: "7:45,10", 2: None}
+    db.flush_events()
+    with sqlite3.connect(db.DB_PATH) as conn:
+        events = conn.execute("SELECT user_id FROM events WHERE event_type = ?", (db.EVENT_RESULT,)).fetchall()
+    assert events == [(1,)]
+    assert db.bulk_set_results([]) == 0
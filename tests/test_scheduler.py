@@ -0,0 +1,94 @@
+"""UpdateSchedulerMiddleware: per-user ordering, lane limits and lock cleanup."""
+
+import asyncio
+from types import SimpleNamespace
+
+from middlewares.scheduler import UpdateSchedulerMiddleware
+
+ADMIN_ID = 1
+
+
+def _data(user_id, chat_id=None):
+    return {"event_from_user": SimpleNamespace(id=user_id), "event_chat": SimpleNamespace(id=chat_id or user_id)}
+
+
+def test_updates_of_one_user_run_in_order_and_locks_are_dropped():
+    async def scenario():
+        scheduler = UpdateSchedulerMiddleware(ADMIN_ID, max_concurrent=10)
+        log = []
+
+        async def handler(event, data):
+            log.append(("start", event))
+            # Первый апдейт выполняется дольше, второй не должен его обогнать
+            await asyncio.sleep(0.02 if event == "a1" else 0)
+            log.append(("end", event))
+            return event
+
+        first = asyncio.ensure_future(scheduler(handler, "a1", _data(2)))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(scheduler(handler, "a2", _data(2)))
+        await asyncio.sleep(0)
+        assert scheduler.active_keys == 1
+        assert await asyncio.gather(first, second) == ["a1", "a2"]
+        assert log == [("start", "a1"), ("end", "a1"), ("start", "a2"), ("end", "a2")]
+        assert scheduler.active_keys == 0
+
+    asyncio.run(scenario())
+
+
+def test_lock_is_released_when_handler_fails():
+    async def scenario():
+        scheduler = UpdateSchedulerMiddleware(ADMIN_ID)
+
+        async def handler(event, data):
+            raise RuntimeError(event)
+
+        try:
+            await scheduler(handler, "boom", _data(2))
+        except RuntimeError:
+            pass
+        assert scheduler.active_keys == 0
+
+    asyncio.run(scenario())
+
+
+def test_admin_lane_is_not_blocked_by_user_traffic():
+    async def scenario():
+        scheduler = UpdateSchedulerMiddleware(ADMIN_ID, max_concurrent=2, admin_concurrent=1)
+        release = asyncio.Event()
+        running = []
+        peak = 0
+
+        async def handler(event, data):
+            nonlocal peak
+            running.append(event)
+            peak = max(peak, len([e for e in running if e != "admin"]))
+            if event != "admin":
+                await release.wait()
+            running.remove(event)
+            return event
+
+        users = [asyncio.ensure_future(scheduler(handler, f"u{i}", _data(100 + i))) for i in range(5)]
+        await asyncio.sleep(0.01)
+        assert len(running) == 2
+        # Все слоты пользователей заняты, но апдейт администратора проходит сразу
+        assert await asyncio.wait_for(scheduler(handler, "admin", _data(ADMIN_ID)), 1) == "admin"
+        release.set()
+        assert await asyncio.gather(*users) == [f"u{i}" for i in range(5)]
+        assert peak == 2
+        assert scheduler.active_keys == 0
+
+    asyncio.run(scenario())
+
+
+def test_updates_without_user_and_chat_pass_through():
+    async def scenario():
+        scheduler = UpdateSchedulerMiddleware(ADMIN_ID)
+
+        async def handler(event, data):
+            return event
+
+        assert await scheduler(handler, "poll", {}) == "poll"
+        assert scheduler.active_keys == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,119 @@
+"""ThrottlingMiddleware: token bucket refill and in-flight callback deduplication."""
+
+import asyncio
+from types import SimpleNamespace
+
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from middlewares import throttling
+from middlewares.throttling import ThrottlingMiddleware
+
+ADMIN_ID = 1
+
+
+def _user(user_id):
+    return User(id=user_id, is_bot=False, first_name=f"user{user_id}")
+
+
+def _callback_update(update_id, user_id, data):
+    callback = CallbackQuery(id=str(update_id), from_user=_user(user_id), chat_instance="c", data=data)
+    return Update(update_id=update_id, callback_query=callback)
+
+
+def _message_update(update_id, user_id):
+    message = Message(message_id=update_id, date=0, chat=Chat(id=user_id, type="private"), from_user=_user(user_id))
+    return Update(update_id=update_id, message=message)
+
+
+def _middleware(monkeypatch, clock, **kwargs):
+    # Подменяется только часы middleware, цикл событий asyncio работает с настоящими
+    monkeypatch.setattr(throttling, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    middleware = ThrottlingMiddleware(ADMIN_ID, **kwargs)
+    answers = []
+
+    async def answer(callback, text):
+        answers.append((callback.id, text))
+
+    middleware._answer_silently = answer
+    return middleware, answers
+
+
+async def _handler(event, data):
+    return event.update_id
+
+
+def test_bucket_drops_over_burst_and_refills(monkeypatch):
+    clock = [100.0]
+    middleware, _ = _middleware(monkeypatch, clock, rate=1.0, burst=2)
+    data = {"event_from_user": _user(2)}
+
+    async def scenario():
+        results = [await middleware(_handler, _message_update(i, 2), data) for i in range(3)]
+        assert results == [0, 1, None]
+        clock[0] += 0.5
+        assert await middleware(_handler, _message_update(3, 2), data) is None
+        clock[0] += 0.5
+        assert await middleware(_handler, _message_update(4, 2), data) == 4
+        # Корзина не наполняется выше burst
+        clock[0] += 60
+        results = [await middleware(_handler, _message_update(5 + i, 2), data) for i in range(3)]
+        assert results == [5, 6, None]
+        # Администратор не ограничивается
+        admin = {"event_from_user": _user(ADMIN_ID)}
+        assert [await middleware(_handler, _message_update(10 + i, ADMIN_ID), admin) for i in range(5)] == [
+            10, 11, 12, 13, 14
+        ]
+
+    asyncio.run(scenario())
+
+
+def test_full_buckets_are_pruned(monkeypatch):
+    clock = [0.0]
+    middleware, _ = _middleware(monkeypatch, clock, rate=1.0, burst=2, max_buckets=2)
+    assert middleware._consume(2) and middleware._consume(3)
+    clock[0] += 2
+    assert middleware._consume(4)
+    assert set(middleware._buckets) == {4}
+
+
+def test_duplicate_callback_is_dropped_while_original_runs(monkeypatch):
+    clock = [0.0]
+    middleware, answers = _middleware(monkeypatch, clock, rate=1.0, burst=10)
+    data = {"event_from_user": _user(2)}
+    release = asyncio.Event()
+    handled = []
+
+    async def slow_handler(event, data):
+        handled.append(event.update_id)
+        await release.wait()
+        return event.update_id
+
+    async def scenario():
+        original = asyncio.ensure_future(middleware(slow_handler, _callback_update(1, 2, "pay"), data))
+        await asyncio.sleep(0)
+        assert await middleware(slow_handler, _callback_update(2, 2, "pay"), data) is None
+        # Другой callback того же пользователя не считается повтором
+        other = asyncio.ensure_future(middleware(slow_handler, _callback_update(3, 2, "cancel"), data))
+        await asyncio.sleep(0)
+        release.set()
+        assert await asyncio.gather(original, other) == [1, 3]
+        assert middleware._in_flight == set()
+        # После завершения тот же callback снова обрабатывается
+        assert await middleware(slow_handler, _callback_update(4, 2, "pay"), data) == 4
+
+    asyncio.run(scenario())
+    assert handled == [1, 3, 4]
+    assert answers == [("2", throttling.messages["duplicate_callback"])]
+
+
+def test_throttled_callback_is_answered(monkeypatch):
+    clock = [0.0]
+    middleware, answers = _middleware(monkeypatch, clock, rate=1.0, burst=1)
+    data = {"event_from_user": _user(2)}
+
+    async def scenario():
+        assert await middleware(_handler, _callback_update(1, 2, "a"), data) == 1
+        assert await middleware(_handler, _callback_update(2, 2, "b"), data) is None
+
+    asyncio.run(scenario())
+    assert answers == [("2", throttling.messages["throttle_warning"])]
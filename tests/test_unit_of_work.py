@@ -0,0 +1,104 @@
+"""Concurrent promote / cancel / demote against one database file."""
+
+import threading
+
+RUNNERS = 20
+WAITLIST = 10
+
+
+def _seed(db):
+    db.set_setting("max_runners", RUNNERS)
+    for user_id in range(1, RUNNERS + 1):
+        assert db.add_participant(user_id, f"user{user_id}", f"Бегун {user_id}", "7:00", "runner", "male")
+    for user_id in range(101, 101 + WAITLIST):
+        assert db.add_to_waitlist(user_id, f"user{user_id}", f"Ожидающий {user_id}", "7:00", "runner", "male")
+
+
+def _run_concurrently(calls):
+    results = []
+    lock = threading.Lock()
+    start = threading.Barrier(len(calls))
+
+    def worker(fn, user_id):
+        start.wait()
+        result = fn(user_id)
+        with lock:
+            results.append((fn.__name__, user_id, result))
+
+    threads = [threading.Thread(target=worker, args=call) for call in calls]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _runner_limit(db):
+    return int(db.get_setting("max_runners"))
+
+
+def test_concurrent_promote_cancel_demote_keep_limit_in_sync(db):
+    _seed(db)
+    calls = (
+        [(db.promote_waitlist_user_by_id, user_id) for user_id in range(101, 101 + WAITLIST)]
+        + [(db.cancel_user_participation, user_id) for user_id in range(1, 6)]
+        + [(db.demote_participant_to_waitlist, user_id) for user_id in range(6, 11)]
+    )
+
+    results = _run_concurrently(calls)
+
+    failures = [(name, user_id, result) for name, user_id, result in results if not result["success"]]
+    assert failures == []
+    assert not any("locked" in str(result.get("error", "")) for _, _, result in results)
+
+    runners = db.get_participant_count_by_role("runner")
+    assert runners == RUNNERS + WAITLIST - 5 - 5
+    assert _runner_limit(db) == runners
+    assert {row[1] for row in db.get_waitlist_by_role("runner")} == set(range(6, 11))
+
+
+def test_demote_rolls_back_limit_when_waitlist_insert_fails(db, monkeypatch):
+    _seed(db)
+    monkeypatch.setattr(db, "add_to_waitlist", lambda *args, **kwargs: False)
+
+    result = db.demote_participant_to_waitlist(1)
+
+    assert result["success"] is False
+    assert _runner_limit(db) == RUNNERS
+    assert db.get_participant_by_user_id(1) is not None
+    # Событие откатенного перевода не записывается
+    assert all(event[3] != db.EVENT_DEMOTED for event in db._event_buffer)
+
+
+def test_command_transaction_commits_nested_writes_once(db):
+    _seed(db)
+    with db.unit_of_work():
+        assert db.set_bib_number(1, "11")
+        assert db.promote_waitlist_user_by_id(101)["success"]
+        # чтение внутри транзакции видит ее же изменения
+        assert db.get_setting("max_runners") == RUNNERS + 1
+        assert not any(event[4] and '"11"' in event[4] for event in db._event_buffer)
+
+    assert db.get_participant_by_user_id(1)[7] == "11"
+    assert db.get_participant_by_user_id(101) is not None
+    assert any(event[3] == db.EVENT_BIB for event in db._event_buffer)
+
+
+def test_failed_step_is_undone_alone_and_error_undoes_command(db):
+    _seed(db)
+    with db.unit_of_work():
+        assert db.set_bib_number(1, "5")
+        assert not db.set_bib_number(2, "005")  # тот же номер: откатывается только этот шаг
+        assert db.update_participant_field(2, "name", "Новое имя")
+
+    assert db.get_participant_by_user_id(1)[7] == "5"
+    assert db.get_participant_by_user_id(2)[2] == "Новое имя"
+
+    try:
+        with db.unit_of_work():
+            assert db.set_team_result(1, "7:00") is False
+            assert db.delete_participant(3)
+            raise RuntimeError("команда прервана")
+    except RuntimeError:
+        pass
+    assert db.get_participant_by_user_id(3) is not None
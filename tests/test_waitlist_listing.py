@@ -0,0 +1,26 @@
+"""CLI waitlist listing: queue order, positions and keyset pages."""
+
+
+def _seed(db):
+    for user_id, role in [(1, "volunteer"), (2, "runner"), (3, "volunteer"), (4, "runner"), (5, "runner")]:
+        assert db.add_to_waitlist(user_id, f"user{user_id}", f"Ожидающий {user_id}", "7:00", role, "male")
+        with db.sqlite3.connect(db.DB_PATH) as conn:
+            conn.execute("UPDATE waitlist SET join_date = ? WHERE user_id = ?", (f"2025-01-0{user_id}", user_id))
+
+
+def test_runners_first_with_role_positions(db):
+    _seed(db)
+    rows = [(row["user_id"], row["position"]) for row in db.iter_waitlist()]
+    assert rows == [(2, 1), (4, 2), (5, 3), (1, 1), (3, 2)]
+    assert db.get_waitlist_position(5)[0] == 3
+    assert db.get_waitlist_count() == 5
+    assert db.get_waitlist_count("volunteer") == 2
+
+
+def test_pages_continue_after_queue_id(db):
+    _seed(db)
+    first = list(db.iter_waitlist(limit=2))
+    second = list(db.iter_waitlist(after_id=first[-1]["id"], limit=2))
+    third = list(db.iter_waitlist(after_id=second[-1]["id"], limit=2))
+    assert [row["user_id"] for row in first + second + third] == [2, 4, 5, 1, 3]
+    assert [row["position"] for row in db.iter_waitlist(role="volunteer")] == [1, 2]